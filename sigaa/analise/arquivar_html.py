@@ -0,0 +1,106 @@
+#> cd sigaa
+#> uv run .\analise\arquivar_html.py --remover
+"""
+Migra os HTMLs soltos dos spiders para os acervos em segmentos
+
+    mock/<ano>/<semestre>/ofertas_<id>.html        -> mock/acervo/ (chave <ano>/<semestre>/<id>)
+    temp/docentes/paginas_html/docente_<siape>.html -> temp/docentes/acervo/ (chave <siape>)
+
+Páginas já arquivadas com o mesmo conteúdo não são regravadas, então a
+migração pode ser repetida. Ao final mostra arquivos e bytes antes/depois.
+
+Exemplos de uso:
+    python arquivar_html.py                  # só copia para os acervos
+    python arquivar_html.py --remover        # apaga os HTMLs soltos migrados
+    python arquivar_html.py --compactar      # descarta versões substituídas
+"""
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.acervo import AcervoHtml  # noqa: E402
+from sigaa.spiders.ofertas import chave_acervo  # noqa: E402
+
+PASTA_MOCK = BASE_DIR / 'mock'
+PASTA_PAGINAS = BASE_DIR / 'temp' / 'docentes' / 'paginas_html'
+ACERVO_OFERTAS = PASTA_MOCK / 'acervo'
+ACERVO_DOCENTES = BASE_DIR / 'temp' / 'docentes' / 'acervo'
+
+
+def soltos_ofertas():
+    """(chave, arquivo) de cada mock/<ano>/<semestre>/ofertas_<id>.html"""
+    for arquivo in sorted(PASTA_MOCK.glob('*/*/ofertas_*.html')):
+        ano, semestre = arquivo.parent.parent.name, arquivo.parent.name
+        id_departamento = arquivo.stem.split('_', 1)[1]
+        yield chave_acervo(ano, semestre, id_departamento), arquivo
+
+
+def soltos_docentes():
+    """(chave, arquivo) de cada temp/docentes/paginas_html/docente_<siape>.html"""
+    for arquivo in sorted(PASTA_PAGINAS.glob('docente_*.html')):
+        yield arquivo.stem.replace('docente_', ''), arquivo
+
+
+def tamanho_acervo(pasta):
+    arquivos = [p for p in Path(pasta).glob('*') if p.is_file()]
+    return len(arquivos), sum(p.stat().st_size for p in arquivos)
+
+
+def migrar(nome, soltos, pasta_acervo, remover=False, compactar=False):
+    acervo = AcervoHtml(pasta_acervo)
+    arquivos = bytes_soltos = gravados = 0
+    migrados = []
+    for chave, arquivo in soltos:
+        corpo = arquivo.read_bytes()
+        arquivos += 1
+        bytes_soltos += len(corpo)
+        if acervo.gravar(chave, corpo):
+            gravados += 1
+        migrados.append(arquivo)
+    acervo.fechar()
+
+    if compactar and acervo.substituidos:
+        print(f"🗜️ {nome}: {acervo.compactar() / 1024:.0f} KB liberados na compactação")
+
+    if remover:
+        for arquivo in migrados:
+            arquivo.unlink()
+        for pasta in sorted({arquivo.parent for arquivo in migrados}, reverse=True):
+            try:
+                pasta.rmdir()
+                pasta.parent.rmdir()
+            except OSError:
+                pass  # ainda tem outros arquivos
+
+    total, bytes_acervo = tamanho_acervo(pasta_acervo)
+    print(f"📦 {nome}: {arquivos} HTMLs soltos ({bytes_soltos / 1024:.0f} KB) -> "
+          f"{gravados} gravados; acervo com {len(acervo)} páginas em {total} arquivos "
+          f"({bytes_acervo / 1024:.0f} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Migra os HTMLs soltos de mock/ e temp/docentes/ para os acervos',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--remover',
+        action='store_true',
+        help='Apaga os HTMLs soltos depois de arquivados'
+    )
+    parser.add_argument(
+        '--compactar',
+        action='store_true',
+        help='Compacta os acervos, descartando versões substituídas'
+    )
+    args = parser.parse_args()
+
+    migrar('ofertas', soltos_ofertas(), ACERVO_OFERTAS, args.remover, args.compactar)
+    migrar('docentes', soltos_docentes(), ACERVO_DOCENTES, args.remover, args.compactar)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#> cd sigaa
+#> uv run .\analise\extrair_docentes.py --processos 8
+"""
+Extrai os dados completos dos docentes a partir das páginas arquivadas pelo
+spider docentes_paginas (acervo temp/docentes/acervo/, chave SIAPE) e grava
+data/docentes/docentes_completo.jsonl, sem passar pelo Scrapy.
+
+Equivale a ``scrapy crawl docentes_completo``: usa as mesmas funções de
+extração (extrair_dados_pagina_docente) e monta o mesmo registro
+(montar_docente_completo), mas o parse dos HTMLs roda num pool de processos
+fora do reactor. Cada worker abre o acervo uma vez e lê as páginas direto dos
+segmentos mapeados em memória; o processo principal junta os dados originais
+de docentes.jsonl (via IndiceSiape) e é o único que escreve a saída.
+
+Execuções seguidas são incrementais: data/docentes/.estado/ guarda, por
+SIAPE, o hash da página (lido do índice do acervo) e dos dados originais, e
+o registro montado. Só as páginas que mudaram vão para o pool, e as
+mudanças são acrescentadas a docentes_completo.mudancas.jsonl, ao lado da
+saída, que só é regravada ao compactar (sigaa/delta.py). Com --delta, as
+diferenças (adicionado/alterado/removido) também são gravadas em
+data/docentes/delta/.
+
+Exemplos de uso:
+    python extrair_docentes.py
+    python extrair_docentes.py --processos 1
+    python extrair_docentes.py --delta
+    python extrair_docentes.py --completo
+    python extrair_docentes.py --acervo temp/docentes/acervo \
+        --saida data/docentes/docentes_completo.jsonl
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from parsel import Selector
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.acervo import AcervoHtml  # noqa: E402
+from sigaa.delta import EstadoEntidades  # noqa: E402
+from sigaa.spiders.docentes import (  # noqa: E402
+    ACERVO_PAGINAS,
+    IndiceSiape,
+    extrair_dados_pagina_docente,
+    montar_docente_completo,
+)
+
+# Caminhos padrão, relativos a sigaa/ como nos spiders
+DOCENTES_PADRAO = Path('data/docentes/docentes.jsonl')
+SAIDA_PADRAO = Path('data/docentes/docentes_completo.jsonl')
+PASTA_DELTA = Path('data/docentes/delta')
+
+
+_acervo = None
+
+
+def abrir_acervo(pasta):
+    """Inicializador dos workers: um AcervoHtml por processo"""
+    global _acervo
+    _acervo = AcervoHtml(pasta)
+
+
+def extrair_html(siape):
+    """Worker do pool: extrai perfil e Lattes de uma página de docente"""
+    return extrair_dados_pagina_docente(Selector(text=_acervo.ler_texto(siape)))
+
+
+def hash_docente(hash_pagina, dados_originais):
+    """Hash da página junto com os dados originais que entram no registro"""
+    original = json.dumps(dados_originais, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(f'{hash_pagina}\0{original}'.encode('utf-8')).hexdigest()
+
+
+def extrair(pasta, arquivo_docentes, saida, processos=None, delta=False, completo=False):
+    """Extrai as páginas novas ou alteradas do acervo; retorna o total de docentes"""
+    acervo = AcervoHtml(pasta)
+    siapes = acervo.chaves()
+    if not siapes:
+        print(f"❌ Nenhuma página no acervo {pasta}")
+        return 0
+
+    indice = IndiceSiape(arquivo_docentes)
+    estado = EstadoEntidades(saida.parent / '.estado' / f'{saida.stem}.json',
+                             chave_registro=lambda docente: docente.get('siape'))
+    # Só as páginas cujo hash mudou desde a última execução são reextraídas
+    pendentes = []
+    for siape in siapes:
+        dados_originais = indice.buscar(siape) or {'siape': siape}
+        hash_pagina = hash_docente(acervo.hash(siape), dados_originais)
+        if completo or not estado.inalterado(siape, hash_pagina):
+            pendentes.append((siape, dados_originais, hash_pagina))
+    # Na ordem física dos segmentos, para leituras sequenciais
+    pendentes.sort(key=lambda pendente: acervo.indice[pendente[0]][:2])
+
+    existentes = set(siapes)
+    for siape in [s for s in estado.entidades if s not in existentes]:
+        estado.remover(siape)
+
+    print(f"🔎 {len(siapes)} páginas, {len(pendentes)} novas ou alteradas")
+    if pendentes:
+        processos = max(1, min(processos or os.cpu_count() or 1, len(pendentes)))
+        print(f"⚙️ Extraindo em {processos} processo(s)")
+        chaves = [siape for siape, *_ in pendentes]
+
+        def registrar(resultados):
+            for (siape, dados_originais, hash_pagina), dados_extraidos in zip(
+                    pendentes, resultados):
+                docente = montar_docente_completo(
+                    dados_originais, dados_extraidos, siape, f'{pasta}#{siape}')
+                estado.atualizar(siape, hash_pagina, [docente.para_dict()])
+
+        if processos == 1:
+            abrir_acervo(pasta)
+            registrar(map(extrair_html, chaves))
+        else:
+            chunksize = max(1, len(chaves) // (processos * 4))
+            with ProcessPoolExecutor(max_workers=processos, initializer=abrir_acervo,
+                                     initargs=(pasta,)) as pool:
+                registrar(pool.map(extrair_html, chaves, chunksize=chunksize))
+
+    if estado.alterado or not saida.exists():
+        estado.gravar_saida(saida)
+        estado.salvar()
+        print(f"💾 {len(estado.operacoes)} mudança(s) aplicadas em {saida}")
+    else:
+        print("⏭️ Nenhuma mudança; saída mantida")
+
+    if delta:
+        caminho = estado.gravar_delta(saida.parent / PASTA_DELTA.name, saida.stem)
+        if caminho:
+            print(f"📝 Delta gravado em {caminho}")
+    return len(estado.entidades)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extrai os dados completos das páginas de docentes arquivadas em temp/',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--acervo',
+        type=Path,
+        default=ACERVO_PAGINAS,
+        help=f'Acervo com as páginas dos docentes (padrão: {ACERVO_PAGINAS})'
+    )
+    parser.add_argument(
+        '--docentes',
+        type=Path,
+        default=DOCENTES_PADRAO,
+        help=f'JSONL com os dados originais dos docentes (padrão: {DOCENTES_PADRAO})'
+    )
+    parser.add_argument(
+        '--saida',
+        type=Path,
+        default=SAIDA_PADRAO,
+        help=f'Arquivo JSONL de saída (padrão: {SAIDA_PADRAO})'
+    )
+    parser.add_argument(
+        '-j', '--processos',
+        type=int,
+        default=None,
+        help='Tamanho do pool de processos (padrão: número de CPUs)'
+    )
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help=f'Grava também as mudanças desta execução em {PASTA_DELTA}/'
+    )
+    parser.add_argument(
+        '--completo',
+        action='store_true',
+        help='Ignora o estado salvo e reextrai todos os HTMLs'
+    )
+    args = parser.parse_args()
+
+    total = extrair(args.acervo, args.docentes, args.saida, args.processos,
+                    delta=args.delta, completo=args.completo)
+    print(f'✅ {total} docentes gravados em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
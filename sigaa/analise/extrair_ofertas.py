@@ -1,43 +1,274 @@
-import os
-import glob
+#> cd sigaa
+#> uv run .\analise\extrair_ofertas.py --anos 2023-2025 --processos 8
+"""
+Extrai as turmas dos HTMLs arquivados pelo spider de ofertas no acervo
+mock/acervo/ (chaves <ano>/<semestre>/<id>) para
+data/ofertas/<ano>-<semestre>.jsonl
+
+A extração é incremental: para cada ano/semestre é mantido um manifesto em
+data/ofertas/.cache/<ano>-<semestre>/manifesto.json com o hash de cada
+listagem (lido do índice do acervo, sem abrir os segmentos), além de um
+fragmento JSONL com as turmas já extraídas de cada departamento. Numa nova
+execução só as listagens novas ou alteradas são lidas e reprocessadas;
+o JSONL final é remontado a partir dos fragmentos (sem novo parse) e só é
+reescrito quando algo mudou.
+
+O parse dos HTMLs pendentes de todos os semestres é distribuído num pool de
+processos; cada worker abre o acervo uma vez (mmap dos segmentos) e devolve
+o lote de turmas do arquivo já serializado em JSONL, e o processo principal
+é o único que escreve em disco, na ordem dos departamentos, de modo que a
+saída não depende do número de processos. Os workers importam só
+sigaa.acervo e sigaa.listagem, sem o Scrapy nem o Twisted.
+
+Exemplos de uso:
+    python extrair_ofertas.py                          # 2025, semestres 1 a 4
+    python extrair_ofertas.py --anos 2020-2025 --semestres 1,2
+    python extrair_ofertas.py --anos 2024,2025 --processos 1
+"""
+import argparse
 import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 from parsel import Selector
 
-# Parâmetros
-anos = ['2025']  # Adapte conforme necessário
-semestres = ['1', '2', '3', '4']
-
-base_mock = os.path.abspath(os.path.join(
-    os.path.dirname(__file__), '..', 'mock'))
-base_saida = os.path.abspath(os.path.join(
-    os.path.dirname(__file__), '..', 'data', 'ofertas'))
-os.makedirs(base_saida, exist_ok=True)
-
-for ano in anos:
-    for semestre in semestres:
-        pasta_html = os.path.join(base_mock, ano, semestre)
-        saida_jsonl = os.path.join(base_saida, f'{ano}-{semestre}.jsonl')
-        arquivos_html = glob.glob(os.path.join(pasta_html, 'ofertas_*.html'))
-        with open(saida_jsonl, 'w', encoding='utf-8') as fout:
-            for html_path in arquivos_html:
-                with open(html_path, encoding='utf-8') as f:
-                    html = f.read()
-                sel = Selector(text=html)
-                id_departamento = os.path.basename(html_path).split('_')[
-                    1].split('.')[0]
-                for row in sel.css('div#turmasAbertas table.listagem tbody tr'):
-                    codigo = row.css('td.turma::text').get()
-                    if not codigo:
-                        continue
-                    oferta = {
-                        'id_departamento': id_departamento,
-                        'codigo': codigo.strip(),
-                        'ano_periodo': row.css('td.anoPeriodo::text').get(default='').strip(),
-                        'docente': row.css('td.nome::text').get(default='').strip(),
-                        'horario': row.css('td:nth-child(4)::text').get(default='').strip(),
-                        'vagas_ofertadas': row.css('td:nth-child(6)::text').get(default='').strip(),
-                        'vagas_ocupadas': row.css('td:nth-child(7)::text').get(default='').strip(),
-                        'local': row.css('td:nth-child(8)::text').get(default='').strip(),
-                    }
-                    fout.write(json.dumps(oferta, ensure_ascii=False) + '\n')
-print('Extração concluída!')
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.acervo import AcervoHtml  # noqa: E402
+from sigaa.listagem import extrair_turmas  # noqa: E402
+
+# Parâmetros padrão (sobrescritos por --anos/--semestres)
+ANOS_PADRAO = '2025'
+SEMESTRES_PADRAO = '1,2,3,4'
+
+base_acervo = BASE_DIR / 'mock' / 'acervo'
+base_saida = BASE_DIR / 'data' / 'ofertas'
+base_cache = base_saida / '.cache'
+
+
+def expandir_intervalo(texto):
+    """'2020-2022,2025' -> ['2020', '2021', '2022', '2025']"""
+    valores = []
+    for parte in texto.split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        if '-' in parte:
+            inicio, fim = (int(v) for v in parte.split('-', 1))
+            if inicio > fim:
+                raise argparse.ArgumentTypeError(f"Intervalo inválido: {parte}")
+            valores.extend(str(v) for v in range(inicio, fim + 1))
+        elif parte.isdigit():
+            valores.append(parte)
+        else:
+            raise argparse.ArgumentTypeError(f"Valor inválido: {parte}")
+    if not valores:
+        raise argparse.ArgumentTypeError("Nenhum valor informado")
+    return list(dict.fromkeys(valores))
+
+
+def carregar_manifesto(pasta_cache):
+    """Carrega o manifesto de um ano/semestre (vazio se não existir)"""
+    arquivo = pasta_cache / 'manifesto.json'
+    if not arquivo.exists():
+        return {}
+    try:
+        with open(arquivo, encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"⚠️ Manifesto inválido em {arquivo} ({e}), reextraindo tudo")
+        return {}
+
+
+def salvar_manifesto(pasta_cache, manifesto):
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)"""
+    arquivo = pasta_cache / 'manifesto.json'
+    temporario = arquivo.with_suffix('.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, sort_keys=True)
+    os.replace(temporario, arquivo)
+
+
+def listagem_departamento(chave):
+    """
+    Só as listagens por departamento (<ano>/<semestre>/<id>); acervos antigos
+    guardavam as buscas em lote como <ano>/<semestre>/lote[-<nivel>]
+    """
+    return chave.rsplit('/', 1)[1].isdigit()
+
+
+def chave_ordenacao(chave):
+    """Ordena os departamentos numericamente para uma saída determinística"""
+    id_departamento = chave.rsplit('/', 1)[1]
+    return (0, int(id_departamento), '') if id_departamento.isdigit() else (1, 0, id_departamento)
+
+
+_acervo = None
+
+
+def abrir_acervo(pasta):
+    """Inicializador dos workers: um AcervoHtml por processo"""
+    global _acervo
+    _acervo = AcervoHtml(pasta)
+
+
+def extrair_html(chave):
+    """
+    Worker do pool: extrai as turmas de uma listagem do acervo
+
+    Devolve (lote, total), onde lote são as linhas JSONL já codificadas.
+    """
+    sel = Selector(text=_acervo.ler_texto(chave))
+    linhas = [oferta.para_jsonl() for oferta in extrair_turmas(sel, chave.rsplit('/', 1)[1])]
+    return ''.join(linhas).encode('utf-8'), len(linhas)
+
+
+def planejar_semestre(acervo, ano, semestre):
+    """
+    Compara as listagens de um ano/semestre no acervo com o manifesto e
+    separa as que podem ser reaproveitadas das que precisam ser reextraídas;
+    sem nenhuma listagem no acervo, tudo o que o manifesto tinha foi removido
+    """
+    plano = {
+        'ano': ano,
+        'semestre': semestre,
+        'pasta_cache': base_cache / f'{ano}-{semestre}',
+        'saida_jsonl': base_saida / f'{ano}-{semestre}.jsonl',
+        'manifesto': {},
+        'novo_manifesto': {},
+        'chaves': sorted(filter(listagem_departamento, acervo.chaves(f'{ano}/{semestre}/')),
+                         key=chave_ordenacao),
+        'pendentes': [],
+    }
+
+    pasta_cache = plano['pasta_cache']
+    manifesto = plano['manifesto'] = carregar_manifesto(pasta_cache)
+    if not plano['chaves']:
+        return plano
+
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    novo_manifesto = plano['novo_manifesto']
+
+    for chave in plano['chaves']:
+        id_departamento = chave.rsplit('/', 1)[1]
+        hash_pagina = acervo.hash(chave)
+        anterior = manifesto.get(id_departamento)
+        fragmento = pasta_cache / f'ofertas_{id_departamento}.jsonl'
+        if anterior and anterior.get('hash') == hash_pagina and fragmento.exists():
+            novo_manifesto[id_departamento] = anterior
+            continue
+        plano['pendentes'].append((chave, hash_pagina))
+
+    return plano
+
+
+def concluir_semestre(plano, resultados):
+    """
+    Escritor único: grava os fragmentos das listagens reextraídas, remonta o
+    JSONL do semestre na ordem dos departamentos e atualiza o manifesto
+    """
+    pasta_cache = plano['pasta_cache']
+    saida_jsonl = plano['saida_jsonl']
+    manifesto = plano['manifesto']
+    novo_manifesto = plano['novo_manifesto']
+    stats = {'arquivos': len(plano['chaves']), 'extraidos': 0,
+             'removidos': 0, 'turmas': 0}
+
+    if not plano['chaves'] and not manifesto:
+        return stats
+
+    for (chave, hash_pagina), (lote, total) in zip(plano['pendentes'], resultados):
+        id_departamento = chave.rsplit('/', 1)[1]
+        with open(pasta_cache / f'ofertas_{id_departamento}.jsonl', 'wb') as fout:
+            fout.write(lote)
+        novo_manifesto[id_departamento] = {'hash': hash_pagina, 'turmas': total}
+        stats['extraidos'] += 1
+
+    for id_departamento in manifesto.keys() - novo_manifesto.keys():
+        (pasta_cache / f'ofertas_{id_departamento}.jsonl').unlink(missing_ok=True)
+        stats['removidos'] += 1
+
+    stats['turmas'] = sum(e.get('turmas', 0) for e in novo_manifesto.values())
+
+    if stats['extraidos'] or stats['removidos'] or not saida_jsonl.exists():
+        temporario = saida_jsonl.with_suffix('.tmp')
+        with open(temporario, 'wb') as fout:
+            for chave in plano['chaves']:
+                fragmento = pasta_cache / f"ofertas_{chave.rsplit('/', 1)[1]}.jsonl"
+                with open(fragmento, 'rb') as fin:
+                    fout.write(fin.read())
+        os.replace(temporario, saida_jsonl)
+
+    salvar_manifesto(pasta_cache, novo_manifesto)
+    return stats
+
+
+def extrair(anos, semestres, processos=None):
+    """
+    Extrai todos os ano/semestre pedidos; o parse roda no pool de processos
+    e a escrita fica no processo principal
+    """
+    base_saida.mkdir(parents=True, exist_ok=True)
+    acervo = AcervoHtml(base_acervo)
+    planos = [planejar_semestre(acervo, ano, semestre)
+              for ano in anos for semestre in semestres]
+    pendentes = [chave for plano in planos for chave, _ in plano['pendentes']]
+    processos = max(1, min(processos or os.cpu_count() or 1, len(pendentes) or 1))
+    print(f"🔎 {len(pendentes)} listagens para extrair em {processos} processo(s)")
+
+    def consumir(resultados):
+        # map() preserva a ordem de submissão: os resultados de cada plano
+        # chegam em sequência e cada semestre é fechado assim que completa
+        for plano in planos:
+            lote = [next(resultados) for _ in plano['pendentes']]
+            stats = concluir_semestre(plano, lote)
+            if stats['arquivos'] or stats['removidos']:
+                print(f"📄 {plano['ano']}-{plano['semestre']}: "
+                      f"{stats['extraidos']}/{stats['arquivos']} listagens reextraídas, "
+                      f"{stats['removidos']} removidos, {stats['turmas']} turmas")
+
+    if processos == 1:
+        abrir_acervo(base_acervo)
+        consumir(map(extrair_html, pendentes))
+        return
+
+    chunksize = max(1, len(pendentes) // (processos * 4))
+    with ProcessPoolExecutor(max_workers=processos, initializer=abrir_acervo,
+                             initargs=(base_acervo,)) as pool:
+        consumir(pool.map(extrair_html, pendentes, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extrai as turmas das listagens de ofertas arquivadas em mock/acervo/',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        '--anos',
+        type=expandir_intervalo,
+        default=expandir_intervalo(ANOS_PADRAO),
+        help=f'Anos a extrair, ex.: 2025, 2020-2025, 2023,2025 (padrão: {ANOS_PADRAO})'
+    )
+    parser.add_argument(
+        '--semestres',
+        type=expandir_intervalo,
+        default=expandir_intervalo(SEMESTRES_PADRAO),
+        help=f'Semestres a extrair, ex.: 1,2 ou 1-4 (padrão: {SEMESTRES_PADRAO})'
+    )
+    parser.add_argument(
+        '-j', '--processos',
+        type=int,
+        default=None,
+        help='Tamanho do pool de processos (padrão: número de CPUs)'
+    )
+    args = parser.parse_args()
+
+    extrair(args.anos, args.semestres, args.processos)
+    print('Extração concluída!')
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,17 @@ Exemplo de uso:
     python transformar.py input.jsonl output.csv
     python transformar.py --input data/cursos/cursos.jsonl --output cursos.csv
     python transformar.py data/unidades/departamentos.jsonl departamentos.csv
+    python transformar.py data/docentes/docentes_completo.jsonl --amostra 5000
+
+O arquivo é lido uma única vez e escrito em streaming (memória constante):
+as colunas saem dos primeiros registros (--amostra) e chaves que só
+aparecem depois entram como colunas extras no fim do CSV.
+
+Com --formato parquet/feather (pandas + pyarrow), a saída é colunar: texto
+repetitivo (departamento, turno, sede...) vira coluna dictionary, gravada em
+lotes com zstd; o R lê direto com arrow::read_parquet/read_feather. Com
+--todos, todos os .jsonl do projeto são convertidos em paralelo:
+    python transformar.py --todos --formato parquet -j 4
     
 Exemplos de formatos suportados:
     Cursos: {"sigla_departamento": "ADM", "nome": "ADMINISTRAÇÃO", ...}
@@ -22,23 +33,64 @@ Exemplos de formatos suportados:
 import json
 import csv
 import argparse
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain, islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+try:
+    import pandas as pd
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pandas + pyarrow só para --formato parquet/feather
+    pd = pyarrow = None
 
-def ler_jsonl(arquivo_jsonl: str) -> List[Dict[str, Any]]:
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.delta import ler_saida  # noqa: E402
+
+# Registros lidos antes de fixar as colunas do CSV
+AMOSTRA_PADRAO = 1000
+
+FORMATOS = ('csv', 'parquet', 'feather')
+EXTENSOES = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+# Linhas por row group (Parquet) / record batch (Feather)
+LOTE_PADRAO = 50_000
+
+# Colunas de texto com até tantos valores distintos (e no máximo metade das
+# linhas) viram dictionary (factor no R): departamento, turno, sede...
+LIMITE_CATEGORIAS = 1000
+
+# Arquivos .jsonl internos (índice do acervo, journal do checkpoint), que
+# não são conjuntos de dados
+JSONL_INTERNOS = {'indice.jsonl', 'checkpoint.jsonl'}
+# Logs de mudanças dos JSONL consolidados (sigaa/delta.py), lidos junto com eles
+SUFIXO_MUDANCAS = '.mudancas.jsonl'
+
+
+def iterar_jsonl(arquivo_jsonl: str, avisar: bool = True) -> Iterator[Dict[str, Any]]:
     """
-    Lê um arquivo JSONL e retorna uma lista de dicionários
-    
+    Lê um arquivo JSONL registro a registro, sem carregá-lo inteiro, com as
+    mudanças de ``<nome>.mudancas.jsonl`` aplicadas, se houver
+
     Args:
         arquivo_jsonl: Caminho para o arquivo JSONL
-        
-    Returns:
-        Lista de dicionários com os dados do arquivo
+        avisar: Mostra as linhas inválidas (que são sempre puladas)
+
+    Yields:
+        Um dicionário por linha válida do arquivo
     """
-    dados = []
-    
+    return ler_saida(arquivo_jsonl, _linhas_jsonl(arquivo_jsonl, avisar))
+
+
+def _linhas_jsonl(arquivo_jsonl: str, avisar: bool) -> Iterator[Dict[str, Any]]:
+    """Linhas válidas do arquivo, como estão no disco"""
     try:
         with open(arquivo_jsonl, 'r', encoding='utf-8') as arquivo:
             for linha_num, linha in enumerate(arquivo, 1):
@@ -47,101 +99,51 @@ def ler_jsonl(arquivo_jsonl: str) -> List[Dict[str, Any]]:
                     # Remove vírgula no final se existir (comum em alguns formatos JSONL)
                     if linha.endswith(','):
                         linha = linha[:-1]
-                    
+
                     try:
-                        dados.append(json.loads(linha))
+                        yield json.loads(linha)
                     except json.JSONDecodeError as e:
-                        print(f"Erro ao processar linha {linha_num}: {e}")
-                        print(f"Linha problemática: {linha}")
+                        if avisar:
+                            print(f"Erro ao processar linha {linha_num}: {e}")
+                            print(f"Linha problemática: {linha}")
                         continue
-                        
+
     except FileNotFoundError:
         print(f"Erro: Arquivo '{arquivo_jsonl}' não encontrado.")
         sys.exit(1)
-    except Exception as e:
+    except OSError as e:
         print(f"Erro ao ler arquivo: {e}")
         sys.exit(1)
-        
-    return dados
 
 
-def jsonl_para_csv(arquivo_jsonl: str, arquivo_csv: str = None) -> str:
+def ler_jsonl(arquivo_jsonl: str) -> List[Dict[str, Any]]:
     """
-    Converte um arquivo JSONL para CSV
-    Detecta automaticamente o formato e aplica a conversão apropriada
-    
+    Lê um arquivo JSONL e retorna uma lista de dicionários
+    (carrega tudo em memória; para converter, prefira iterar_jsonl)
+
     Args:
-        arquivo_jsonl: Caminho para o arquivo JSONL de entrada
-        arquivo_csv: Caminho para o arquivo CSV de saída (opcional)
-        
+        arquivo_jsonl: Caminho para o arquivo JSONL
+
     Returns:
-        Caminho do arquivo CSV criado
+        Lista de dicionários com os dados do arquivo
     """
-    # Se não especificar arquivo de saída, criar baseado no nome do arquivo de entrada
-    if not arquivo_csv:
-        caminho_entrada = Path(arquivo_jsonl)
-        arquivo_csv = caminho_entrada.with_suffix('.csv')
-    
-    # Ler dados do JSONL
-    dados = ler_jsonl(arquivo_jsonl)
-    
-    if not dados:
-        print("Nenhum dado encontrado no arquivo JSONL")
-        return None
-    
-    # Detectar se é arquivo de departamentos
-    if detectar_tipo_departamentos(dados):
-        print("Detectado formato de departamentos - convertendo com estrutura apropriada...")
-        return converter_departamentos_para_csv(arquivo_jsonl, arquivo_csv)
-    
-    # Formato padrão para cursos e outros dados estruturados
-    print("Detectado formato padrão - convertendo...")
-    
-    # Extrair todas as chaves únicas dos dados
-    todas_chaves = set()
-    for item in dados:
-        todas_chaves.update(item.keys())
-    
-    # Ordenar as chaves para ter uma ordem consistente
-    colunas = sorted(list(todas_chaves))
-    
-    # Escrever arquivo CSV
-    try:
-        with open(arquivo_csv, 'w', newline='', encoding='utf-8') as arquivo:
-            escritor = csv.DictWriter(arquivo, fieldnames=colunas, delimiter=';')
-            
-            # Escrever cabeçalho
-            escritor.writeheader()
-            
-            # Escrever dados
-            for item in dados:
-                escritor.writerow(item)
-                
-        print(f"Arquivo CSV criado com sucesso: {arquivo_csv}")
-        print(f"Total de registros processados: {len(dados)}")
-        print(f"Colunas: {', '.join(colunas)}")
-        
-        return str(arquivo_csv)
-        
-    except Exception as e:
-        print(f"Erro ao escrever arquivo CSV: {e}")
-        return None
+    return list(iterar_jsonl(arquivo_jsonl))
 
 
 def detectar_tipo_departamentos(dados: List[Dict[str, Any]]) -> bool:
     """
     Detecta se os dados seguem o formato de departamentos
     (objetos com chave numérica única apontando para nome do departamento)
-    
+
     Args:
-        dados: Lista de dicionários dos dados
-        
+        dados: Lista de dicionários dos dados (basta a amostra inicial)
+
     Returns:
         True se for formato de departamentos, False caso contrário
     """
     if not dados:
         return False
-    
+
     # Verifica se cada item tem exatamente uma chave e se a chave é numérica
     for item in dados[:5]:  # Verifica os primeiros 5 itens
         if len(item) != 1:
@@ -149,20 +151,179 @@ def detectar_tipo_departamentos(dados: List[Dict[str, Any]]) -> bool:
         chave = list(item.keys())[0]
         if not chave.isdigit():
             return False
-    
+
     return True
 
 
+def linhas_departamentos(registros: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Transforma {"672": "CAMPUS UNB CEILÂNDIA: FACULDADE..."} em linhas
+    {id_departamento, nome_departamento}, uma a uma
+    """
+    for item in registros:
+        for id_dept, nome_dept in item.items():
+            yield {'id_departamento': id_dept, 'nome_departamento': nome_dept}
+
+
+def _valor_csv(valor: Any) -> Any:
+    """Valores aninhados (formação, currículo Lattes) viram JSON numa célula"""
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def escrever_csv(registros: Iterable[Dict[str, Any]], arquivo_csv: str,
+                 amostra: int = AMOSTRA_PADRAO,
+                 colunas: Optional[List[str]] = None) -> Tuple[int, List[str]]:
+    """
+    Escreve os registros em CSV (separador ';') num único passe, com memória
+    constante
+
+    As colunas são as chaves dos primeiros ``amostra`` registros, em ordem
+    alfabética (ou ``colunas``, se dadas). Chaves que só aparecem depois da
+    amostra não quebram a escrita: os valores delas vão para um arquivo de
+    transbordo (índice da linha + valores) e, no fim, o CSV é regravado em
+    streaming com essas colunas acrescentadas à direita.
+
+    Args:
+        registros: Iterável de dicionários (lido uma única vez)
+        arquivo_csv: Caminho do CSV de saída
+        amostra: Registros usados para inferir as colunas
+        colunas: Colunas fixas (dispensa a amostra)
+
+    Returns:
+        (total de linhas, colunas do CSV final)
+    """
+    registros = iter(registros)
+    if colunas is None:
+        inicio = list(islice(registros, max(1, amostra)))
+        colunas = sorted({chave for item in inicio for chave in item})
+        registros = chain(inicio, registros)
+    conhecidas = set(colunas)
+
+    destino = Path(arquivo_csv)
+    temporario = destino.with_name(destino.name + '.tmp')
+    transbordo = destino.with_name(destino.name + '.transbordo.jsonl')
+    novas = set()  # colunas tardias
+    total = 0
+
+    with open(temporario, 'w', newline='', encoding='utf-8') as arquivo, \
+            open(transbordo, 'w', encoding='utf-8') as extras:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(colunas)
+        for item in registros:
+            escritor.writerow([_valor_csv(item.get(coluna, '')) for coluna in colunas])
+            if not item.keys() <= conhecidas:
+                tardios = {chave: _valor_csv(valor) for chave, valor in item.items()
+                           if chave not in conhecidas}
+                novas.update(tardios)
+                extras.write(json.dumps([total, tardios], ensure_ascii=False) + '\n')
+            total += 1
+
+    try:
+        if novas:
+            colunas = _acrescentar_colunas(
+                temporario, transbordo, destino, colunas, sorted(novas))
+        else:
+            os.replace(temporario, destino)
+    finally:
+        temporario.unlink(missing_ok=True)
+        transbordo.unlink(missing_ok=True)
+    return total, colunas
+
+
+def _acrescentar_colunas(temporario: Path, transbordo: Path, destino: Path,
+                         colunas: List[str], novas: List[str]) -> List[str]:
+    """
+    Grava o CSV final a partir do temporário com as colunas tardias, casando
+    cada linha com o transbordo em ordem (os dois são lidos em streaming)
+    """
+    print(f"↪️ {len(novas)} coluna(s) fora da amostra: {', '.join(novas)}")
+    with open(temporario, newline='', encoding='utf-8') as entrada, \
+            open(transbordo, encoding='utf-8') as extras, \
+            open(destino, 'w', newline='', encoding='utf-8') as arquivo:
+        leitor = csv.reader(entrada, delimiter=';')
+        escritor = csv.writer(arquivo, delimiter=';')
+        next(leitor)
+        escritor.writerow(colunas + novas)
+        proximo = next(extras, None)
+        vazio = [''] * len(novas)
+        for indice, linha in enumerate(leitor):
+            if proximo is not None:
+                indice_extra, tardios = json.loads(proximo)
+                if indice_extra == indice:
+                    escritor.writerow(linha + [tardios.get(coluna, '') for coluna in novas])
+                    proximo = next(extras, None)
+                    continue
+            escritor.writerow(linha + vazio)
+    return colunas + novas
+
+
+def jsonl_para_csv(arquivo_jsonl: str, arquivo_csv: str = None,
+                   amostra: int = AMOSTRA_PADRAO) -> str:
+    """
+    Converte um arquivo JSONL para CSV
+    Detecta automaticamente o formato e aplica a conversão apropriada
+
+    O arquivo é lido uma única vez: a detecção do formato e as colunas saem
+    da amostra inicial, e o resto é escrito à medida que é lido.
+
+    Args:
+        arquivo_jsonl: Caminho para o arquivo JSONL de entrada
+        arquivo_csv: Caminho para o arquivo CSV de saída (opcional)
+        amostra: Registros usados para detectar o formato e as colunas
+
+    Returns:
+        Caminho do arquivo CSV criado
+    """
+    # Se não especificar arquivo de saída, criar baseado no nome do arquivo de entrada
+    if not arquivo_csv:
+        caminho_entrada = Path(arquivo_jsonl)
+        arquivo_csv = caminho_entrada.with_suffix('.csv')
+
+    registros = iterar_jsonl(arquivo_jsonl)
+    inicio = list(islice(registros, max(1, amostra)))
+
+    if not inicio:
+        print("Nenhum dado encontrado no arquivo JSONL")
+        return None
+
+    registros = chain(inicio, registros)
+    departamentos = detectar_tipo_departamentos(inicio)
+    if departamentos:
+        # Detectar se é arquivo de departamentos
+        print("Detectado formato de departamentos - convertendo com estrutura apropriada...")
+        registros = linhas_departamentos(registros)
+        colunas = ['id_departamento', 'nome_departamento']
+    else:
+        # Formato padrão para cursos e outros dados estruturados
+        print("Detectado formato padrão - convertendo...")
+        colunas = sorted({chave for item in inicio for chave in item})
+
+    try:
+        total, colunas = escrever_csv(registros, arquivo_csv, colunas=colunas)
+    except OSError as e:
+        print(f"Erro ao escrever arquivo CSV: {e}")
+        return None
+
+    tipo = 'departamentos' if departamentos else 'registros'
+    print(f"Arquivo CSV criado com sucesso: {arquivo_csv}")
+    print(f"Total de {tipo} processados: {total}")
+    print(f"Colunas: {', '.join(colunas)}")
+
+    return str(arquivo_csv)
+
+
 def converter_departamentos_para_csv(arquivo_jsonl: str, arquivo_csv: str = None) -> str:
     """
     Converte arquivo JSONL de departamentos para CSV com formato legível
     Transforma {"672": "CAMPUS UNB CEILÂNDIA: FACULDADE..."} em
     CSV com colunas: id_departamento, nome_departamento
-    
+
     Args:
         arquivo_jsonl: Caminho para o arquivo JSONL de entrada
         arquivo_csv: Caminho para o arquivo CSV de saída (opcional)
-        
+
     Returns:
         Caminho do arquivo CSV criado
     """
@@ -170,50 +331,303 @@ def converter_departamentos_para_csv(arquivo_jsonl: str, arquivo_csv: str = None
     if not arquivo_csv:
         caminho_entrada = Path(arquivo_jsonl)
         arquivo_csv = caminho_entrada.with_suffix('.csv')
-    
-    # Ler dados do JSONL
-    dados = ler_jsonl(arquivo_jsonl)
-    
-    if not dados:
-        print("Nenhum dado encontrado no arquivo JSONL")
-        return None
-    
-    # Converter para formato de tabela
-    dados_convertidos = []
-    for item in dados:
-        for id_dept, nome_dept in item.items():
-            dados_convertidos.append({
-                'id_departamento': id_dept,
-                'nome_departamento': nome_dept
-            })
-    
-    # Escrever arquivo CSV
+
     try:
-        with open(arquivo_csv, 'w', newline='', encoding='utf-8') as arquivo:
-            escritor = csv.DictWriter(arquivo, fieldnames=['id_departamento', 'nome_departamento'], delimiter=';')
-            
-            # Escrever cabeçalho
-            escritor.writeheader()
-            
-            # Escrever dados
-            for item in dados_convertidos:
-                escritor.writerow(item)
-                
-        print(f"Arquivo CSV de departamentos criado com sucesso: {arquivo_csv}")
-        print(f"Total de departamentos processados: {len(dados_convertidos)}")
-        print(f"Colunas: id_departamento, nome_departamento")
-        
-        return str(arquivo_csv)
-        
-    except Exception as e:
+        total, _ = escrever_csv(
+            linhas_departamentos(iterar_jsonl(arquivo_jsonl)), arquivo_csv,
+            colunas=['id_departamento', 'nome_departamento'])
+    except OSError as e:
         print(f"Erro ao escrever arquivo CSV: {e}")
         return None
 
+    if not total:
+        print("Nenhum dado encontrado no arquivo JSONL")
+        return None
+
+    print(f"Arquivo CSV de departamentos criado com sucesso: {arquivo_csv}")
+    print(f"Total de departamentos processados: {total}")
+    print(f"Colunas: id_departamento, nome_departamento")
+
+    return str(arquivo_csv)
+
+
+# ================================================================================
+# SAÍDA COLUNAR (PARQUET / FEATHER)
+# ================================================================================
+
+def abrir_registros(arquivo_jsonl: str, avisar: bool = True) -> Tuple[bool, Iterator[Dict[str, Any]]]:
+    """
+    Registros do arquivo, já no formato de tabela
+
+    Returns:
+        (é departamentos, iterador de registros); arquivos de departamentos
+        viram linhas {id_departamento, nome_departamento}
+    """
+    registros = iterar_jsonl(arquivo_jsonl, avisar)
+    inicio = list(islice(registros, 5))
+    registros = chain(inicio, registros)
+    if detectar_tipo_departamentos(inicio):
+        return True, linhas_departamentos(registros)
+    return False, registros
+
+
+def _tipo_valor(valor: Any) -> str:
+    if valor is None:
+        return 'null'
+    if isinstance(valor, bool):
+        return 'bool'
+    if isinstance(valor, int):
+        return 'int'
+    if isinstance(valor, float):
+        return 'float'
+    if isinstance(valor, str):
+        return 'str'
+    return 'aninhado'
+
+
+def perfil_jsonl(arquivo_jsonl: str) -> Dict[str, Any]:
+    """
+    Primeira leitura do arquivo, com memória constante: colunas, tipos e os
+    valores distintos das colunas de texto (até LIMITE_CATEGORIAS)
+
+    Returns:
+        {'linhas', 'departamentos', 'colunas': {nome: {'tipos', 'distintos'}}}
+    """
+    departamentos, registros = abrir_registros(arquivo_jsonl)
+    colunas = {}
+    linhas = 0
+    for item in registros:
+        linhas += 1
+        for chave, valor in item.items():
+            coluna = colunas.get(chave)
+            if coluna is None:
+                coluna = colunas[chave] = {'tipos': set(), 'distintos': set()}
+            tipo = _tipo_valor(valor)
+            coluna['tipos'].add(tipo)
+            distintos = coluna['distintos']
+            if tipo == 'str' and distintos is not None:
+                distintos.add(valor)
+                if len(distintos) > LIMITE_CATEGORIAS:
+                    coluna['distintos'] = None  # texto livre
+    return {'linhas': linhas, 'departamentos': departamentos, 'colunas': colunas}
+
+
+def esquema_arrow(perfil: Dict[str, Any]) -> Tuple[Any, Dict[str, List[str]]]:
+    """
+    Esquema Arrow do perfil e as categorias das colunas dictionary
+
+    As categorias são fixas (ordenadas) para o arquivo todo, então todos os
+    lotes usam o mesmo dicionário: o Feather (Arrow IPC) não aceita troca de
+    dicionário entre batches.
+    """
+    campos = []
+    categorias = {}
+    for nome in sorted(perfil['colunas']):
+        coluna = perfil['colunas'][nome]
+        tipos = coluna['tipos'] - {'null'}
+        distintos = coluna['distintos']
+        if tipos == {'bool'}:
+            tipo = pyarrow.bool_()
+        elif tipos == {'int'}:
+            tipo = pyarrow.int64()
+        elif tipos and tipos <= {'int', 'float'}:
+            tipo = pyarrow.float64()
+        elif (tipos == {'str'} and distintos is not None
+              and len(distintos) <= max(1, perfil['linhas'] // 2)):
+            tipo = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+            categorias[nome] = sorted(distintos)
+        else:
+            tipo = pyarrow.string()  # texto, tipos mistos e aninhados (JSON)
+        campos.append(pyarrow.field(nome, tipo))
+    return pyarrow.schema(campos), categorias
+
+
+# dtype pandas de cada tipo Arrow simples (nulos preservados)
+DTYPES_PANDAS = {'bool': 'boolean', 'int64': 'Int64', 'double': 'Float64'}
+
+
+def _texto(valor: Any) -> Optional[str]:
+    if valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return str(valor)
+
+
+def _lote_para_tabela(lote: List[Dict[str, Any]], esquema: Any,
+                      categorias: Dict[str, List[str]]) -> Any:
+    """DataFrame do lote (categorias fixas) convertido para o esquema Arrow"""
+    colunas = {}
+    for campo in esquema:
+        valores = [item.get(campo.name) for item in lote]
+        if campo.name in categorias:
+            colunas[campo.name] = pd.Categorical(valores, categories=categorias[campo.name])
+        elif str(campo.type) in DTYPES_PANDAS:
+            colunas[campo.name] = pd.array(valores, dtype=DTYPES_PANDAS[str(campo.type)])
+        else:
+            colunas[campo.name] = pd.array([_texto(v) for v in valores], dtype=object)
+    quadro = pd.DataFrame(colunas)
+    return pyarrow.Table.from_pandas(quadro, preserve_index=False).cast(esquema)
+
+
+def jsonl_para_colunar(arquivo_jsonl: str, arquivo_saida: str = None, formato: str = 'parquet',
+                       lote: int = LOTE_PADRAO) -> Optional[Dict[str, Any]]:
+    """
+    Converte um arquivo JSONL para Parquet ou Feather (Arrow IPC) em lotes
+
+    Duas leituras em streaming: a primeira fixa o esquema (perfil_jsonl), a
+    segunda monta DataFrames de ``lote`` linhas e grava cada um como um row
+    group/record batch, com compressão zstd. A memória é limitada pelo lote.
+
+    Args:
+        arquivo_jsonl: Caminho para o arquivo JSONL de entrada
+        arquivo_saida: Caminho de saída (padrão: mesmo nome com .parquet/.feather)
+        formato: 'parquet' ou 'feather'
+        lote: Linhas por row group / record batch
+
+    Returns:
+        Resumo da conversão (saída, linhas, colunas, dictionary, bytes), ou
+        None se o arquivo não tem registros
+    """
+    if pd is None:
+        raise ValueError('Saída parquet/feather requer os pacotes pandas e pyarrow')
+
+    if not arquivo_saida:
+        arquivo_saida = Path(arquivo_jsonl).with_suffix(EXTENSOES[formato])
+    destino = Path(arquivo_saida)
+
+    perfil = perfil_jsonl(arquivo_jsonl)
+    if not perfil['linhas']:
+        return None
+    esquema, categorias = esquema_arrow(perfil)
+
+    temporario = destino.with_name(destino.name + '.tmp')
+    if formato == 'parquet':
+        escritor = pyarrow.parquet.ParquetWriter(temporario, esquema, compression='zstd')
+    else:
+        escritor = pyarrow.ipc.new_file(
+            str(temporario), esquema, options=pyarrow.ipc.IpcWriteOptions(compression='zstd'))
+    try:
+        with escritor:
+            _, registros = abrir_registros(arquivo_jsonl, avisar=False)
+            while True:
+                linhas = list(islice(registros, max(1, lote)))
+                if not linhas:
+                    break
+                escritor.write_table(_lote_para_tabela(linhas, esquema, categorias))
+        os.replace(temporario, destino)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+    return {
+        'saida': str(destino),
+        'linhas': perfil['linhas'],
+        'colunas': len(esquema),
+        'dictionary': sorted(categorias),
+        'bytes_entrada': Path(arquivo_jsonl).stat().st_size,
+        'bytes_saida': destino.stat().st_size,
+    }
+
+
+# ================================================================================
+# CONVERSÃO EM LOTE
+# ================================================================================
+
+def descobrir_jsonl(base_path: Path) -> List[Path]:
+    """Conjuntos de dados .jsonl do projeto (sem pastas ocultas e arquivos internos)"""
+    return sorted(
+        arquivo for arquivo in base_path.rglob("*.jsonl")
+        if arquivo.name not in JSONL_INTERNOS and not arquivo.name.endswith(SUFIXO_MUDANCAS)
+        and not any(parte.startswith('.') for parte in arquivo.relative_to(base_path).parts)
+    )
+
+
+def converter_arquivo(arquivo_jsonl: str, arquivo_saida: str, formato: str,
+                      amostra: int = AMOSTRA_PADRAO, lote: int = LOTE_PADRAO) -> Dict[str, Any]:
+    """Worker da conversão em lote: converte um arquivo e devolve o resumo"""
+    inicio = time.perf_counter()
+    if formato == 'csv':
+        resultado = None
+        _, registros = abrir_registros(arquivo_jsonl)
+        total, _ = escrever_csv(registros, arquivo_saida, amostra=amostra)
+        if total:
+            resultado = {
+                'saida': str(arquivo_saida), 'linhas': total, 'dictionary': [],
+                'bytes_entrada': Path(arquivo_jsonl).stat().st_size,
+                'bytes_saida': Path(arquivo_saida).stat().st_size,
+            }
+        else:
+            Path(arquivo_saida).unlink(missing_ok=True)
+    else:
+        resultado = jsonl_para_colunar(arquivo_jsonl, arquivo_saida, formato, lote)
+    if resultado:
+        resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def converter_todos(base_path: Path, formato: str, destino: Path = None,
+                    processos: int = None, amostra: int = AMOSTRA_PADRAO,
+                    lote: int = LOTE_PADRAO) -> int:
+    """
+    Converte todos os .jsonl do projeto em paralelo (um arquivo por processo)
+
+    As saídas ficam ao lado de cada .jsonl ou, com ``destino``, numa pasta
+    com a mesma estrutura de subpastas. Os maiores arquivos entram primeiro
+    para equilibrar o pool.
+
+    Returns:
+        Número de arquivos com falha
+    """
+    arquivos = sorted(descobrir_jsonl(base_path), key=lambda a: a.stat().st_size, reverse=True)
+    if not arquivos:
+        print("Nenhum arquivo JSONL encontrado")
+        return 0
+
+    tarefas = []
+    for arquivo in arquivos:
+        saida = arquivo.with_suffix(EXTENSOES[formato])
+        if destino is not None:
+            saida = destino / saida.relative_to(base_path)
+            saida.parent.mkdir(parents=True, exist_ok=True)
+        tarefas.append((arquivo, saida))
+
+    processos = max(1, min(processos or os.cpu_count() or 1, len(tarefas)))
+    print(f"⚙️ Convertendo {len(tarefas)} arquivo(s) para {formato} em {processos} processo(s)")
+
+    falhas = 0
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        futuros = {pool.submit(converter_arquivo, str(arquivo), str(saida), formato,
+                               amostra, lote): arquivo
+                   for arquivo, saida in tarefas}
+        for futuro in as_completed(futuros):
+            nome = futuros[futuro].relative_to(base_path)
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                falhas += 1
+                print(f"❌ {nome}: {e}")
+                continue
+            if resultado is None:
+                print(f"⏭️ {nome}: sem registros")
+                continue
+            taxa = resultado['bytes_entrada'] / max(1, resultado['bytes_saida'])
+            print(f"✅ {nome}: {resultado['linhas']} linhas, "
+                  f"{resultado['bytes_entrada'] / 1024:.0f} KB -> "
+                  f"{resultado['bytes_saida'] / 1024:.0f} KB ({taxa:.1f}x) "
+                  f"em {resultado['segundos']:.2f}s")
+            if resultado['dictionary']:
+                print(f"   dictionary: {', '.join(resultado['dictionary'])}")
+
+    print(f"📊 {len(tarefas) - falhas}/{len(tarefas)} arquivo(s) em "
+          f"{time.perf_counter() - inicio:.2f}s")
+    return falhas
+
 
 def main():
     """Função principal do script"""
     parser = argparse.ArgumentParser(
-        description="Converte arquivos JSONL para CSV",
+        description="Converte arquivos JSONL para CSV, Parquet ou Feather",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Exemplos:
@@ -221,6 +635,9 @@ Exemplos:
   %(prog)s cursos.jsonl cursos.csv
   %(prog)s --input data/cursos/cursos.jsonl --output saida/cursos.csv
   %(prog)s -i departamentos.jsonl -o departamentos.csv
+  %(prog)s data/docentes/docentes_completo.jsonl --formato parquet
+  %(prog)s --todos --formato parquet -j 4
+  %(prog)s --todos --formato feather --destino saida/arrow
         """
     )
     
@@ -233,7 +650,7 @@ Exemplos:
     parser.add_argument(
         'output_file', 
         nargs='?',
-        help='Arquivo CSV de saída (opcional)'
+        help='Arquivo de saída (opcional)'
     )
     
     parser.add_argument(
@@ -245,9 +662,50 @@ Exemplos:
     parser.add_argument(
         '-o', '--output',
         dest='output_file_flag',
-        help='Arquivo CSV de saída'
+        help='Arquivo de saída'
+    )
+
+    parser.add_argument(
+        '--formato',
+        choices=FORMATOS,
+        default='csv',
+        help='Formato de saída; parquet/feather requerem pandas e pyarrow (padrão: csv)'
+    )
+
+    parser.add_argument(
+        '--todos',
+        action='store_true',
+        help='Converte em paralelo todos os arquivos JSONL do projeto (os de --listar)'
+    )
+
+    parser.add_argument(
+        '-j', '--processos',
+        type=int,
+        default=None,
+        help='Processos da conversão com --todos (padrão: número de CPUs)'
+    )
+
+    parser.add_argument(
+        '--destino',
+        type=Path,
+        default=None,
+        help='Pasta das saídas de --todos (padrão: ao lado de cada .jsonl)'
+    )
+
+    parser.add_argument(
+        '--lote',
+        type=int,
+        default=LOTE_PADRAO,
+        help=f'Linhas por row group / record batch em parquet/feather (padrão: {LOTE_PADRAO})'
     )
     
+    parser.add_argument(
+        '--amostra',
+        type=int,
+        default=AMOSTRA_PADRAO,
+        help=f'Registros lidos para detectar o formato e as colunas (padrão: {AMOSTRA_PADRAO})'
+    )
+
     parser.add_argument(
         '--listar',
         action='store_true',
@@ -255,19 +713,29 @@ Exemplos:
     )
     
     args = parser.parse_args()
-    
+    base_path = Path(__file__).parent.parent
+
+    if args.formato != 'csv' and pd is None:
+        print(f"Erro: --formato {args.formato} requer os pacotes pandas e pyarrow")
+        sys.exit(1)
+
     # Opção para listar arquivos JSONL disponíveis
     if args.listar:
         print("Arquivos JSONL encontrados no projeto:")
-        base_path = Path(__file__).parent.parent
-        arquivos_jsonl = list(base_path.rglob("*.jsonl"))
+        arquivos_jsonl = descobrir_jsonl(base_path)
         
         if arquivos_jsonl:
-            for arquivo in sorted(arquivos_jsonl):
+            for arquivo in arquivos_jsonl:
                 print(f"  {arquivo.relative_to(base_path)}")
         else:
             print("  Nenhum arquivo JSONL encontrado")
         return
+
+    # Conversão em lote de todos os conjuntos de dados
+    if args.todos:
+        falhas = converter_todos(base_path, args.formato, args.destino, args.processos,
+                                 args.amostra, args.lote)
+        sys.exit(1 if falhas else 0)
     
     # Determinar arquivo de entrada
     arquivo_entrada = args.input_file or args.input_file_flag
@@ -284,8 +752,21 @@ Exemplos:
         print(f"Erro: Arquivo '{arquivo_entrada}' não encontrado")
         sys.exit(1)
     
-    # Converter JSONL para CSV
-    resultado = jsonl_para_csv(arquivo_entrada, arquivo_saida)
+    if args.formato == 'csv':
+        # Converter JSONL para CSV
+        resultado = jsonl_para_csv(arquivo_entrada, arquivo_saida, amostra=args.amostra)
+    else:
+        resumo = jsonl_para_colunar(arquivo_entrada, arquivo_saida, args.formato, args.lote)
+        resultado = resumo and resumo['saida']
+        if resumo:
+            print(f"Arquivo {args.formato} criado com sucesso: {resumo['saida']}")
+            print(f"Total de registros processados: {resumo['linhas']} "
+                  f"({resumo['colunas']} colunas)")
+            print(f"Colunas dictionary: {', '.join(resumo['dictionary']) or 'nenhuma'}")
+            print(f"Tamanho: {resumo['bytes_entrada'] / 1024:.0f} KB -> "
+                  f"{resumo['bytes_saida'] / 1024:.0f} KB")
+        else:
+            print("Nenhum dado encontrado no arquivo JSONL")
     
     if resultado:
         print(f"\nConversão concluída com sucesso!")
@@ -293,18 +774,6 @@ Exemplos:
         print("\nFalha na conversão")
         sys.exit(1)
 
-    # Verificar se é um arquivo de departamentos e converter se necessário
-    dados = ler_jsonl(arquivo_entrada)
-    if detectar_tipo_departamentos(dados):
-        print("\nFormato de departamentos detectado.")
-        resultado_dept = converter_departamentos_para_csv(arquivo_entrada, arquivo_saida)
-        
-        if resultado_dept:
-            print(f"Conversão de departamentos concluída com sucesso!")
-        else:
-            print("Falha na conversão de departamentos")
-            sys.exit(1)
-
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
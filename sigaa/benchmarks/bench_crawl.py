@@ -0,0 +1,278 @@
+#> cd sigaa
+#> uv run .\benchmarks\bench_crawl.py --latencia 50 --repeticoes 3
+"""
+Vazão dos spiders de ponta a ponta contra o SIGAA local
+
+Sobe benchmarks/servidor_sigaa.py numa thread e roda cada spider num
+processo próprio (reactor novo, pasta temporária como diretório de trabalho,
+para que checkpoints, vistos e temp/ não toquem nos dados do projeto), com
+as requisições redirecionadas pelo sigaa.local.DownloadHandlerLocal.
+
+Para cada spider mostra:
+
+    páginas/s   respostas recebidas por segundo de crawl
+    itens/s     itens que passaram pelos pipelines por segundo
+    p50/p99     tempo de callback por resposta (ms), medido por um spider
+                middleware colado ao spider, só o código do callback
+    erros       respostas 5xx, retries e mensagens de erro no log
+
+Por padrão DOWNLOAD_DELAY, AutoThrottle e ThrottleSigaa ficam desligados,
+para medir o código e não a cortesia com o servidor; ``--manter-atrasos`` roda com os
+settings do projeto e dos spiders. Com ``--repeticoes`` vale a execução
+mediana (pelo tempo de crawl).
+
+Exemplos de uso:
+    python bench_crawl.py
+    python bench_crawl.py --spiders curso ofertas --repeticoes 5
+    python bench_crawl.py --latencia 80 --jitter 40 --taxa-erro 0.02 --json bench.json
+    python bench_crawl.py -s CONCURRENT_REQUESTS_PER_DOMAIN=8
+    python bench_crawl.py --spiders ofertas -a lote=1 --limite-lote 2000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from servidor_sigaa import adicionar_argumentos, iniciar_em_thread, opcoes_de_args  # noqa: E402
+
+# spider -> argumentos (-a); ofertas não grava no acervo mock/acervo/ nem no
+# histórico do planejador do projeto
+SPIDERS = {
+    'curso': {},
+    'ofertas': {'arquivar': '0', 'planejar': '0'},
+    'departamentos': {},
+    'docentes_orquestrador': {},
+}
+
+# Só os módulos dos spiders medidos: o SpiderLoader importa tudo o que está em
+# SPIDER_MODULES, e sigaa/spiders/testar_ofertas.py dispara um crawl no import
+MODULOS_SPIDERS = ['sigaa.spiders.curso', 'sigaa.spiders.ofertas', 'sigaa.spiders.docentes']
+
+SETTINGS_BENCH = {
+    'DOWNLOAD_DELAY': 0,
+    'AUTOTHROTTLE_ENABLED': False,
+    'SIGAA_THROTTLE_ENABLED': False,
+    'LOG_LEVEL': 'WARNING',
+    'TELNETCONSOLE_ENABLED': False,
+}
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolação linear; None sem valores"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+class MedidorCallbacks:
+    """
+    Spider middleware (ordem 950, junto do spider) que soma, por resposta, o
+    tempo gasto dentro do callback a cada item/request produzido
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.tempos = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy import signals
+        medidor = cls(crawler.stats)
+        crawler.signals.connect(medidor.spider_closed, signal=signals.spider_closed)
+        return medidor
+
+    def process_spider_output(self, response, result, spider=None):
+        gasto = 0.0
+        iterador = iter(result)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    saida = next(iterador)
+                except StopIteration:
+                    break
+                finally:
+                    gasto += time.perf_counter() - inicio
+                yield saida
+        finally:
+            self.tempos.append(gasto)
+
+    async def process_spider_output_async(self, response, result, spider=None):
+        gasto = 0.0
+        iterador = result.__aiter__()
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    saida = await iterador.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    gasto += time.perf_counter() - inicio
+                yield saida
+        finally:
+            self.tempos.append(gasto)
+
+    def spider_closed(self, spider):
+        self.stats.set_value('bench/callbacks_ms', [tempo * 1000 for tempo in self.tempos])
+
+
+def executar_spider(nome, url, pasta, extras, argumentos, fila):
+    """Processo filho: roda um spider contra o servidor local e devolve as stats"""
+    os.chdir(pasta)
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ['SCRAPY_SETTINGS_MODULE'] = 'sigaa.settings'
+
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from sigaa.local import settings_locais
+
+    settings = get_project_settings()
+    settings.setdict({**settings_locais(url), **extras}, priority='cmdline')
+    settings.set('SPIDER_MODULES', MODULOS_SPIDERS, priority='cmdline')
+    settings.set('SPIDER_MIDDLEWARES', {
+        **settings.getdict('SPIDER_MIDDLEWARES'), MedidorCallbacks: 950}, priority='cmdline')
+
+    processo = CrawlerProcess(settings, install_root_handler=True)
+    crawler = processo.create_crawler(nome)
+    processo.crawl(crawler, **{**SPIDERS[nome], **argumentos})
+    processo.start()
+
+    fila.put({chave: valor.isoformat() if hasattr(valor, 'isoformat') else valor
+              for chave, valor in crawler.stats.get_stats().items()})
+
+
+def medir(nome, url, extras, argumentos):
+    """Uma execução do spider; métricas derivadas das stats do crawl"""
+    contexto = multiprocessing.get_context('spawn')
+    fila = contexto.Queue()
+    with tempfile.TemporaryDirectory(prefix=f'bench_{nome}_') as pasta:
+        processo = contexto.Process(target=executar_spider, args=(nome, url, pasta, extras, argumentos, fila))
+        processo.start()
+        stats = None
+        while stats is None:
+            try:
+                stats = fila.get(timeout=1)
+            except queue.Empty:
+                if not processo.is_alive():
+                    raise RuntimeError(f'{nome}: processo do spider terminou com código '
+                                       f'{processo.exitcode} sem devolver as stats')
+        processo.join()
+
+    tempo = stats.get('elapsed_time_seconds') or 0.0
+    paginas = stats.get('response_received_count', 0)
+    itens = stats.get('item_scraped_count', 0)
+    callbacks = stats.get('bench/callbacks_ms', [])
+    return {
+        'spider': nome,
+        'tempo_s': tempo,
+        'paginas': paginas,
+        'itens': itens,
+        'paginas_s': paginas / tempo if tempo else 0.0,
+        'itens_s': itens / tempo if tempo else 0.0,
+        'callback_p50_ms': percentil(callbacks, 50),
+        'callback_p99_ms': percentil(callbacks, 99),
+        'respostas_5xx': sum(valor for chave, valor in stats.items()
+                             if chave.startswith('downloader/response_status_count/5')),
+        'retries': stats.get('retry/count', 0),
+        'erros_log': stats.get('log_count/ERROR', 0),
+        'motivo': stats.get('finish_reason'),
+    }
+
+
+def _ms(valor):
+    return f'{valor:8.2f}' if valor is not None else f'{"-":>8}'
+
+
+def _valor_setting(texto):
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return texto
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vazão dos spiders contra o SIGAA local')
+    parser.add_argument('--spiders', nargs='+', choices=list(SPIDERS), default=list(SPIDERS),
+                        help='Spiders medidos (padrão: todos)')
+    parser.add_argument('--repeticoes', type=int, default=1,
+                        help='Execuções por spider; vale a mediana (padrão: 1)')
+    parser.add_argument('--manter-atrasos', action='store_true',
+                        help='Mantém DOWNLOAD_DELAY/throttle do projeto e dos spiders')
+    parser.add_argument('-s', '--set', dest='settings', action='append', default=[],
+                        metavar='NOME=VALOR', help='Setting extra do Scrapy (repetível)')
+    parser.add_argument('-a', '--arg', dest='argumentos', action='append', default=[],
+                        metavar='NOME=VALOR', help='Argumento extra dos spiders (repetível)')
+    parser.add_argument('--json', type=Path, help='Grava os resultados em JSON')
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    extras = {} if args.manter_atrasos else dict(SETTINGS_BENCH)
+    extras['LOG_LEVEL'] = SETTINGS_BENCH['LOG_LEVEL']
+    for item in args.settings:
+        nome, _, valor = item.partition('=')
+        extras[nome] = _valor_setting(valor)
+
+    argumentos = dict(item.partition('=')[::2] for item in args.argumentos)
+
+    servidor = iniciar_em_thread(opcoes_de_args(args))
+    print(f"🌐 SIGAA local em {servidor.url} (latência {args.latencia:.0f} ms "
+          f"± {args.jitter:.0f}, busca +{args.latencia_busca:.0f} ms, "
+          f"erros {args.taxa_erro:.1%}, expiração {args.taxa_expiracao:.1%})")
+
+    resultados = []
+    try:
+        for nome in args.spiders:
+            execucoes = []
+            for repeticao in range(args.repeticoes):
+                print(f"🕷️ {nome} [{repeticao + 1}/{args.repeticoes}]...", flush=True)
+                execucoes.append(medir(nome, servidor.url, extras, argumentos))
+            execucoes.sort(key=lambda execucao: execucao['tempo_s'])
+            resultado = execucoes[len(execucoes) // 2]
+            resultado['execucoes'] = [execucao['tempo_s'] for execucao in execucoes]
+            resultados.append(resultado)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    print(f"\n{'spider':<24}{'tempo s':>9}{'páginas':>9}{'itens':>8}{'pág/s':>9}"
+          f"{'itens/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'5xx':>6}{'retry':>7}{'erros':>7}")
+    for r in resultados:
+        print(f"{r['spider']:<24}{r['tempo_s']:9.2f}{r['paginas']:9d}{r['itens']:8d}"
+              f"{r['paginas_s']:9.1f}{r['itens_s']:10.1f}{_ms(r['callback_p50_ms'])} "
+              f"{_ms(r['callback_p99_ms'])}{r['respostas_5xx']:6d}{r['retries']:7d}"
+              f"{r['erros_log']:7d}")
+        if r['motivo'] != 'finished':
+            print(f"   ⚠️ {r['spider']} terminou com motivo {r['motivo']!r}")
+
+    print("\n📊 Requisições no servidor:")
+    for chave, total in sorted(servidor.estado.contadores.items()):
+        print(f"   {chave:<50} {total:>8}")
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            'servidor': {chave: valor for chave, valor in vars(args).items()
+                         if chave not in ('json', 'spiders', 'settings', 'argumentos')},
+            'settings': extras,
+            'argumentos': argumentos,
+            'resultados': resultados,
+        }, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+        print(f"💾 Resultados em {args.json}")
+
+
+if __name__ == '__main__':
+    main()
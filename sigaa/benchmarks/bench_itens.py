@@ -0,0 +1,161 @@
+#> cd sigaa
+#> uv run .\benchmarks\bench_itens.py --turmas 100000
+"""
+Memória e serialização dos itens: dicts x modelos de sigaa/items.py
+
+Gera turmas e cursos sintéticos com a repetição real dos campos (poucos
+departamentos, períodos, horários e sedes para muitos registros), criando
+cada string de novo como faz o parse do HTML, e compara:
+
+    memória     tracemalloc da lista de itens (dicts x modelos com __slots__
+                e sys.intern)
+    JSONL       json.dumps(dict) + '\\n' x para_jsonl() compilado
+    CSV         csv.DictWriter x csv.writer com valores_csv()
+
+Antes de medir, confere que para_jsonl() é idêntico a json.dumps do dict
+equivalente e que as linhas CSV coincidem.
+
+Exemplos de uso:
+    python bench_itens.py
+    python bench_itens.py --turmas 200000 --repeticoes 5
+"""
+import argparse
+import csv
+import gc
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.items import Curso, Oferta  # noqa: E402
+
+HORARIOS = ['24M12', '35T23', '246N12', '35M34', '24T45', '6M1234']
+LOCAIS = ['BSA S AT 101', 'PAT AT 025', 'ICC ANF 12', 'FGA I1', 'A DEFINIR']
+SEDES = ['DARCY RIBEIRO', 'GAMA', 'CEILÂNDIA', 'PLANALTINA']
+TURNOS = ['Diurno', 'Noturno']
+
+
+def turmas_sinteticas(quantidade):
+    """Campos das turmas como dicts, com strings recriadas a cada linha"""
+    for i in range(quantidade):
+        yield {
+            'id_departamento': f'{600 + i % 120}',
+            'codigo': f'T{i % 12:02d}',
+            'ano_periodo': f'{2020 + i % 6}.{1 + i % 2}',
+            'docente': f'DOCENTE NÚMERO {i % 3000} (60h)',
+            'horario': ''.join(HORARIOS[i % len(HORARIOS)]),
+            'vagas_ofertadas': f'{40 + i % 20}',
+            'vagas_ocupadas': f'{i % 40}',
+            'local': ''.join(LOCAIS[i % len(LOCAIS)]),
+        }
+
+
+def cursos_sinteticos(quantidade):
+    for i in range(quantidade):
+        yield {
+            'sigla_departamento': f'D{i % 60:02d}',
+            'departamento': f'D{i % 60:02d} - DEPARTAMENTO {i % 60}',
+            'nome': f'CURSO {i}',
+            'grau_academico': ''.join('Bacharelado' if i % 3 else 'Licenciatura'),
+            'turno': ''.join(TURNOS[i % 2]),
+            'sede': ''.join(SEDES[i % len(SEDES)]),
+            'modalidade': ''.join('Presencial'),
+            'grau_academico_2': None,
+            'coordenacao': f'COORDENADOR {i}',
+            'link_detalhes': f'/sigaa/public/curso/portal.jsf?id={i}',
+        }
+
+
+def medir_memoria(criar):
+    """Bytes alocados (tracemalloc) para manter a lista criada por criar()"""
+    gc.collect()
+    tracemalloc.start()
+    itens = criar()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(itens), atual
+
+
+def melhor_tempo(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def jsonl_dicts(dicts):
+    return ''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in dicts)
+
+
+def jsonl_modelos(modelos):
+    return ''.join(item.para_jsonl() for item in modelos)
+
+
+def csv_dicts(dicts, colunas):
+    saida = io.StringIO()
+    escritor = csv.DictWriter(saida, fieldnames=colunas, delimiter=';')
+    escritor.writerows(dicts)
+    return saida.getvalue()
+
+
+def csv_modelos(modelos):
+    saida = io.StringIO()
+    csv.writer(saida, delimiter=';').writerows(item.valores_csv() for item in modelos)
+    return saida.getvalue()
+
+
+def comparar(nome, modelo, gerar, quantidade, repeticoes):
+    print(f"\n📦 {nome}: {quantidade} itens")
+
+    # Equivalência
+    dicts = list(gerar(quantidade))
+    modelos = [modelo(**item) for item in dicts]
+    if jsonl_dicts(dicts) != jsonl_modelos(modelos):
+        print(f"❌ para_jsonl diverge de json.dumps em {nome}")
+        sys.exit(1)
+    if csv_dicts(dicts, modelo.campos) != csv_modelos(modelos):
+        print(f"❌ valores_csv diverge do DictWriter em {nome}")
+        sys.exit(1)
+    print("✅ JSONL e CSV idênticos")
+
+    # Memória: cada lista é criada do zero, com strings novas
+    _, bytes_dicts = medir_memoria(lambda: list(gerar(quantidade)))
+    _, bytes_modelos = medir_memoria(
+        lambda: [modelo(**item) for item in gerar(quantidade)])
+    print(f"   memória    dicts {bytes_dicts / 2**20:8.1f} MB  "
+          f"modelos {bytes_modelos / 2**20:8.1f} MB  "
+          f"({bytes_dicts / bytes_modelos:.1f}x menos)")
+
+    for rotulo, antes, depois in (
+            ('JSONL', lambda: jsonl_dicts(dicts), lambda: jsonl_modelos(modelos)),
+            ('CSV', lambda: csv_dicts(dicts, modelo.campos), lambda: csv_modelos(modelos))):
+        t_antes = melhor_tempo(antes, repeticoes)
+        t_depois = melhor_tempo(depois, repeticoes)
+        print(f"   {rotulo:<10} dicts {quantidade / t_antes:10,.0f} itens/s  "
+              f"modelos {quantidade / t_depois:10,.0f} itens/s  "
+              f"({t_antes / t_depois:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memória e serialização: dicts x modelos')
+    parser.add_argument('--turmas', type=int, default=100_000,
+                        help='Turmas sintéticas (padrão: 100000)')
+    parser.add_argument('--cursos', type=int, default=20_000,
+                        help='Cursos sintéticos (padrão: 20000)')
+    parser.add_argument('--repeticoes', type=int, default=3,
+                        help='Execuções por serializador; vale o melhor tempo (padrão: 3)')
+    args = parser.parse_args()
+
+    comparar('Oferta', Oferta, turmas_sinteticas, args.turmas, args.repeticoes)
+    comparar('Curso', Curso, cursos_sinteticos, args.cursos, args.repeticoes)
+
+
+if __name__ == '__main__':
+    main()
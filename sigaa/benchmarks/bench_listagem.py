@@ -0,0 +1,115 @@
+#> cd sigaa
+#> uv run .\benchmarks\bench_listagem.py --repeticoes 5
+"""
+Micro-benchmark do extrator de table.listagem
+
+Compara, sobre as listagens de ofertas do acervo mock/acervo/, a
+extração antiga (um ``row.css('td:nth-child(N)::text')`` por coluna) com o
+ExtratorListagem usado por extrair_turmas(), em linhas por segundo. Antes de
+medir, confere que as duas produzem exatamente os mesmos registros.
+
+Sem listagens no acervo, usa uma página sintética com --linhas turmas.
+
+Exemplos de uso:
+    python bench_listagem.py
+    python bench_listagem.py --prefixo 2025/1/ --repeticoes 10
+    python bench_listagem.py --linhas 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from parsel import Selector
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.acervo import AcervoHtml  # noqa: E402
+from sigaa.listagem import extrair_turmas  # noqa: E402
+
+
+def extrair_turmas_css(seletor, id_departamento):
+    """Extração anterior ao ExtratorListagem (referência do benchmark)"""
+    for row in seletor.css('div#turmasAbertas table.listagem tbody tr'):
+        codigo = row.css('td.turma::text').get()
+        if not codigo or not codigo.strip():
+            continue
+        yield {
+            'id_departamento': id_departamento,
+            'codigo': codigo.strip(),
+            'ano_periodo': row.css('td.anoPeriodo::text').get(default='').strip(),
+            'docente': row.css('td.nome::text').get(default='').strip(),
+            'horario': row.css('td:nth-child(4)::text').get(default='').strip(),
+            'vagas_ofertadas': row.css('td:nth-child(6)::text').get(default='').strip(),
+            'vagas_ocupadas': row.css('td:nth-child(7)::text').get(default='').strip(),
+            'local': row.css('td:nth-child(8)::text').get(default='').strip(),
+        }
+
+
+def pagina_sintetica(linhas):
+    """HTML no formato de listar.jsf com a quantidade de turmas pedida"""
+    corpo = ''.join(
+        f'<tr class="linhaPar"><td class="turma">T{i:02d}</td>'
+        f'<td class="anoPeriodo">2025.1</td><td class="nome">Docente {i}</td>'
+        f'<td>35T23</td><td></td><td>40</td><td>{i % 40}</td><td>BSA S</td></tr>\n'
+        for i in range(linhas)
+    )
+    return (f'<html><body><div id="turmasAbertas"><table class="listagem">'
+            f'<tbody>{corpo}</tbody></table></div></body></html>')
+
+
+def carregar_fixtures(pasta, prefixo, linhas):
+    fixtures = [(chave.rsplit('/', 1)[1], Selector(text=corpo.decode('utf-8')))
+                for chave, corpo in AcervoHtml(pasta).itens(prefixo)]
+    if not fixtures:
+        print(f"⚠️ Nenhuma listagem em {pasta}; usando página sintética com {linhas} turmas")
+        return [('sintetica', Selector(text=pagina_sintetica(linhas)))]
+    return fixtures
+
+
+def medir(funcao, fixtures, repeticoes):
+    """Retorna (linhas por execução, melhor tempo em segundos)"""
+    melhor = float('inf')
+    total = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        total = sum(1 for id_dep, sel in fixtures for _ in funcao(sel, id_dep))
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return total, melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do extrator de table.listagem')
+    parser.add_argument('--acervo', type=Path, default=BASE_DIR / 'mock' / 'acervo',
+                        help='Acervo com as listagens de ofertas (padrão: mock/acervo)')
+    parser.add_argument('--prefixo', default='',
+                        help='Só as chaves com este prefixo, ex.: 2025/1/ (padrão: todas)')
+    parser.add_argument('--repeticoes', type=int, default=5,
+                        help='Execuções por extrator; vale o melhor tempo (padrão: 5)')
+    parser.add_argument('--linhas', type=int, default=2000,
+                        help='Turmas da página sintética, sem HTMLs salvos (padrão: 2000)')
+    args = parser.parse_args()
+
+    fixtures = carregar_fixtures(args.acervo, args.prefixo, args.linhas)
+    for id_dep, sel in fixtures:
+        if (list(extrair_turmas_css(sel, id_dep))
+                != [turma.para_dict() for turma in extrair_turmas(sel, id_dep)]):
+            print(f"❌ Extratores divergem em {id_dep}")
+            sys.exit(1)
+
+    print(f"📄 {len(fixtures)} HTML(s), melhor de {args.repeticoes} execuções")
+    resultados = {}
+    for nome, funcao in (('css por coluna', extrair_turmas_css),
+                         ('ExtratorListagem', extrair_turmas)):
+        linhas, segundos = medir(funcao, fixtures, args.repeticoes)
+        resultados[nome] = linhas / segundos if segundos else float('inf')
+        print(f"   {nome:<18} {linhas:>7} linhas em {segundos:.4f}s "
+              f"({resultados[nome]:,.0f} linhas/s)")
+
+    antes, depois = resultados.values()
+    print(f"🚀 Ganho: {depois / antes:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#> cd sigaa
+#> uv run .\benchmarks\bench_perfil_docente.py --repeticoes 5
+"""
+Benchmark do extrator de perfil de docentes
+
+Mede, sobre as páginas do acervo temp/docentes/acervo/, as páginas por
+segundo do extrair_dados_perfil_docente atual (uma varredura do documento,
+rótulos dos <dt> mapeados para campos) e da versão anterior (uma consulta
+XPath //dt[contains(text(), ...)] por campo). A equivalência das duas é
+verificada em tests/test_perfil_docente.py, de onde vêm a versão anterior e
+as páginas sintéticas usadas quando não há páginas salvas.
+
+Exemplos de uso:
+    python bench_perfil_docente.py
+    python bench_perfil_docente.py --acervo temp/docentes/acervo --repeticoes 10
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from parsel import Selector
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.acervo import AcervoHtml  # noqa: E402
+from sigaa.spiders.docentes import extrair_dados_perfil_docente  # noqa: E402
+from tests.test_perfil_docente import extrair_perfil_xpath, pagina  # noqa: E402
+
+
+def carregar_fixtures(pasta, quantidade):
+    acervo = AcervoHtml(pasta)
+    if not len(acervo):
+        print(f"⚠️ Nenhuma página em {pasta}; usando {quantidade} páginas sintéticas")
+        return [(f'sintetica_{i}', Selector(text=pagina(i))) for i in range(quantidade)]
+    return [(f'docente_{siape}', Selector(text=corpo.decode('utf-8')))
+            for siape, corpo in acervo.itens()]
+
+
+def medir(funcao, fixtures, repeticoes):
+    """Melhor tempo (segundos) para extrair todas as páginas"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _, sel in fixtures:
+            funcao(sel)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do extrator de perfil')
+    parser.add_argument('--acervo', type=Path, default=BASE_DIR / 'temp' / 'docentes' / 'acervo',
+                        help='Acervo com as páginas dos docentes (padrão: temp/docentes/acervo)')
+    parser.add_argument('--repeticoes', type=int, default=5,
+                        help='Execuções por extrator; vale o melhor tempo (padrão: 5)')
+    parser.add_argument('--paginas', type=int, default=200,
+                        help='Páginas sintéticas, sem páginas salvas (padrão: 200)')
+    args = parser.parse_args()
+
+    fixtures = carregar_fixtures(args.acervo, args.paginas)
+    print(f"📄 {len(fixtures)} páginas")
+
+    resultados = {}
+    for nome, funcao in (('XPath por campo', extrair_perfil_xpath),
+                         ('walker dt/dd', extrair_dados_perfil_docente)):
+        segundos = medir(funcao, fixtures, args.repeticoes)
+        resultados[nome] = len(fixtures) / segundos if segundos else float('inf')
+        print(f"   {nome:<16} {segundos:.4f}s ({resultados[nome]:,.0f} páginas/s)")
+
+    antes, depois = resultados.values()
+    print(f"🚀 Ganho: {depois / antes:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,627 @@
+#> cd sigaa
+#> uv run .\benchmarks\servidor_sigaa.py --porta 8765 --latencia 80 --taxa-erro 0.01
+"""
+SIGAA local para benchmarks e testes de regressão dos spiders
+
+Servidor HTTP que emula as páginas públicas do SIGAA usadas pelos spiders,
+sem tocar em sigaa.unb.br:
+
+    GET  /sigaa/public/turmas/listar.jsf        formulário formTurma com ViewState
+    POST /sigaa/public/turmas/listar.jsf        div#turmasAbertas table.listagem
+                                                (inputDepto em branco: todos os departamentos)
+    GET  /sigaa/public/docente/busca_docentes.jsf   select#form:departamento
+    POST /sigaa/public/docente/busca_docentes.jsf   docentes do departamento
+    GET  /sigaa/public/docente/portal.jsf?siape=X   perfil do docente
+    GET  /sigaa/public/curso/lista.jsf?nivel=G      lista de cursos
+
+As páginas salvas são reaproveitadas quando existem: listagens de turmas do
+acervo ``mock/acervo/`` (chave ``<ano>/<semestre>/<id>``, com o ViewState
+trocado pelo da sessão) e perfis de ``temp/docentes/acervo/`` (chave SIAPE).
+O resto é sintético e determinístico (mesma semente, mesmas páginas).
+
+Sessões JSF como no SIGAA: cookie JSESSIONID, ViewStates ``j_idN`` por
+sessão, só os ``views_por_sessao`` mais recentes valem (como o
+numberOfViewsInSession do JSF); POST com ViewState desconhecido, sessão
+vencida ou sem cookie recebe a página "sessão expirou", sem ViewState.
+
+Injeção de falhas e latência: latência base com jitter, latência extra nas
+buscas (POST), fração de respostas 500/503 e fração de POSTs tratados como
+sessão expirada. Com ``--limite-lote N``, buscas de turmas com mais de N
+resultados são respondidas com a mensagem "Refine a busca" e só as N
+primeiras linhas, como um SIGAA que limita o resultado.
+
+Para apontar os spiders para cá, ver sigaa/local.py. Exemplos de uso:
+    python servidor_sigaa.py
+    python servidor_sigaa.py --porta 8765 --latencia 50 --jitter 20 --latencia-busca 300
+    python servidor_sigaa.py --taxa-erro 0.02 --taxa-expiracao 0.05 --sessao-ttl 60
+"""
+import argparse
+import csv
+import html
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from sigaa.acervo import AcervoHtml  # noqa: E402
+
+ROTA_TURMAS = '/sigaa/public/turmas/listar.jsf'
+ROTA_BUSCA_DOCENTES = '/sigaa/public/docente/busca_docentes.jsf'
+ROTA_PORTAL_DOCENTE = '/sigaa/public/docente/portal.jsf'
+ROTA_CURSOS = '/sigaa/public/curso/lista.jsf'
+
+PADRAO_VIEWSTATE = re.compile(r'<input[^>]*name="javax\.faces\.ViewState"[^>]*>')
+
+HORARIOS = ['24M12', '35T23', '246N12', '35M34', '24T45', '6M1234', '7M12']
+LOCAIS = ['BSA S AT 101', 'PAT AT 025', 'ICC ANF 12', 'FGA I1', 'FCE S1', 'A DEFINIR']
+SEDES = ['CAMPUS UNIVERSITÁRIO DARCY RIBEIRO', 'GAMA', 'CEILÂNDIA', 'PLANALTINA']
+GRAUS = ['BACHARELADO', 'LICENCIATURA']
+TURNOS = ['Diurno', 'Noturno']
+FORMACOES = ['Doutorado', 'Mestrado', 'Pós-Doutorado']
+
+
+class OpcoesServidor:
+    """Conteúdo sintético, latência e falhas do servidor"""
+
+    def __init__(self, latencia=0.0, jitter=0.0, latencia_busca=0.0, taxa_erro=0.0,
+                 taxa_expiracao=0.0, views_por_sessao=15, sessao_ttl=0.0, semente=0,
+                 turmas=30, docentes=10, cursos=400, departamentos=0, limite_lote=0,
+                 acervo_ofertas=BASE_DIR / 'mock' / 'acervo',
+                 acervo_docentes=BASE_DIR / 'temp' / 'docentes' / 'acervo',
+                 arquivo_departamentos=BASE_DIR / 'data' / 'unidades' / 'departamentos.csv'):
+        self.latencia = latencia / 1000
+        self.jitter = jitter / 1000
+        self.latencia_busca = latencia_busca / 1000
+        self.taxa_erro = taxa_erro
+        self.taxa_expiracao = taxa_expiracao
+        self.views_por_sessao = max(1, views_por_sessao)
+        self.sessao_ttl = sessao_ttl
+        self.semente = semente
+        self.turmas = turmas
+        self.docentes = docentes
+        self.cursos = cursos
+        self.departamentos = departamentos
+        self.limite_lote = limite_lote
+        self.acervo_ofertas = acervo_ofertas
+        self.acervo_docentes = acervo_docentes
+        self.arquivo_departamentos = arquivo_departamentos
+
+
+class SessaoJsf:
+    """ViewStates emitidos para um JSESSIONID, do menos ao mais recentemente usado"""
+
+    def __init__(self):
+        self.criada = time.monotonic()
+        self.views = OrderedDict()
+
+
+class EstadoSigaa:
+    """Sessões, páginas e contadores compartilhados pelas threads do servidor"""
+
+    def __init__(self, opcoes):
+        self.opcoes = opcoes
+        self.trava = threading.Lock()
+        self.sessoes = {}
+        self.proximo_viewstate = 1
+        self.contadores = Counter()
+        self.rng = random.Random(opcoes.semente)
+        self.departamentos = self._carregar_departamentos()
+        self.acervo_ofertas = self._abrir_acervo(opcoes.acervo_ofertas)
+        self.acervo_docentes = self._abrir_acervo(opcoes.acervo_docentes)
+        self.trava_acervo = threading.Lock()
+        self._pagina_cursos = None
+
+    def _carregar_departamentos(self):
+        try:
+            with open(self.opcoes.arquivo_departamentos, encoding='utf-8') as arquivo:
+                departamentos = [(linha['id_departamento'], linha['nome_departamento'])
+                                 for linha in csv.DictReader(arquivo, delimiter=';')]
+        except OSError:
+            departamentos = [(str(600 + i), f'DEPARTAMENTO SINTÉTICO {i}') for i in range(100)]
+        if self.opcoes.departamentos:
+            departamentos = departamentos[:self.opcoes.departamentos]
+        return departamentos
+
+    @staticmethod
+    def _abrir_acervo(pasta):
+        if not pasta or not Path(pasta, 'indice.jsonl').exists():
+            return None
+        return AcervoHtml(pasta)
+
+    def contar(self, chave):
+        with self.trava:
+            self.contadores[chave] += 1
+
+    def sortear(self):
+        with self.trava:
+            return self.rng.random()
+
+    # === SESSÕES ===
+
+    def abrir_sessao(self, jsessionid):
+        """Sessão do cookie (criada se ausente ou vencida); devolve (id, nova?)"""
+        with self.trava:
+            sessao = self.sessoes.get(jsessionid)
+            if sessao and not self._vencida(sessao):
+                return jsessionid, False
+            jsessionid = uuid.uuid4().hex.upper()
+            self.sessoes[jsessionid] = SessaoJsf()
+            self.contadores['sessoes'] += 1
+            return jsessionid, True
+
+    def _vencida(self, sessao):
+        ttl = self.opcoes.sessao_ttl
+        return bool(ttl) and time.monotonic() - sessao.criada > ttl
+
+    def emitir_viewstate(self, jsessionid):
+        with self.trava:
+            sessao = self.sessoes[jsessionid]
+            viewstate = f'j_id{self.proximo_viewstate}'
+            self.proximo_viewstate += 1
+            sessao.views[viewstate] = True
+            while len(sessao.views) > self.opcoes.views_por_sessao:
+                sessao.views.popitem(last=False)
+            return viewstate
+
+    def viewstate_valido(self, jsessionid, viewstate):
+        with self.trava:
+            sessao = self.sessoes.get(jsessionid)
+            if sessao is None or self._vencida(sessao) or viewstate not in sessao.views:
+                return False
+            sessao.views.move_to_end(viewstate)
+            return True
+
+    # === ACERVOS ===
+
+    def ler_acervo(self, acervo, chave):
+        if acervo is None:
+            return None
+        with self.trava_acervo:
+            if chave not in acervo:
+                return None
+            return acervo.ler_texto(chave)
+
+    # === PÁGINAS ===
+
+    def pagina_cursos(self):
+        if self._pagina_cursos is None:
+            self._pagina_cursos = pagina_cursos(self.opcoes.cursos, self.opcoes.semente)
+        return self._pagina_cursos
+
+
+# ================================================================================
+# PÁGINAS
+# ================================================================================
+
+def _rng(*partes):
+    """Gerador determinístico por página (semente + chave)"""
+    return random.Random(zlib.crc32('/'.join(map(str, partes)).encode('utf-8')))
+
+
+def _pagina(titulo, corpo):
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="UTF-8"/>'
+            f'<title>SIGAA - {titulo}</title></head>\n<body>\n{corpo}\n</body></html>\n')
+
+
+def _viewstate(viewstate):
+    return (f'<input type="hidden" name="javax.faces.ViewState" '
+            f'id="javax.faces.ViewState" value="{viewstate}" autocomplete="off" />')
+
+
+def formulario_turmas(viewstate):
+    return (
+        f'<form id="formTurma" name="formTurma" method="post" action="{ROTA_TURMAS}" '
+        'enctype="application/x-www-form-urlencoded">\n'
+        '<input type="hidden" name="formTurma" value="formTurma" />\n'
+        '<select id="formTurma:inputNivel" name="formTurma:inputNivel">'
+        '<option value="">-- TODOS --</option><option value="G">GRADUAÇÃO</option></select>\n'
+        '<input type="text" id="formTurma:inputDepto" name="formTurma:inputDepto" />\n'
+        '<input type="text" id="formTurma:inputAno" name="formTurma:inputAno" />\n'
+        '<input type="text" id="formTurma:inputPeriodo" name="formTurma:inputPeriodo" />\n'
+        '<input type="submit" name="formTurma:j_id_jsp_1370969402_11" value="Buscar" />\n'
+        f'{_viewstate(viewstate)}\n</form>')
+
+
+def linhas_turmas(ano, semestre, id_departamento, turmas, semente):
+    """Linhas (agrupadores de disciplina + turmas) sintéticas de um departamento/período"""
+    rng = _rng(semente, 'turmas', ano, semestre, id_departamento)
+    total = rng.randint(0, turmas) if rng.random() > 0.1 else 0
+    linhas = []
+    disciplina = 0
+    for i in range(total):
+        if i == 0 or rng.random() < 0.4:
+            disciplina += 1
+            linhas.append(
+                '<tr class="agrupador"><td colspan="8"><span class="tituloDisciplina">'
+                f'D{id_departamento}{disciplina:03d} - DISCIPLINA {disciplina} '
+                f'DO DEPARTAMENTO {id_departamento}</span></td></tr>')
+        ofertadas = rng.randint(10, 80)
+        linhas.append(
+            f'<tr class="{"linhaPar" if i % 2 else "linhaImpar"}">'
+            f'<td class="turma">{i % 12 + 1:02d}</td>'
+            f'<td class="anoPeriodo">{ano}.{semestre}</td>'
+            f'<td class="nome">DOCENTE {rng.randint(1, 5000)} ({rng.choice([30, 60, 90])}h)</td>'
+            f'<td>{rng.choice(HORARIOS)}</td>'
+            '<td></td>'
+            f'<td>{ofertadas}</td>'
+            f'<td>{rng.randint(0, ofertadas)}</td>'
+            f'<td>{rng.choice(LOCAIS)}</td></tr>')
+    return linhas
+
+
+def tabela_turmas(linhas, limite=0):
+    """Tabela de resultado de listar.jsf; acima de ``limite`` linhas, só o começo e o aviso"""
+    if not linhas:
+        return '<div class="descricaoOperacao">Nenhuma turma encontrada.</div>'
+    aviso = ''
+    if limite and len(linhas) > limite:
+        aviso = (f'<div class="descricaoOperacao">A busca retornou mais de {limite} '
+                 'resultados. Refine a busca.</div>\n')
+        linhas = linhas[:limite]
+    return (aviso + '<div id="turmasAbertas"><table class="listagem"><thead><tr>'
+            '<th>Turma</th><th>Período</th><th>Docente</th><th>Horário</th><th></th>'
+            '<th>Vagas Ofertadas</th><th>Vagas Ocupadas</th><th>Local</th></tr></thead>\n'
+            '<tbody>\n' + '\n'.join(linhas) + '\n</tbody></table></div>')
+
+
+def formulario_docentes(departamentos, viewstate):
+    opcoes = ''.join(f'<option value="{id_departamento}">{html.escape(nome)}</option>'
+                     for id_departamento, nome in departamentos)
+    return (
+        f'<form id="form" name="form" method="post" action="{ROTA_BUSCA_DOCENTES}" '
+        'enctype="application/x-www-form-urlencoded">\n'
+        '<input type="hidden" name="form" value="form" />\n'
+        '<input type="text" id="form:nome" name="form:nome" value="" />\n'
+        '<select id="form:departamento" name="form:departamento">'
+        f'<option value="0">-- SELECIONE --</option>{opcoes}</select>\n'
+        '<input type="submit" name="form:buscar" value="Buscar" />\n'
+        f'{_viewstate(viewstate)}\n</form>')
+
+
+def siapes_departamento(id_departamento, docentes, semente):
+    rng = _rng(semente, 'docentes', id_departamento)
+    base = int(id_departamento) * 1000 if id_departamento.isdigit() else zlib.crc32(
+        id_departamento.encode('utf-8')) % 10**6 * 1000
+    return [str(base + i) for i in range(1, rng.randint(docentes // 2, docentes) + 1)]
+
+
+def tabela_docentes(id_departamento, docentes, semente):
+    siapes = siapes_departamento(id_departamento, docentes, semente)
+    if not siapes:
+        return '<div class="descricaoOperacao">Nenhum docente encontrado.</div>'
+    linhas = [
+        f'<tr class="{"linhaPar" if i % 2 else "linhaImpar"}">'
+        f'<td><img src="/sigaa/img/no_picture.png" /></td>'
+        f'<td><span class="nome">DOCENTE {siape}</span>'
+        f'<span class="pagina"><a href="{ROTA_PORTAL_DOCENTE}?siape={siape}">'
+        'página pública</a></span></td></tr>'
+        for i, siape in enumerate(siapes)]
+    return ('<table class="listagem"><tbody>\n' + '\n'.join(linhas) + '\n</tbody></table>')
+
+
+def pagina_docente(siape, semente):
+    """Perfil sintético com as seções lidas por extrair_dados_perfil_docente"""
+    rng = _rng(semente, 'perfil', siape)
+    perfil = ''
+    if rng.random() > 0.2:
+        perfil = (
+            '<div id="perfil-docente"><dl>\n'
+            f'<dt>Descrição pessoal</dt><dd> Professor &amp; pesquisador {siape} </dd>\n'
+            f'<dt>Formação acadêmica</dt><dd><b>{rng.choice(FORMACOES)}</b> em Área {siape % 40}</dd>\n'
+            f'<dt>Áreas de Interesse</dt><dd>Área {siape % 40}; Área {siape % 17}</dd>\n'
+            f'<dt>Currículo Lattes</dt><dd><a href="http://lattes.cnpq.br/{siape}">link</a></dd>\n'
+            '</dl></div>')
+    curriculo = ''
+    if rng.random() > 0.3:
+        curriculo = (
+            '<script type="text/javascript">var curriculo = {"curriculo": {'
+            f'"dataatualizacao": "{rng.randint(1, 28):02d}{rng.randint(1, 12):02d}2024", '
+            f'"nomeemcitacoesbibliograficas": "DOCENTE, S.; DOCENTE {siape}", '
+            f'"textoresumocvrh": "Possui {rng.choice(FORMACOES).lower()} pela UnB. '
+            + 'Atua em ensino, pesquisa e extensão. ' * rng.randint(1, 20) + '"}};</script>')
+    return _pagina(f'Docente {siape}', (
+        f'<div id="left"><div class="foto_professor"><img src="/sigaa/img/{siape}.jpg"/></div></div>\n'
+        f'<div id="id-docente"><h3>DOCENTE {siape}</h3>'
+        f'<p class="departamento">DEPARTAMENTO {siape // 1000}</p></div>\n'
+        f'{perfil}\n'
+        '<div id="formacao-academica"><dl>\n'
+        f'<dt><span class="ano">{rng.choice(FORMACOES)}</span></dt>'
+        f'<dd><span>Área {siape % 40}</span> <span>UnB</span><span>2001 - 2005</span></dd>\n'
+        '</dl></div>\n'
+        '<div id="contato"><dl>\n'
+        f'<dt>Telefone/Ramal</dt><dd>{"Não informado" if siape % 3 == 0 else f"3107-{siape % 10000:04d}"}</dd>\n'
+        f'<dt>Endereço eletrônico</dt><dd>docente{siape}@unb.br</dd>\n'
+        '<dt>Sala</dt><dd>Não informado</dd>\n'
+        f'</dl></div>\n{curriculo}'))
+
+
+def pagina_cursos(cursos, semente):
+    """curso/lista.jsf com cabeçalhos td.subFormulario por departamento"""
+    rng = _rng(semente, 'cursos')
+    linhas = []
+    departamento = 0
+    for i in range(cursos):
+        if i == 0 or rng.random() < 0.15:
+            departamento += 1
+            linhas.append(f'<tr><td class="subFormulario" colspan="8">D{departamento:02d} - '
+                          f'FACULDADE SINTÉTICA {departamento}</td></tr>')
+        linhas.append(
+            f'<tr class="{"linhaPar" if i % 2 else "linhaImpar"}">'
+            f'<td>CURSO {i}</td>'
+            f'<td>{rng.choice(GRAUS)}</td>'
+            f'<td>{rng.choice(TURNOS)}</td>'
+            f'<td>{rng.choice(SEDES)}</td>'
+            '<td>Presencial</td>'
+            f'<td>{rng.choice(GRAUS) if rng.random() < 0.2 else ""}</td>'
+            f'<td>COORDENADOR {i}</td>'
+            f'<td><a href="/sigaa/public/curso/portal.jsf?lc=pt_BR&amp;id={100000 + i}">'
+            'Visualizar Página do Curso</a></td></tr>')
+    return _pagina('Cursos', (
+        '<table class="listagem"><thead><tr><th>Nome</th><th>Grau</th><th>Turno</th>'
+        '<th>Sede</th><th>Modalidade</th><th></th><th>Coordenador</th><th></th></tr></thead>\n'
+        '<tbody>\n' + '\n'.join(linhas) + '\n</tbody></table>'))
+
+
+PAGINA_EXPIRADA = _pagina('Sessão Expirada', (
+    '<div id="conteudo"><h2>Sua sessão expirou</h2>'
+    '<p>Por questões de segurança, sua sessão foi encerrada. '
+    '<a href="/sigaa/public/home.jsf">Voltar</a></p></div>'))
+
+
+# ================================================================================
+# SERVIDOR
+# ================================================================================
+
+class ManipuladorSigaa(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SigaaLocal/1.0'
+
+    @property
+    def estado(self):
+        return self.server.estado
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def _atender(self, metodo):
+        estado = self.estado
+        opcoes = estado.opcoes
+        url = urlsplit(self.path)
+        self.consulta = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        self.formulario = {}
+        if metodo == 'POST':
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            corpo = self.rfile.read(tamanho).decode('utf-8', 'replace')
+            self.formulario = {chave: valores[-1] for chave, valores
+                               in parse_qs(corpo, keep_blank_values=True).items()}
+
+        atraso = opcoes.latencia + (opcoes.latencia_busca if metodo == 'POST' else 0)
+        if opcoes.jitter:
+            atraso += (estado.sortear() * 2 - 1) * opcoes.jitter
+        if atraso > 0:
+            time.sleep(atraso)
+
+        rota = {
+            ROTA_TURMAS: self.turmas,
+            ROTA_BUSCA_DOCENTES: self.busca_docentes,
+            ROTA_PORTAL_DOCENTE: self.portal_docente,
+            ROTA_CURSOS: self.cursos,
+        }.get(url.path)
+        estado.contar(f'{metodo} {url.path}')
+
+        if rota is None:
+            estado.contar('404')
+            return self.responder(404, _pagina('Página não encontrada', '<h2>404</h2>'))
+        if opcoes.taxa_erro and estado.sortear() < opcoes.taxa_erro:
+            status = 503 if estado.sortear() < 0.5 else 500
+            estado.contar(str(status))
+            return self.responder(status, _pagina('Erro', f'<h2>Erro {status}</h2>'))
+        rota(metodo)
+
+    def responder(self, status, corpo, cookie=None):
+        dados = corpo.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html;charset=UTF-8')
+        self.send_header('Content-Length', str(len(dados)))
+        if cookie:
+            self.send_header('Set-Cookie', f'JSESSIONID={cookie}; Path=/sigaa; HttpOnly')
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _jsessionid(self):
+        for parte in (self.headers.get('Cookie') or '').split(';'):
+            nome, _, valor = parte.strip().partition('=')
+            if nome == 'JSESSIONID':
+                return valor
+        return None
+
+    def _formulario_jsf(self, metodo, gerar):
+        """GET abre sessão e emite ViewState; POST valida o ViewState recebido"""
+        estado = self.estado
+        if metodo == 'GET':
+            jsessionid, nova = estado.abrir_sessao(self._jsessionid())
+            corpo = gerar(None, estado.emitir_viewstate(jsessionid))
+            return self.responder(200, corpo, cookie=jsessionid if nova else None)
+
+        jsessionid = self._jsessionid()
+        expirou = not estado.viewstate_valido(jsessionid, self.formulario.get('javax.faces.ViewState'))
+        if not expirou and estado.opcoes.taxa_expiracao:
+            expirou = estado.sortear() < estado.opcoes.taxa_expiracao
+        if expirou:
+            estado.contar('expiradas')
+            return self.responder(200, PAGINA_EXPIRADA)
+        self.responder(200, gerar(self.formulario, estado.emitir_viewstate(jsessionid)))
+
+    # === ROTAS ===
+
+    def turmas(self, metodo):
+        self._formulario_jsf(metodo, self._pagina_turmas)
+
+    def _pagina_turmas(self, formulario, viewstate):
+        if formulario is None:
+            return _pagina('Turmas', formulario_turmas(viewstate))
+
+        estado = self.estado
+        ano = formulario.get('formTurma:inputAno', '')
+        semestre = formulario.get('formTurma:inputPeriodo', '')
+        id_departamento = formulario.get('formTurma:inputDepto', '')
+        opcoes = estado.opcoes
+        if not id_departamento:
+            # sem departamento: todos, na ordem do cadastro
+            estado.contar('turmas/lote')
+            linhas = [linha for id_dep, _ in estado.departamentos for linha in linhas_turmas(
+                ano, semestre, id_dep, opcoes.turmas, opcoes.semente)]
+        else:
+            salva = estado.ler_acervo(estado.acervo_ofertas, f'{ano}/{semestre}/{id_departamento}')
+            if salva is not None:
+                estado.contar('replay/turmas')
+                return PADRAO_VIEWSTATE.sub(_viewstate(viewstate), salva, count=1)
+            linhas = linhas_turmas(ano, semestre, id_departamento, opcoes.turmas, opcoes.semente)
+        return _pagina('Turmas', formulario_turmas(viewstate) + '\n' + tabela_turmas(
+            linhas, opcoes.limite_lote))
+
+    def busca_docentes(self, metodo):
+        self._formulario_jsf(metodo, self._pagina_busca_docentes)
+
+    def _pagina_busca_docentes(self, formulario, viewstate):
+        estado = self.estado
+        corpo = formulario_docentes(estado.departamentos, viewstate)
+        if formulario is not None:
+            id_departamento = formulario.get('form:departamento', '0')
+            if id_departamento not in ('', '0'):
+                corpo += '\n' + tabela_docentes(
+                    id_departamento, estado.opcoes.docentes, estado.opcoes.semente)
+        return _pagina('Busca de Docentes', corpo)
+
+    def portal_docente(self, metodo):
+        siape = self.consulta.get('siape', '')
+        if not siape.isdigit():
+            return self.responder(404, _pagina('Docente não encontrado', '<h2>404</h2>'))
+        estado = self.estado
+        salva = estado.ler_acervo(estado.acervo_docentes, siape)
+        if salva is not None:
+            estado.contar('replay/docentes')
+            return self.responder(200, salva)
+        self.responder(200, pagina_docente(int(siape), estado.opcoes.semente))
+
+    def cursos(self, metodo):
+        self.responder(200, self.estado.pagina_cursos())
+
+
+class ServidorSigaa(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, opcoes=None, verboso=False):
+        super().__init__(endereco, ManipuladorSigaa)
+        self.estado = EstadoSigaa(opcoes or OpcoesServidor())
+        self.verboso = verboso
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return  # o cliente desistiu (timeout do spider)
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, porta = self.server_address[:2]
+        return f'http://{host}:{porta}'
+
+
+def iniciar_em_thread(opcoes=None, host='127.0.0.1', porta=0):
+    """Sobe o servidor numa thread daemon (porta 0 = livre); pare com shutdown()"""
+    servidor = ServidorSigaa((host, porta), opcoes)
+    threading.Thread(target=servidor.serve_forever, name='servidor-sigaa', daemon=True).start()
+    return servidor
+
+
+def adicionar_argumentos(parser):
+    """Opções de conteúdo, latência e falhas (compartilhadas com bench_crawl.py)"""
+    grupo = parser.add_argument_group('servidor SIGAA local')
+    grupo.add_argument('--latencia', type=float, default=0,
+                       help='Latência base por resposta, em ms (padrão: 0)')
+    grupo.add_argument('--jitter', type=float, default=0,
+                       help='Variação uniforme ± da latência, em ms (padrão: 0)')
+    grupo.add_argument('--latencia-busca', type=float, default=0,
+                       help='Latência extra dos POSTs de busca, em ms (padrão: 0)')
+    grupo.add_argument('--taxa-erro', type=float, default=0,
+                       help='Fração de respostas 500/503 (padrão: 0)')
+    grupo.add_argument('--taxa-expiracao', type=float, default=0,
+                       help='Fração de POSTs respondidos como sessão expirada (padrão: 0)')
+    grupo.add_argument('--views-por-sessao', type=int, default=15,
+                       help='ViewStates válidos por sessão (padrão: 15)')
+    grupo.add_argument('--sessao-ttl', type=float, default=0,
+                       help='Validade da sessão em segundos; 0 = sem validade (padrão: 0)')
+    grupo.add_argument('--semente', type=int, default=0,
+                       help='Semente das páginas sintéticas e das falhas (padrão: 0)')
+    grupo.add_argument('--turmas', type=int, default=30,
+                       help='Máximo de turmas por departamento/período (padrão: 30)')
+    grupo.add_argument('--docentes', type=int, default=10,
+                       help='Máximo de docentes por departamento (padrão: 10)')
+    grupo.add_argument('--cursos', type=int, default=400,
+                       help='Cursos em curso/lista.jsf (padrão: 400)')
+    grupo.add_argument('--departamentos', type=int, default=0,
+                       help='Limita os departamentos de busca_docentes.jsf; 0 = todos (padrão: 0)')
+    grupo.add_argument('--limite-lote', type=int, default=0,
+                       help='Máximo de linhas numa busca de turmas; acima disso, '
+                            '"Refine a busca" e resultado cortado; 0 = sem limite (padrão: 0)')
+    grupo.add_argument('--sem-acervo', action='store_true',
+                       help='Não reaproveita páginas salvas; só conteúdo sintético')
+
+
+def opcoes_de_args(args):
+    acervos = {'acervo_ofertas': None, 'acervo_docentes': None} if args.sem_acervo else {}
+    return OpcoesServidor(
+        latencia=args.latencia, jitter=args.jitter, latencia_busca=args.latencia_busca,
+        taxa_erro=args.taxa_erro, taxa_expiracao=args.taxa_expiracao,
+        views_por_sessao=args.views_por_sessao, sessao_ttl=args.sessao_ttl,
+        semente=args.semente, turmas=args.turmas, docentes=args.docentes,
+        cursos=args.cursos, departamentos=args.departamentos, limite_lote=args.limite_lote,
+        **acervos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SIGAA local para benchmarks dos spiders')
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço (padrão: 127.0.0.1)')
+    parser.add_argument('--porta', type=int, default=8765, help='Porta (padrão: 8765)')
+    parser.add_argument('--verboso', action='store_true', help='Registra cada requisição')
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+
+    servidor = ServidorSigaa((args.host, args.porta), opcoes_de_args(args), verboso=args.verboso)
+    estado = servidor.estado
+    print(f"🌐 SIGAA local em {servidor.url}")
+    print(f"   {len(estado.departamentos)} departamentos, acervo de ofertas: "
+          f"{'sim' if estado.acervo_ofertas else 'não'}, acervo de docentes: "
+          f"{'sim' if estado.acervo_docentes else 'não'}")
+    print(f"   scrapy crawl <spider> -s SIGAA_LOCAL_URL={servidor.url} "
+          "-s 'DOWNLOAD_HANDLERS={\"https\": \"sigaa.local.DownloadHandlerLocal\"}'")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print("\n📊 Requisições atendidas:")
+        for chave, total in sorted(estado.contadores.items()):
+            print(f"   {chave:<50} {total:>8}")
+
+
+if __name__ == '__main__':
+    main()
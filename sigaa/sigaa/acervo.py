@@ -0,0 +1,277 @@
+"""
+Acervo de HTMLs brutos em segmentos comprimidos
+
+Os spiders salvavam um arquivo por página (``mock/<ano>/<semestre>/
+ofertas_<id>.html``, ``temp/docentes/paginas_html/docente_<siape>.html``):
+milhares de arquivos pequenos, sem compressão, um inode cada. O acervo grava
+as páginas em poucos segmentos append-only, no estilo WARC: cada registro é
+um membro gzip independente (cabeçalho + corpo) concatenado ao segmento, de
+modo que ``zcat segmento-00000.warc.gz`` ainda lê tudo em sequência.
+
+Layout da pasta:
+
+    segmento-00000.warc.gz   membros gzip, até ``tamanho_segmento`` bytes
+    indice.jsonl             uma linha por registro gravado (chave, segmento,
+                             offset, bytes comprimidos, hash do conteúdo)
+
+O índice é o ponto de commit: o membro vai para o segmento antes da linha do
+índice, e a última linha de uma chave é a que vale. Leituras por chave são
+um fatiamento do segmento mapeado em memória (mmap) e uma descompressão, sem
+varrer nada. Gravar uma página com o mesmo hash da versão atual (ignorando
+ViewState/jsessionid, ver :func:`sigaa.delta.hash_conteudo`) não grava nada;
+versões substituídas ocupam espaço até :meth:`AcervoHtml.compactar`.
+"""
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from sigaa.delta import hash_conteudo
+
+# Tamanho a partir do qual o próximo registro abre um novo segmento
+TAMANHO_SEGMENTO = 64 * 1024 * 1024
+
+INDICE = 'indice.jsonl'
+SEPARADOR_CABECALHO = b'\r\n\r\n'
+
+
+def _nome_segmento(numero):
+    return f'segmento-{numero:05d}.warc.gz'
+
+
+def _comprimir(dados):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    return compressor.compress(dados) + compressor.flush()
+
+
+def _descartar_linha_incompleta(caminho, bloco=64 * 1024):
+    """Corta o índice depois da última quebra de linha (gravação interrompida)"""
+    with open(caminho, 'r+b') as f:
+        tamanho = f.seek(0, os.SEEK_END)
+        fim = tamanho
+        while fim > 0:
+            inicio = max(0, fim - bloco)
+            f.seek(inicio)
+            posicao = f.read(fim - inicio).rfind(b'\n')
+            if posicao >= 0:
+                fim = inicio + posicao + 1
+                break
+            fim = inicio
+        if fim < tamanho:
+            f.truncate(fim)
+
+
+class AcervoHtml:
+    """
+    Páginas HTML por chave, em segmentos gzip com índice de offsets
+
+    Um único processo grava (com trava entre threads, para o deferToThread
+    dos spiders); qualquer número de processos pode ler. Leitores ignoram uma
+    última linha incompleta do índice (gravação em curso ou interrompida); só
+    o gravador a descarta, ao abrir o índice para append.
+
+    Args:
+        pasta: diretório do acervo (criado na primeira gravação)
+        tamanho_segmento: bytes comprimidos por segmento antes de abrir outro
+    """
+
+    def __init__(self, pasta, tamanho_segmento=TAMANHO_SEGMENTO):
+        self.pasta = Path(pasta)
+        self.tamanho_segmento = tamanho_segmento
+        self.indice = {}  # chave -> (segmento, offset, bytes, hash)
+        self.substituidos = 0  # registros antigos ainda nos segmentos
+        self._trava = threading.Lock()
+        self._mapas = {}  # segmento -> mmap
+        self._segmento = None  # arquivo aberto para append
+        self._numero = -1
+        self._arquivo_indice = None
+        self._carregar()
+
+    def _carregar(self):
+        caminho = self.pasta / INDICE
+        if caminho.exists():
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+            # sem a linha incompleta do fim, se houver
+            fim = dados.rfind(b'\n') + 1
+            for linha in dados[:fim].splitlines():
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if registro['chave'] in self.indice:
+                    self.substituidos += 1
+                self.indice[registro['chave']] = (
+                    registro['segmento'], registro['offset'], registro['bytes'],
+                    registro['hash'])
+
+        numeros = [int(p.name[9:14]) for p in self.pasta.glob('segmento-*.warc.gz')]
+        self._numero = max(numeros, default=-1)
+
+    # --- leitura -------------------------------------------------------
+
+    def __contains__(self, chave):
+        return chave in self.indice
+
+    def __len__(self):
+        return len(self.indice)
+
+    def chaves(self, prefixo=''):
+        """Chaves com o prefixo, em ordem alfabética"""
+        return sorted(chave for chave in self.indice if chave.startswith(prefixo))
+
+    def hash(self, chave):
+        """Hash do conteúdo (sem trechos voláteis) da versão atual"""
+        return self.indice[chave][3]
+
+    def ler(self, chave):
+        """Corpo (bytes) da versão atual da chave; KeyError se ausente"""
+        segmento, offset, tamanho, _ = self.indice[chave]
+        membro = self._mapa(segmento, offset + tamanho)[offset:offset + tamanho]
+        registro = zlib.decompress(membro, 31)
+        return registro[registro.index(SEPARADOR_CABECALHO) + len(SEPARADOR_CABECALHO):]
+
+    def ler_texto(self, chave):
+        return self.ler(chave).decode('utf-8')
+
+    def itens(self, prefixo=''):
+        """(chave, corpo) das chaves com o prefixo, na ordem física dos segmentos"""
+        chaves = [chave for chave in self.indice if chave.startswith(prefixo)]
+        chaves.sort(key=lambda chave: self.indice[chave][:2])
+        for chave in chaves:
+            yield chave, self.ler(chave)
+
+    def _mapa(self, segmento, fim):
+        """mmap do segmento, remapeado se o segmento cresceu depois de mapeado"""
+        with self._trava:
+            mapa = self._mapas.get(segmento)
+            if mapa is None or len(mapa) < fim:
+                if mapa is not None:
+                    mapa.close()
+                if self._segmento is not None:
+                    self._segmento.flush()
+                with open(self.pasta / segmento, 'rb') as f:
+                    mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapas[segmento] = mapa
+            return mapa
+
+    # --- gravação ------------------------------------------------------
+
+    def gravar(self, chave, corpo):
+        """
+        Grava a página da chave; retorna False se o conteúdo é o mesmo da
+        versão atual (nada é gravado)
+        """
+        if isinstance(corpo, str):
+            corpo = corpo.encode('utf-8')
+        hash_pagina = hash_conteudo(corpo)
+        with self._trava:
+            anterior = self.indice.get(chave)
+            if anterior is not None and anterior[3] == hash_pagina:
+                return False
+
+            cabecalho = (f'SIGAA-Chave: {chave}\r\n'
+                         f'SIGAA-Data: {time.strftime("%Y-%m-%dT%H:%M:%S")}\r\n'
+                         f'Content-Length: {len(corpo)}\r\n').encode('utf-8')
+            membro = _comprimir(cabecalho + b'\r\n' + corpo)
+            segmento, offset = self._reservar(len(membro))
+            self._segmento.write(membro)
+            self._segmento.flush()
+
+            self._arquivo_indice.write(json.dumps({
+                'chave': chave, 'segmento': segmento, 'offset': offset,
+                'bytes': len(membro), 'hash': hash_pagina,
+            }, ensure_ascii=False) + '\n')
+            self._arquivo_indice.flush()
+
+            if anterior is not None:
+                self.substituidos += 1
+            self.indice[chave] = (segmento, offset, len(membro), hash_pagina)
+            return True
+
+    def _reservar(self, tamanho):
+        """Segmento e offset do próximo membro (abre outro segmento se preciso)"""
+        if self._arquivo_indice is None:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            caminho = self.pasta / INDICE
+            if caminho.exists():
+                _descartar_linha_incompleta(caminho)
+            self._arquivo_indice = open(caminho, 'a', encoding='utf-8')
+        if self._segmento is None:
+            self._numero = max(self._numero, 0)
+            self._segmento = open(self.pasta / _nome_segmento(self._numero), 'ab')
+        offset = self._segmento.tell()
+        if offset and offset + tamanho > self.tamanho_segmento:
+            self._segmento.close()
+            self._numero += 1
+            self._segmento = open(self.pasta / _nome_segmento(self._numero), 'ab')
+            offset = 0
+        return _nome_segmento(self._numero), offset
+
+    def fechar(self):
+        """Descarrega e fecha segmento, índice e mapas"""
+        with self._trava:
+            for arquivo in (self._segmento, self._arquivo_indice):
+                if arquivo is not None:
+                    arquivo.flush()
+                    os.fsync(arquivo.fileno())
+                    arquivo.close()
+            self._segmento = self._arquivo_indice = None
+            for mapa in self._mapas.values():
+                mapa.close()
+            self._mapas = {}
+
+    def compactar(self):
+        """
+        Reescreve só as versões atuais em segmentos novos, em ordem de chave,
+        copiando os membros comprimidos sem recomprimir; retorna os bytes
+        liberados
+        """
+        antes = sum(p.stat().st_size for p in self.pasta.glob('segmento-*.warc.gz'))
+        antigos = {p.name for p in self.pasta.glob('segmento-*.warc.gz')}
+        self.fechar()
+        if not self.indice:
+            return 0
+
+        atual = dict(self.indice)
+        self.indice = {}
+        self._numero += 1
+        temporario = self.pasta / (INDICE + '.tmp')
+        self._arquivo_indice = open(temporario, 'w', encoding='utf-8')
+        mapas = {}
+        try:
+            for chave in sorted(atual):
+                segmento, offset, tamanho, hash_pagina = atual[chave]
+                if segmento not in mapas:
+                    with open(self.pasta / segmento, 'rb') as f:
+                        mapas[segmento] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                membro = mapas[segmento][offset:offset + tamanho]
+                novo, novo_offset = self._reservar(tamanho)
+                self._segmento.write(membro)
+                self._arquivo_indice.write(json.dumps({
+                    'chave': chave, 'segmento': novo, 'offset': novo_offset,
+                    'bytes': tamanho, 'hash': hash_pagina,
+                }, ensure_ascii=False) + '\n')
+                self.indice[chave] = (novo, novo_offset, tamanho, hash_pagina)
+        finally:
+            for mapa in mapas.values():
+                mapa.close()
+        self.fechar()
+
+        # Índice novo no lugar do antigo é o commit; só então os segmentos
+        # antigos podem sair
+        os.replace(temporario, self.pasta / INDICE)
+        for nome in antigos:
+            (self.pasta / nome).unlink(missing_ok=True)
+        self.substituidos = 0
+        depois = sum(p.stat().st_size for p in self.pasta.glob('segmento-*.warc.gz'))
+        return antes - depois
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,56 @@
+"""
+Registro dos modelos de sigaa.items no itemadapter
+
+Importado explicitamente pelos spiders que entregam modelos e pelos
+pipelines; fora do Scrapy (workers de analise/) os modelos não precisam do
+itemadapter, que importaria o Scrapy inteiro.
+"""
+from types import MappingProxyType
+
+from itemadapter.adapter import AdapterInterface, ItemAdapter
+
+from sigaa.items import ModeloSigaa
+
+
+class AdaptadorModelo(AdapterInterface):
+    """Expõe os modelos ao itemadapter como mapeamentos campo -> valor"""
+
+    @classmethod
+    def is_item_class(cls, item_class):
+        return issubclass(item_class, ModeloSigaa)
+
+    @classmethod
+    def get_field_meta_from_class(cls, item_class, field_name):
+        return MappingProxyType({})
+
+    @classmethod
+    def get_field_names_from_class(cls, item_class):
+        return list(item_class.campos)
+
+    def __getitem__(self, campo):
+        if not self.item.tem(campo):
+            raise KeyError(campo)
+        if campo in self.item.campos:
+            return getattr(self.item, campo)
+        return self.item.extras[campo]
+
+    def __setitem__(self, campo, valor):
+        self.item.definir(campo, valor)
+
+    def __delitem__(self, campo):
+        self.item.remover(campo)
+
+    def __iter__(self):
+        item = self.item
+        if item.preserva_chaves:
+            yield from item._chaves
+            return
+        yield from item.campos
+        if item.aceita_extras:
+            yield from item.extras
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+ItemAdapter.ADAPTER_CLASSES.appendleft(AdaptadorModelo)
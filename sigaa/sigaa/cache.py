@@ -0,0 +1,188 @@
+"""
+Cache de respostas do SIGAA endereçado por conteúdo
+
+As páginas do SIGAA são servidas por formulários JSF: a mesma busca
+(departamento, ano, período) é um POST cujo corpo traz um
+``javax.faces.ViewState`` diferente a cada sessão, o que impede o cache
+padrão do Scrapy de reconhecer requisições repetidas. Aqui a chave é a
+requisição semântica: método + URL canônica + campos do formulário, sem os
+campos voláteis (ViewState).
+
+Layout em disco (dentro de ``.scrapy/<SIGAA_CACHE_DIR>``):
+
+    chaves/<aa>/<sha1 da chave>.json   metadados (url, status, headers, objeto)
+    objetos/<aa>/<sha256 do corpo>.br  corpo comprimido (brotli, ou .gz)
+
+Corpos idênticos (ex.: páginas "nenhuma turma encontrada") são gravados uma
+única vez. Entradas vencem pelo TTL na leitura; o tamanho total é limitado
+por :meth:`CacheRespostas.podar`, que remove as entradas menos usadas.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+from w3lib.url import canonicalize_url
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, gzip
+    brotli = None
+
+
+CAMPOS_VOLATEIS_PADRAO = ('javax.faces.ViewState',)
+
+# Headers que não fazem sentido reaproveitar (cookies da sessão original,
+# tamanho/codificação do corpo já descomprimido)
+HEADERS_IGNORADOS = {b'set-cookie', b'content-length', b'content-encoding',
+                     b'transfer-encoding'}
+
+
+def campos_formulario(request):
+    """Pares (campo, valor) do corpo x-www-form-urlencoded de uma requisição"""
+    tipo = request.headers.get('Content-Type', b'') or b''
+    if request.method != 'POST' or b'x-www-form-urlencoded' not in tipo:
+        return []
+    return parse_qsl(request.body.decode(request.encoding), keep_blank_values=True)
+
+
+def chave_requisicao(request, campos_volateis=CAMPOS_VOLATEIS_PADRAO):
+    """Chave semântica: método, URL canônica e campos estáveis do formulário"""
+    campos = sorted((campo, valor) for campo, valor in campos_formulario(request)
+                    if campo not in campos_volateis)
+    if request.method == 'POST' and not campos and request.body:
+        # POST que não é formulário: o corpo inteiro faz parte da chave
+        campos = [('', hashlib.sha256(request.body).hexdigest())]
+    return json.dumps([request.method, canonicalize_url(request.url), campos],
+                      ensure_ascii=False)
+
+
+class CacheRespostas:
+    """Armazenamento das respostas, com TTL e limite de tamanho"""
+
+    def __init__(self, pasta, ttl=0, max_bytes=0):
+        self.pasta = Path(pasta)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.extensao = '.br' if brotli else '.gz'
+
+    def _caminho_chave(self, chave):
+        nome = hashlib.sha1(chave.encode('utf-8')).hexdigest()
+        return self.pasta / 'chaves' / nome[:2] / f'{nome}.json'
+
+    def _caminho_objeto(self, objeto):
+        return self.pasta / 'objetos' / objeto[:2] / objeto
+
+    def buscar(self, chave):
+        """Metadados e corpo da entrada, ou None (ausente, vencida ou corrompida)"""
+        caminho = self._caminho_chave(chave)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if self.ttl and time.time() - entrada['timestamp'] > self.ttl:
+            caminho.unlink(missing_ok=True)
+            return None
+
+        try:
+            corpo = self._ler_objeto(entrada['objeto'])
+        except (OSError, ValueError):
+            caminho.unlink(missing_ok=True)
+            return None
+
+        # mtime da chave marca o último uso (base da poda por tamanho)
+        os.utime(caminho)
+        return entrada, corpo
+
+    def _ler_objeto(self, objeto):
+        with open(self._caminho_objeto(objeto), 'rb') as f:
+            dados = f.read()
+        if objeto.endswith('.br'):
+            if brotli is None:
+                raise ValueError('brotli não instalado')
+            return brotli.decompress(dados)
+        return gzip.decompress(dados)
+
+    def guardar(self, chave, url, status, headers, corpo):
+        """Grava corpo (uma vez por conteúdo) e os metadados da chave"""
+        objeto = hashlib.sha256(corpo).hexdigest() + self.extensao
+        caminho_objeto = self._caminho_objeto(objeto)
+        if not caminho_objeto.exists():
+            dados = brotli.compress(corpo) if brotli else gzip.compress(corpo)
+            self._gravar_atomico(caminho_objeto, dados)
+
+        entrada = {
+            'chave': chave,
+            'url': url,
+            'status': status,
+            'headers': headers,
+            'objeto': objeto,
+            'timestamp': time.time(),
+        }
+        self._gravar_atomico(self._caminho_chave(chave),
+                             json.dumps(entrada, ensure_ascii=False).encode('utf-8'))
+
+    @staticmethod
+    def _gravar_atomico(caminho, dados):
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(caminho.name + '.tmp')
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+
+    def podar(self):
+        """
+        Remove entradas vencidas, objetos órfãos e, acima de max_bytes, as
+        entradas usadas há mais tempo; retorna (entradas, bytes) removidos
+        """
+        pasta_chaves = self.pasta / 'chaves'
+        pasta_objetos = self.pasta / 'objetos'
+        if not pasta_chaves.exists():
+            return 0, 0
+
+        agora = time.time()
+        entradas = []
+        removidas = 0
+        for caminho in pasta_chaves.glob('*/*.json'):
+            try:
+                with open(caminho, encoding='utf-8') as f:
+                    entrada = json.load(f)
+                uso = caminho.stat().st_mtime
+            except (OSError, json.JSONDecodeError):
+                caminho.unlink(missing_ok=True)
+                removidas += 1
+                continue
+            if self.ttl and agora - entrada['timestamp'] > self.ttl:
+                caminho.unlink(missing_ok=True)
+                removidas += 1
+                continue
+            entradas.append((uso, caminho, entrada['objeto']))
+
+        tamanhos = {}
+        for caminho in pasta_objetos.glob('*/*'):
+            tamanhos[caminho.name] = caminho.stat().st_size
+
+        # Mais recentes primeiro: ficam enquanto couberem no limite
+        entradas.sort(reverse=True)
+        usados = set()
+        total = 0
+        for uso, caminho, objeto in entradas:
+            tamanho = 0 if objeto in usados else tamanhos.get(objeto, 0)
+            if self.max_bytes and total + tamanho > self.max_bytes:
+                caminho.unlink(missing_ok=True)
+                removidas += 1
+                continue
+            usados.add(objeto)
+            total += tamanho
+
+        liberados = 0
+        for objeto, tamanho in tamanhos.items():
+            if objeto not in usados:
+                self._caminho_objeto(objeto).unlink(missing_ok=True)
+                liberados += tamanho
+        return removidas, liberados
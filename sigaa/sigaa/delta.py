@@ -0,0 +1,301 @@
+"""
+Detecção de mudanças por entidade e emissão de deltas
+
+Uma entidade é a unidade de página coletada: a listagem de um
+departamento×período (ofertas) ou a página de um SIAPE (docentes). Para cada
+uma, :class:`EstadoEntidades` guarda o hash do conteúdo da página e os
+registros extraídos dela na última execução. Página com o mesmo hash não é
+reextraída nem reescrita; quando muda, os registros novos são comparados com
+os anteriores e a diferença vira operações de delta (adicionado, alterado,
+removido).
+
+O hash ignora o que muda a cada requisição sem mudar o conteúdo (o
+``javax.faces.ViewState`` e o ``jsessionid`` das URLs).
+
+Nada é regravado por inteiro a cada execução. O estado é um snapshot JSON
+mais um log (``<estado>.log.jsonl``) com o novo conteúdo de cada entidade
+alterada. O JSONL consolidado (``data/ofertas/2025-1.jsonl``) ganha ao lado
+um log de mudanças (``2025-1.mudancas.jsonl``) com as operações de delta,
+que :func:`ler_saida` aplica em fluxo. Os dois só são compactados (snapshot
+ou JSONL regravado, log zerado) quando o log passa de
+``FRACAO_COMPACTACAO`` do arquivo compactado.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+# Trechos que variam entre requisições idênticas
+PADRAO_VOLATIL = re.compile(
+    rb'<input[^>]*javax\.faces\.ViewState[^>]*>|;jsessionid=[^"\'?#&\s]*', re.IGNORECASE)
+
+# Tamanho do log, em fração do arquivo compactado, a partir do qual compactar
+FRACAO_COMPACTACAO = 0.25
+
+
+def hash_conteudo(corpo):
+    """SHA-256 do corpo da página sem os trechos voláteis"""
+    if isinstance(corpo, str):
+        corpo = corpo.encode('utf-8')
+    return hashlib.sha256(PADRAO_VOLATIL.sub(b'', corpo)).hexdigest()
+
+
+def diferenca(anteriores, novos, chave_registro):
+    """
+    Operações de delta entre duas listas de registros de uma entidade
+
+    Registros são pareados pela chave (na ordem em que aparecem, para chaves
+    repetidas); pares com conteúdo diferente são 'alterado', sobras são
+    'adicionado' ou 'removido'.
+    """
+    pendentes = {}
+    for registro in anteriores:
+        pendentes.setdefault(chave_registro(registro), []).append(registro)
+
+    operacoes = []
+    for registro in novos:
+        candidatos = pendentes.get(chave_registro(registro))
+        if not candidatos:
+            operacoes.append({'operacao': 'adicionado', 'registro': registro})
+            continue
+        anterior = candidatos.pop(0)
+        if anterior != registro:
+            operacoes.append({'operacao': 'alterado', 'registro': registro,
+                              'anterior': anterior})
+
+    for candidatos in pendentes.values():
+        for registro in candidatos:
+            operacoes.append({'operacao': 'removido', 'registro': registro})
+    return operacoes
+
+
+class EstadoEntidades:
+    """
+    Hash e registros por entidade, persistidos num JSON
+
+    Args:
+        arquivo: caminho do estado (ex.: data/ofertas/.estado/2025-1.json)
+        chave_registro: função registro -> chave usada no delta
+    """
+
+    def __init__(self, arquivo, chave_registro):
+        self.arquivo = Path(arquivo)
+        self.log = self.arquivo.with_name(self.arquivo.stem + '.log.jsonl')
+        self.chave_registro = chave_registro
+        self.entidades = {}
+        self.operacoes = []
+        self.alterado = False
+        self._pendentes = {}  # entidade -> novo conteúdo (None: removida), fora do log
+        self._gravadas = 0  # operações já levadas ao log da saída
+        if self.arquivo.exists():
+            try:
+                with open(self.arquivo, encoding='utf-8') as f:
+                    self.entidades = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.entidades = {}
+        # o log guarda o conteúdo inteiro da entidade: reaplicá-lo sobre um
+        # snapshot que já o inclui (queda durante a compactação) não muda nada
+        for mudanca in _ler_linhas(self.log):
+            if mudanca.get('removida'):
+                self.entidades.pop(mudanca['entidade'], None)
+            else:
+                self.entidades[mudanca['entidade']] = {
+                    'hash': mudanca['hash'], 'registros': mudanca['registros']}
+
+    def inalterado(self, entidade, hash_pagina):
+        """True se a entidade já foi extraída a partir do mesmo conteúdo"""
+        anterior = self.entidades.get(entidade)
+        return anterior is not None and anterior['hash'] == hash_pagina
+
+    def atualizar(self, entidade, hash_pagina, registros):
+        """Registra o novo conteúdo da entidade; retorna as operações de delta"""
+        anteriores = self.entidades.get(entidade, {}).get('registros', [])
+        operacoes = diferenca(anteriores, registros, self.chave_registro)
+        for operacao in operacoes:
+            operacao['entidade'] = entidade
+        self.entidades[entidade] = self._pendentes[entidade] = {
+            'hash': hash_pagina, 'registros': registros}
+        self.operacoes.extend(operacoes)
+        self.alterado = True
+        return operacoes
+
+    def remover(self, entidade):
+        """Remove uma entidade que deixou de existir; retorna as operações de delta"""
+        anterior = self.entidades.pop(entidade, None)
+        if anterior is None:
+            return []
+        operacoes = [{'operacao': 'removido', 'registro': registro, 'entidade': entidade}
+                     for registro in anterior['registros']]
+        self._pendentes[entidade] = None
+        self.operacoes.extend(operacoes)
+        self.alterado = True
+        return operacoes
+
+    def registros(self, ordem=None):
+        """Todos os registros, entidade por entidade (ordenadas por ``ordem``)"""
+        for entidade in sorted(self.entidades, key=ordem):
+            yield from self.entidades[entidade]['registros']
+
+    def salvar(self):
+        """Acrescenta as entidades alteradas ao log do estado, ou compacta"""
+        if not self.alterado:
+            return
+        texto = ''.join(
+            json.dumps({'entidade': entidade, 'removida': True} if conteudo is None
+                       else {'entidade': entidade, **conteudo}, ensure_ascii=False) + '\n'
+            for entidade, conteudo in self._pendentes.items())
+        if _compactar(self.arquivo, self.log, texto):
+            _gravar_atomico(self.arquivo, json.dumps(self.entidades, ensure_ascii=False))
+            self.log.unlink(missing_ok=True)
+        else:
+            _acrescentar(self.log, texto)
+        self._pendentes = {}
+        self.alterado = False
+
+    def gravar_saida(self, caminho, ordem=None):
+        """
+        Acrescenta as operações ainda não gravadas ao log de mudanças do JSONL
+        consolidado; o JSONL só é regravado (com todos os registros, na
+        ``ordem`` das entidades) ao compactar, ou se não existe ou foi
+        regravado por outro programa desde o início do log
+        """
+        caminho = Path(caminho)
+        log = caminho_mudancas(caminho)
+        texto = ''.join(json.dumps(operacao, ensure_ascii=False) + '\n'
+                        for operacao in self.operacoes[self._gravadas:])
+        self._gravadas = len(self.operacoes)
+        if caminho.exists() and _base_do_log(log) == _identidade(caminho):
+            if not texto:
+                return
+            if not _compactar(caminho, log, texto):
+                _acrescentar(log, texto)
+                return
+
+        _gravar_atomico(caminho, ''.join(json.dumps(registro, ensure_ascii=False) + '\n'
+                                         for registro in self.registros(ordem)))
+        # log novo, só com o cabeçalho que o amarra a esta versão do JSONL
+        _gravar_atomico(log, json.dumps({'base': _identidade(caminho)}) + '\n')
+
+    def gravar_delta(self, pasta, prefixo):
+        """Grava as operações desta execução em <pasta>/<prefixo>_<timestamp>.jsonl"""
+        if not self.operacoes:
+            return None
+        caminho = Path(pasta) / f"{prefixo}_{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+        _gravar_atomico(caminho, ''.join(
+            json.dumps(operacao, ensure_ascii=False) + '\n' for operacao in self.operacoes))
+        return caminho
+
+
+def caminho_mudancas(saida):
+    """Log de mudanças de um JSONL consolidado: ``<nome>.mudancas.jsonl``"""
+    saida = Path(saida)
+    return saida.with_name(saida.stem + '.mudancas.jsonl')
+
+
+def ler_saida(caminho, registros=None):
+    """
+    Registros do JSONL consolidado com o log de mudanças aplicado, em fluxo
+
+    Args:
+        caminho: JSONL consolidado
+        registros: iterável que substitui a leitura do JSONL (ex.: um leitor
+            que já trata linhas inválidas)
+    """
+    caminho = Path(caminho)
+    if registros is None:
+        registros = _ler_linhas(caminho)
+    log = caminho_mudancas(caminho)
+    if not log.exists() or not caminho.exists() or _base_do_log(log) != _identidade(caminho):
+        # sem log, ou log de outra versão do JSONL: o JSONL vale como está
+        yield from registros
+        return
+
+    # Cada registro vivo do log é uma caixa [registro]; None = removido
+    vivos = {}  # registro canônico -> caixas com esse conteúdo
+    da_base = {}  # registro canônico -> caixas que substituem registros do JSONL
+    adicionados = []
+    for operacao in list(_ler_linhas(log))[1:]:
+        tipo = operacao.get('operacao')
+        if tipo == 'adicionado':
+            caixa = [operacao['registro']]
+            adicionados.append(caixa)
+        else:
+            canonico = _canonico(operacao['anterior' if tipo == 'alterado' else 'registro'])
+            if vivos.get(canonico):
+                caixa = vivos[canonico].pop(0)
+            else:
+                caixa = [None]
+                da_base.setdefault(canonico, []).append(caixa)
+            caixa[0] = operacao['registro'] if tipo == 'alterado' else None
+        if caixa[0] is not None:
+            vivos.setdefault(_canonico(caixa[0]), []).append(caixa)
+
+    for registro in registros:
+        caixas = da_base.get(_canonico(registro)) if da_base else None
+        if caixas:
+            registro = caixas.pop(0)[0]
+        if registro is not None:
+            yield registro
+    for caixa in adicionados:
+        if caixa[0] is not None:
+            yield caixa[0]
+
+
+def _canonico(registro):
+    return json.dumps(registro, ensure_ascii=False, sort_keys=True)
+
+
+def _identidade(caminho):
+    info = caminho.stat()
+    return {'bytes': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def _base_do_log(log):
+    """Identidade do JSONL a que o log de mudanças se refere (cabeçalho)"""
+    try:
+        with open(log, encoding='utf-8') as f:
+            return json.loads(f.readline()).get('base')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _ler_linhas(caminho):
+    """Objetos de um JSONL, pulando linhas inválidas (ex.: gravação interrompida)"""
+    if not caminho.exists():
+        return
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                yield json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+
+
+def _compactar(compactado, log, texto):
+    """True se, com ``texto`` acrescentado, o log passa do limite de compactação"""
+    if not compactado.exists():
+        return True
+    tamanho_log = log.stat().st_size if log.exists() else 0
+    return tamanho_log + len(texto.encode('utf-8')) > FRACAO_COMPACTACAO * compactado.stat().st_size
+
+
+def _acrescentar(caminho, texto):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, 'a+b') as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                texto = '\n' + texto  # linha incompleta de uma gravação interrompida
+        f.write(texto.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _gravar_atomico(caminho, texto):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(texto)
+    os.replace(temporario, caminho)
@@ -2,11 +2,248 @@
 #
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
+"""
+Modelos tipados dos itens coletados
 
-import scrapy
+Cada modelo é uma classe com ``__slots__`` (sem ``__dict__`` por instância,
+sem repetir as chaves em cada registro). Ao declarar um modelo, o
+``__init_subclass__`` de :class:`ModeloSigaa` gera e compila uma única vez:
 
+- ``__init__`` com os campos na ordem do ``__slots__`` (default None), que
+  faz ``sys.intern`` dos campos em ``internados`` (departamento, sede,
+  turno... valores que se repetem em milhares de registros);
+- ``para_jsonl()``: a linha JSON com as chaves já codificadas e os campos
+  em ordem fixa, igual a ``json.dumps(item.para_dict(), ensure_ascii=False)``;
+- ``valores_csv()``: a tupla de valores na ordem de ``campos`` (aninhados
+  em JSON), para ``csv.writer``.
 
-class SigaaItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+Com ``aceita_extras``, chaves desconhecidas vão para o dict ``extras`` e
+saem depois dos campos. Com ``preserva_chaves`` (que implica
+``aceita_extras``; o ``__slots__`` declara ``_chaves``), o modelo guarda as
+chaves recebidas, na ordem recebida, e a saída é a do dict de origem: só
+essas chaves, None como null e colunas desconhecidas na posição original.
+
+O AdaptadorModelo (sigaa/adaptador.py) registrado no itemadapter faz os
+modelos funcionarem como itens em todo o Scrapy (``-o``, pipelines,
+ItemAdapter). Este módulo não o importa: o itemadapter carrega o Scrapy, e os
+workers de analise/ só extraem e serializam modelos; quem entrega modelos ao
+Scrapy (spiders e pipelines) importa sigaa.adaptador explicitamente.
+"""
+import json
+import sys
+from json.encoder import encode_basestring
+
+_codificar = json.JSONEncoder(ensure_ascii=False).encode
+
+# Ordens de chaves dos modelos com preserva_chaves: registros com as mesmas
+# chaves compartilham a tupla
+_ordens = {}
+
+
+def _ordem(chaves):
+    return _ordens.setdefault(chaves, chaves)
+
+
+def _plano(valor):
+    if isinstance(valor, (dict, list, tuple)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+class ModeloSigaa:
+    """Base dos modelos: gera construtor e serializadores a partir do __slots__"""
+
+    __slots__ = ()
+    campos = ()
+    internados = ()
+    aceita_extras = False
+    preserva_chaves = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.campos = tuple(campo for campo in cls.__slots__
+                           if campo != 'extras' and not campo.startswith('_'))
+        cls.aceita_extras = cls.aceita_extras or cls.preserva_chaves
+        cls._compilar()
+
+    @classmethod
+    def _compilar(cls):
+        campos = cls.campos
+        codigo = []
+
+        # __init__
+        if cls.preserva_chaves:
+            codigo.append('def __init__(self, **dados):')
+            codigo.append('    self._chaves = _ordem(tuple(dados))')
+            for campo in campos:
+                codigo.append(f'    {campo} = dados.pop({campo!r}, None)')
+        else:
+            parametros = ', '.join(f'{campo}=None' for campo in campos)
+            if cls.aceita_extras:
+                parametros += ', **extras'
+            codigo.append(f'def __init__(self, {parametros}):')
+        for campo in campos:
+            if campo in cls.internados:
+                codigo.append(f'    if {campo}.__class__ is str: {campo} = _intern({campo})')
+            codigo.append(f'    self.{campo} = {campo}')
+        if cls.preserva_chaves:
+            codigo.append('    self.extras = dados')
+        elif cls.aceita_extras:
+            codigo.append('    self.extras = extras')
+
+        # para_jsonl: chaves pré-codificadas, strings pelo encoder em C
+        valor = '(_s(v) if (v := self.{0}).__class__ is str else _c(v))'
+        codigo.append('def para_jsonl(self):')
+        if cls.preserva_chaves:
+            codigo.append('    p = []')
+            codigo.append('    for k in self._chaves:')
+            codigo.append('        v = _g(self, k) if k in _campos else self.extras[k]')
+            codigo.append("        p.append(_s(k) + ': ' + (_s(v) if v.__class__ is str else _c(v)))")
+            codigo.append("    return '{' + ', '.join(p) + '}\\n'")
+        elif cls.aceita_extras:
+            codigo.append('    p = []')
+            for campo in campos:
+                chave = encode_basestring(campo) + ': '
+                codigo.append(f'    p.append({chave!r} + {valor.format(campo)})')
+            codigo.append('    for k, v in self.extras.items():')
+            codigo.append("        p.append(_s(k) + ': ' + _c(v))")
+            codigo.append("    return '{' + ', '.join(p) + '}\\n'")
+        else:
+            partes = [f'{(encode_basestring(campo) + ": ")!r} + {valor.format(campo)}'
+                      for campo in campos]
+            codigo.append("    return '{' + " + " + ', ' + ".join(partes) + " + '}\\n'")
+
+        # valores_csv
+        itens = ', '.join(
+            f'(v if (v := self.{campo}).__class__ is str or v is None else _p(v))'
+            for campo in campos)
+        codigo.append('def valores_csv(self):')
+        codigo.append(f'    return ({itens},)')
+
+        # para_dict
+        codigo.append('def para_dict(self):')
+        if cls.preserva_chaves:
+            codigo.append('    return {k: _g(self, k) if k in _campos else self.extras[k]'
+                          ' for k in self._chaves}')
+        else:
+            pares = ', '.join(f'{campo!r}: self.{campo}' for campo in campos)
+            codigo.append(f'    d = {{{pares}}}')
+            if cls.aceita_extras:
+                codigo.append('    d.update(self.extras)')
+            codigo.append('    return d')
+
+        ambiente = {'_intern': sys.intern, '_s': encode_basestring, '_c': _codificar,
+                    '_p': _plano, '_g': getattr, '_ordem': _ordem, '_campos': frozenset(campos)}
+        exec(compile('\n'.join(codigo), f'<modelo {cls.__name__}>', 'exec'), ambiente)
+        for nome in ('__init__', 'para_jsonl', 'valores_csv', 'para_dict'):
+            funcao = ambiente[nome]
+            funcao.__qualname__ = f'{cls.__name__}.{nome}'
+            setattr(cls, nome, funcao)
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Modelo a partir de um dict (chaves desconhecidas vão para extras)"""
+        if cls.aceita_extras:
+            return cls(**dados)
+        return cls(**{campo: dados.get(campo) for campo in cls.campos})
+
+    def tem(self, campo):
+        """Se o campo faz parte do registro (nos modelos sem preserva_chaves, todo campo faz)"""
+        if self.preserva_chaves:
+            return campo in self._chaves
+        return campo in self.campos or (self.aceita_extras and campo in self.extras)
+
+    def definir(self, campo, valor):
+        """Atribui um campo ou extra; com preserva_chaves, uma chave nova vai para o fim"""
+        if self.preserva_chaves and campo not in self._chaves:
+            self._chaves = _ordem(self._chaves + (campo,))
+        if campo in self.campos:
+            setattr(self, campo, valor)
+        elif self.aceita_extras:
+            self.extras[campo] = valor
+        else:
+            raise KeyError(f'{type(self).__name__} não tem o campo {campo!r}')
+
+    def remover(self, campo):
+        if not self.tem(campo):
+            raise KeyError(campo)
+        if self.preserva_chaves:
+            self._chaves = _ordem(tuple(k for k in self._chaves if k != campo))
+        if campo in self.campos:
+            setattr(self, campo, None)
+        else:
+            del self.extras[campo]
+
+    def get(self, campo, padrao=None):
+        if self.preserva_chaves and campo not in self._chaves:
+            return padrao
+        if campo in self.campos:
+            return getattr(self, campo)
+        if self.aceita_extras:
+            return self.extras.get(campo, padrao)
+        return padrao
+
+    def __eq__(self, outro):
+        if type(outro) is not type(self):
+            return NotImplemented
+        return self.para_dict() == outro.para_dict()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.para_dict()!r})'
+
+
+# ================================================================================
+# MODELOS
+# ================================================================================
+
+class Departamento(ModeloSigaa):
+    """Opção do select de departamentos (spider departamentos)"""
+    __slots__ = ('id_departamento', 'nome_departamento', 'timestamp_coleta')
+
+
+class Curso(ModeloSigaa):
+    """Linha de curso/lista.jsf (spider curso)"""
+    __slots__ = ('sigla_departamento', 'departamento', 'nome', 'grau_academico', 'turno',
+                 'sede', 'modalidade', 'grau_academico_2', 'coordenacao', 'link_detalhes')
+    internados = ('sigla_departamento', 'departamento', 'grau_academico', 'turno', 'sede',
+                  'modalidade', 'grau_academico_2')
+
+
+class Oferta(ModeloSigaa):
+    """Turma de turmas/listar.jsf (spider ofertas)"""
+    __slots__ = ('id_departamento', 'codigo', 'ano_periodo', 'docente', 'horario',
+                 'vagas_ofertadas', 'vagas_ocupadas', 'local')
+    internados = ('id_departamento', 'codigo', 'ano_periodo', 'horario', 'local')
+
+
+class DocenteResumo(ModeloSigaa):
+    """Docente da busca por departamento (orquestrador de docentes)"""
+    __slots__ = ('codigo_departamento', 'departamento', 'nome_docente', 'siape',
+                 'link_pagina', 'processamento')
+    internados = ('codigo_departamento', 'departamento', 'processamento')
+
+
+class DocenteCompleto(ModeloSigaa):
+    """
+    Docente com os dados da página e do Lattes (docentes_completo e orquestrador)
+
+    Os dados originais desconhecidos (colunas de docentes.jsonl fora do
+    DocenteResumo) ficam em ``extras``; a linha JSONL tem as chaves do dict
+    montado, na mesma ordem e com os None, como antes do modelo.
+    """
+    __slots__ = (
+        # dados originais
+        'codigo_departamento', 'departamento', 'nome_docente', 'siape', 'link_pagina',
+        'processamento',
+        # página do docente (extrair_dados_pagina_docente)
+        'nome_completo', 'departamento_completo', 'foto_url', 'descricao_pessoal',
+        'formacao_resumida', 'areas_interesse', 'curriculo_lattes', 'formacao_detalhada',
+        'telefone_ramal', 'email', 'sala', 'erro_extracao', 'curriculo_lattes_dados',
+        # processamento
+        'url_acessada', 'siape_processado', 'arquivo_html_origem', 'timestamp_processamento',
+        'status_processamento',
+        'extras', '_chaves',
+    )
+    internados = ('codigo_departamento', 'departamento', 'departamento_completo',
+                  'processamento', 'status_processamento')
+    preserva_chaves = True
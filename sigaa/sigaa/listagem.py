@@ -0,0 +1,172 @@
+"""
+Extrator das tabelas ``table.listagem`` do SIGAA
+
+As páginas públicas do SIGAA (turmas, cursos, docentes) apresentam os
+resultados numa ``table.listagem`` em que cada ``tr`` é um registro e cada
+``td`` um campo. Em vez de um ``row.css('td:nth-child(N)::text')`` por coluna
+(uma tradução CSS→XPath e uma busca na subárvore para cada célula), o
+:class:`ExtratorListagem` compila o mapeamento das colunas uma única vez e
+percorre os ``td`` de cada linha numa só passada.
+
+Colunas são indicadas por posição (1-based, como ``nth-child``) ou por classe
+do ``td`` (``'.turma'``); opcionalmente com um seletor CSS relativo à célula,
+também pré-compilado, para valores aninhados:
+
+    ExtratorListagem({
+        'codigo': '.turma',                 # td.turma::text
+        'horario': 4,                       # td:nth-child(4)::text
+        'link': (8, 'a::attr(href)'),       # td:nth-child(8) a::attr(href)
+        'nome': (2, 'span.nome::text'),     # td:nth-child(2) span.nome::text
+    })
+
+Para páginas grandes (a busca de ofertas em lote), :func:`linhas_em_fluxo`
+entrega os ``tr`` das ``table.listagem`` à medida que o HTML é analisado,
+descartando cada linha depois de usada, sem montar a árvore inteira. O corpo
+já chega inteiro do downloader; o ganho é não manter a árvore nem os
+registros da página toda, e cada linha pode virar item assim que fecha.
+"""
+from lxml import etree
+from parsel.csstranslator import css2xpath
+
+from sigaa.items import Oferta
+
+
+class ExtratorListagem:
+    """
+    Extrai os registros de uma ``table.listagem`` em uma passada por linha
+
+    Args:
+        colunas: mapeamento campo -> coluna, onde coluna é a posição do ``td``
+            (int), a classe do ``td`` ('.classe') ou uma tupla
+            (posição ou classe, seletor CSS relativo à célula)
+        linhas: seletor CSS das linhas da tabela
+        padrao: valor dos campos ausentes na linha
+    """
+
+    def __init__(self, colunas, linhas='table.listagem tbody tr', padrao=None):
+        self.campos = tuple(colunas)
+        self.padrao = padrao
+        self._linhas = etree.XPath(css2xpath(linhas))
+        self._por_posicao = {}
+        self._por_classe = {}
+
+        for campo, coluna in colunas.items():
+            celula, seletor = coluna if isinstance(coluna, tuple) else (coluna, None)
+            consulta = etree.XPath(css2xpath(seletor)) if seletor else None
+            if isinstance(celula, str) and celula.startswith('.'):
+                destino = self._por_classe.setdefault(celula[1:], [])
+            else:
+                destino = self._por_posicao.setdefault(int(celula), [])
+            destino.append((campo, consulta))
+
+    def __call__(self, seletor):
+        """Itera os registros (dicts) de cada linha da tabela"""
+        raiz = getattr(seletor, 'selector', seletor).root
+        for tr in self._linhas(raiz):
+            yield self.extrair_linha(tr)
+
+    def extrair_linha(self, tr):
+        """Monta o registro de um ``tr`` (elemento lxml)"""
+        valores = {}
+        posicao = 0
+        for td in tr:
+            if not isinstance(td.tag, str):
+                continue  # comentários e instruções não contam em nth-child
+            posicao += 1
+            if td.tag != 'td':
+                continue
+            alvos = self._por_posicao.get(posicao)
+            if alvos:
+                self._ler_celula(td, alvos, valores)
+            if self._por_classe:
+                for classe in td.get('class', '').split():
+                    alvos = self._por_classe.get(classe)
+                    if alvos:
+                        self._ler_celula(td, alvos, valores)
+
+        padrao = self.padrao
+        return {campo: valores.get(campo, padrao) for campo in self.campos}
+
+    @staticmethod
+    def _ler_celula(td, alvos, valores):
+        for campo, consulta in alvos:
+            if campo in valores:
+                continue  # como em .get(): vale a primeira célula com valor
+            valor = _primeiro_texto(td) if consulta is None else _primeiro(consulta(td))
+            if valor is not None:
+                valores[campo] = valor.strip()
+
+
+def linhas_em_fluxo(corpo, encoding='utf-8', classe='listagem', conteiner=None,
+                    bloco=64 * 1024):
+    """
+    Itera os ``tr`` (elementos lxml) do ``tbody`` das tabelas com a classe
+    ``classe`` analisando ``corpo`` em blocos; cada linha é limpa e removida
+    da árvore depois que o consumidor avança, então a memória não cresce com
+    o tamanho da página. Com ``conteiner`` (um id), só valem as tabelas dentro
+    desse elemento, como ``div#turmasAbertas table.listagem`` no
+    :data:`EXTRATOR_TURMAS`
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='tr', encoding=encoding)
+    aceitas = {}
+    for inicio in range(0, len(corpo), bloco):
+        parser.feed(corpo[inicio:inicio + bloco])
+        yield from _linhas_prontas(parser, classe, conteiner, aceitas)
+    parser.close()
+    yield from _linhas_prontas(parser, classe, conteiner, aceitas)
+
+
+def _linhas_prontas(parser, classe, conteiner, aceitas):
+    for _, tr in parser.read_events():
+        tbody = tr.getparent()
+        tabela = tbody.getparent() if tbody is not None else None
+        if tbody is not None and tbody.tag == 'tbody' and tabela is not None:
+            # a decisão por tabela é guardada: os ancestrais não mudam entre linhas
+            aceita = aceitas.get(tabela)
+            if aceita is None:
+                aceita = aceitas[tabela] = (
+                    classe in tabela.get('class', '').split()
+                    and (conteiner is None or any(
+                        ancestral.get('id') == conteiner for ancestral in tabela.iterancestors())))
+            if aceita:
+                yield tr
+        tr.clear()
+        if tbody is not None:
+            while tr.getprevious() is not None:
+                del tbody[0]
+
+
+def _primeiro_texto(elemento):
+    """Primeiro nó de texto filho direto (equivalente a ``::text`` + ``.get()``)"""
+    if elemento.text is not None:
+        return elemento.text
+    for filho in elemento:
+        if filho.tail is not None:
+            return filho.tail
+    return None
+
+
+def _primeiro(resultado):
+    for item in resultado:
+        return item if isinstance(item, str) else _primeiro_texto(item)
+    return None
+
+
+# Colunas da tabela de resultado de listar.jsf
+EXTRATOR_TURMAS = ExtratorListagem({
+    'codigo': '.turma',
+    'ano_periodo': '.anoPeriodo',
+    'docente': '.nome',
+    'horario': 4,
+    'vagas_ofertadas': 6,
+    'vagas_ocupadas': 7,
+    'local': 8,
+}, linhas='div#turmasAbertas table.listagem tbody tr', padrao='')
+
+
+def extrair_turmas(seletor, id_departamento):
+    """Extrai as turmas da tabela de resultado de listar.jsf"""
+    for turma in EXTRATOR_TURMAS(seletor):
+        if not turma['codigo']:
+            continue
+        yield Oferta(id_departamento=id_departamento, **turma)
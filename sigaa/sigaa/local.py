@@ -0,0 +1,68 @@
+"""
+Redirecionamento das requisições para o SIGAA local (benchmarks/servidor_sigaa.py)
+
+O DownloadHandlerLocal troca esquema e host das URLs de ``sigaa.unb.br`` pelo
+``SIGAA_LOCAL_URL`` só na hora do download e devolve a resposta com a URL
+original. Spiders, OffsiteMiddleware, cookies e FormRequest.from_response
+continuam vendo ``https://sigaa.unb.br/...``; nada nos spiders muda.
+
+    scrapy crawl curso -s SIGAA_LOCAL_URL=http://127.0.0.1:8765 \\
+        -s 'DOWNLOAD_HANDLERS={"https": "sigaa.local.DownloadHandlerLocal"}'
+
+benchmarks/bench_crawl.py sobe o servidor e aplica esses settings
+(:func:`settings_locais`) sozinho.
+"""
+import inspect
+from urllib.parse import urlsplit
+
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.exceptions import NotConfigured
+
+HOST_SIGAA = 'sigaa.unb.br'
+
+
+def settings_locais(url):
+    """Settings que apontam o crawl para o servidor local em ``url``"""
+    return {
+        'SIGAA_LOCAL_URL': url,
+        'DOWNLOAD_HANDLERS': {'https': DownloadHandlerLocal, 'http': DownloadHandlerLocal},
+    }
+
+
+class DownloadHandlerLocal(HTTP11DownloadHandler):
+    """HTTP11DownloadHandler que baixa as páginas do SIGAA do servidor local"""
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        url = crawler.settings.get('SIGAA_LOCAL_URL')
+        if not url:
+            raise NotConfigured('SIGAA_LOCAL_URL não definido')
+        handler = super().from_crawler(crawler)
+        handler.destino = urlsplit(url)
+        return handler
+
+    def _local(self, url):
+        partes = urlsplit(url)
+        if partes.hostname != HOST_SIGAA:
+            return url
+        return partes._replace(scheme=self.destino.scheme, netloc=self.destino.netloc).geturl()
+
+    # O Scrapy escolhe a convenção pelo tipo do método: corrotina
+    # (request) nas versões novas, Deferred (request, spider) nas antigas
+    if inspect.iscoroutinefunction(HTTP11DownloadHandler.download_request):
+        async def download_request(self, request):
+            local = request.replace(url=self._local(request.url))
+            response = await super().download_request(local)
+            return self._restaurar(request, local, response)
+    else:
+        def download_request(self, request, spider):
+            local = request.replace(url=self._local(request.url))
+            d = super().download_request(local, spider)
+            return d.addCallback(lambda response: self._restaurar(request, local, response))
+
+    @staticmethod
+    def _restaurar(request, local, response):
+        # o handler grava a latência no meta da cópia
+        if 'download_latency' in local.meta:
+            request.meta['download_latency'] = local.meta['download_latency']
+        return response.replace(url=request.url)
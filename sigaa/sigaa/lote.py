@@ -0,0 +1,146 @@
+"""
+Busca de ofertas em lote, com divisão adaptativa do escopo
+
+O formulário ``formTurma`` de listar.jsf aceita um único departamento em
+``inputDepto`` ou nenhum: em branco, com o ``inputNivel`` escolhido, uma só
+busca traz as turmas de todos os departamentos do período. É o escopo mais
+amplo que o SIGAA aceita (não há filtro por unidade/instituto), e troca ~100
+POSTs por semestre por um. O OfertasSpider com ``lote=1`` tenta esse escopo
+primeiro e divide quando a resposta não serve:
+
+    lote (inputDepto em branco)  ->  um departamento por busca (fila normal)
+
+A resposta em lote é analisada em fluxo (:func:`turmas_do_lote`), só dentro
+de ``div#turmasAbertas`` e sem montar a árvore da página inteira; fora do
+modo incremental, cada turma é emitida assim que a sua linha é lida, e as que
+já saíram não se repetem se o lote acabar dividido. Ela é descartada e o
+escopo dividido quando (:func:`motivo_divisao`):
+
+    - o download falha ou estoura ``OFERTAS_LOTE_TIMEOUT`` (errback);
+    - o corpo veio truncado (sem ``</html>``, ou flag ``dataloss``);
+    - a página traz uma mensagem de limite/validação do SIGAA
+      (``OFERTAS_LOTE_PADROES_DIVISAO``) ou atinge ``OFERTAS_LOTE_LIMITE_TURMAS``;
+    - alguma turma não pode ser atribuída a um departamento.
+
+A tabela de resultado agrupa as turmas por disciplina (``tr.agrupador``), sem
+dizer o departamento. :class:`MapaDisciplinas` aprende, nas buscas por
+departamento, a que departamento pertence cada código de disciplina
+(``data/ofertas/.historico/disciplinas.json``); na primeira execução o lote
+se divide e alimenta o mapa, nas seguintes as turmas do lote são atribuídas
+por ele (código exato ou, para disciplinas novas, prefixo de letras que só
+um departamento usa). As atribuições por prefixo são palpites: entram no
+stat ``ofertas_lote/por_prefixo`` e no log de cada lote, e só uma busca por
+departamento (lote dividido) corrige o mapa se o palpite estava errado.
+"""
+import json
+import os
+import re
+from pathlib import Path
+
+from sigaa.listagem import linhas_em_fluxo
+
+# Mensagens do SIGAA que indicam resultado limitado ou busca recusada
+PADROES_DIVISAO_PADRAO = ['Campo obrigatório não informado', 'Refine a busca', 'refine a busca']
+
+PADRAO_PREFIXO = re.compile(r'[A-Za-z]+')
+
+
+def codigo_disciplina(titulo):
+    """'FGA0001 - NOME DA DISCIPLINA' -> 'FGA0001'"""
+    return titulo.split(' - ', 1)[0].strip()
+
+
+class MapaDisciplinas:
+    """
+    Código de disciplina -> id do departamento que a oferta, persistido num JSON
+
+    Args:
+        arquivo: caminho do mapa
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = Path(arquivo)
+        self.disciplinas = {}
+        self.alterado = False
+        if self.arquivo.exists():
+            try:
+                with open(self.arquivo, encoding='utf-8') as f:
+                    self.disciplinas = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.disciplinas = {}
+        self._prefixos = None
+
+    def __len__(self):
+        return len(self.disciplinas)
+
+    def aprender(self, id_departamento, codigos):
+        """Disciplinas vistas na listagem de um departamento"""
+        for codigo in codigos:
+            if codigo and self.disciplinas.get(codigo) != id_departamento:
+                self.disciplinas[codigo] = id_departamento
+                self.alterado = True
+                self._prefixos = None
+
+    def atribuir(self, codigo):
+        """
+        (id do departamento da disciplina, exato): ``exato`` é False quando
+        o código é novo e o departamento foi deduzido pelo prefixo; (None,
+        False) se não dá para saber
+        """
+        id_departamento = self.disciplinas.get(codigo)
+        if id_departamento is not None:
+            return id_departamento, True
+        return self._pelo_prefixo(codigo), False
+
+    def _pelo_prefixo(self, codigo):
+        prefixo = PADRAO_PREFIXO.match(codigo)
+        if prefixo is None:
+            return None
+        if self._prefixos is None:
+            self._prefixos = {}
+            for conhecido, dono in self.disciplinas.items():
+                encontrado = PADRAO_PREFIXO.match(conhecido)
+                if encontrado:
+                    self._prefixos.setdefault(encontrado.group(), set()).add(dono)
+        donos = self._prefixos.get(prefixo.group(), ())
+        return next(iter(donos)) if len(donos) == 1 else None
+
+    def salvar(self):
+        if not self.alterado:
+            return
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.arquivo.with_name(self.arquivo.name + '.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.disciplinas, f, ensure_ascii=False, sort_keys=True)
+        os.replace(temporario, self.arquivo)
+        self.alterado = False
+
+
+def motivo_divisao(response, padroes):
+    """Por que a resposta em lote não serve (texto para o log), ou None"""
+    if 'dataloss' in response.flags:
+        return 'resposta incompleta (dataloss)'
+    if b'</html>' not in response.body[-1024:].lower():
+        return 'resposta truncada'
+    for padrao in padroes:
+        if padrao in response.body:
+            return f'mensagem do SIGAA ({padrao.decode("latin-1")!r})'
+    return None
+
+
+def turmas_do_lote(response, extrator):
+    """
+    Itera (código da disciplina, turma) da tabela de resultado analisando o
+    corpo em fluxo, uma linha por vez; ``extrator`` é o ExtratorListagem das
+    colunas de turma, e só valem as tabelas de ``div#turmasAbertas``, como em
+    :data:`sigaa.listagem.EXTRATOR_TURMAS`
+    """
+    disciplina = ''
+    for tr in linhas_em_fluxo(response.body, encoding=response.encoding,
+                              conteiner='turmasAbertas'):
+        if 'agrupador' in tr.get('class', '').split():
+            disciplina = codigo_disciplina(tr.xpath('string(.//span[@class="tituloDisciplina"])'))
+            continue
+        turma = extrator.extrair_linha(tr)
+        if turma['codigo']:
+            yield disciplina, turma
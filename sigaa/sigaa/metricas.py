@@ -0,0 +1,274 @@
+"""
+Métricas de latência do crawl por endpoint e por departamento
+
+Os middlewares do projeto (sigaa.middlewares) observam cada requisição e
+cada callback e acumulam histogramas com limites fixos:
+
+    download   latência de rede da resposta (``download_latency``), segundos
+    bytes      tamanho do corpo da resposta
+    callback   tempo gasto no callback do spider para a resposta, segundos
+
+Cada histograma é identificado por (métrica, endpoint, departamento). O
+endpoint vem da URL (:func:`endpoint`) e o departamento do ``meta`` da
+requisição (:func:`departamento`). Observar custa uma bisseção e algumas
+somas, o que permite deixar a coleta ligada em produção.
+
+Ao fechar o spider, :meth:`MetricasCrawl.exportar` grava em
+``SIGAA_METRICAS_DIR`` (padrão ``temp/metricas``, relativo ao diretório
+de trabalho):
+
+    <spider>.json   histogramas, percentis estimados e totais por endpoint
+    <spider>.prom   formato texto do Prometheus (textfile collector)
+"""
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Limites superiores dos baldes (o último balde é +Inf)
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LIMITES_BYTES = tuple(256 * 4 ** i for i in range(9))  # 256 B .. 16 MB
+
+METRICAS = {
+    'download': ('sigaa_download_segundos', 'Latência de download da resposta', LIMITES_SEGUNDOS),
+    'bytes': ('sigaa_resposta_bytes', 'Tamanho do corpo da resposta', LIMITES_BYTES),
+    'callback': ('sigaa_callback_segundos', 'Tempo do callback do spider', LIMITES_SEGUNDOS),
+}
+
+# Trechos do caminho -> endpoint, na ordem de verificação
+ENDPOINTS = (
+    ('/turmas/listar.jsf', 'listar.jsf'),
+    ('/docente/busca_docentes.jsf', 'busca_docentes.jsf'),
+    ('/docente/portal.jsf', 'portal_docente'),
+    ('/curso/lista.jsf', 'curso/lista.jsf'),
+)
+
+
+def endpoint(url):
+    """Classe de endpoint de uma URL do SIGAA (último trecho do caminho se desconhecida)"""
+    caminho = urlsplit(url).path
+    for trecho, nome in ENDPOINTS:
+        if trecho in caminho:
+            return nome
+    return caminho.rsplit('/', 1)[-1] or '/'
+
+
+def departamento(meta):
+    """Id do departamento de uma requisição, pelo meta dos spiders ('' se não houver)"""
+    id_departamento = meta.get('id_departamento')
+    if id_departamento:
+        return str(id_departamento)
+    dept = meta.get('departamento')
+    if isinstance(dept, dict) and dept.get('id'):
+        return str(dept['id'])
+    docente = meta.get('docente')
+    if docente is not None and docente.get('codigo_departamento'):
+        return str(docente.get('codigo_departamento'))
+    return ''
+
+
+class Histograma:
+    """Contagens por balde de limites fixos, com soma, mínimo e máximo"""
+
+    __slots__ = ('limites', 'contagens', 'soma', 'total', 'minimo', 'maximo')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+
+    def somar(self, outro):
+        for i, contagem in enumerate(outro.contagens):
+            self.contagens[i] += contagem
+        self.soma += outro.soma
+        self.total += outro.total
+        for valor in (outro.minimo, outro.maximo):
+            if valor is not None:
+                self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+                self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def percentil(self, p):
+        """Estimativa do percentil p (0-100) por interpolação dentro do balde"""
+        if not self.total:
+            return None
+        alvo = self.total * p / 100
+        acumulado = 0
+        for i, contagem in enumerate(self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = self.limites[i - 1] if i else self.minimo
+                superior = self.limites[i] if i < len(self.limites) else self.maximo
+                inferior = max(inferior, self.minimo)
+                superior = min(superior, self.maximo)
+                return inferior + (superior - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.maximo
+
+    def para_dict(self):
+        return {
+            'total': self.total,
+            'soma': self.soma,
+            'min': self.minimo,
+            'max': self.maximo,
+            'p50': self.percentil(50),
+            'p90': self.percentil(90),
+            'p99': self.percentil(99),
+            'baldes': dict(zip([*map(str, self.limites), '+Inf'], self.contagens)),
+        }
+
+
+class MetricasCrawl:
+    """Histogramas e contadores de um crawl, por (endpoint, departamento)"""
+
+    def __init__(self, pasta='temp/metricas'):
+        self.pasta = Path(pasta)
+        self.histogramas = {}  # (metrica, endpoint, departamento) -> Histograma
+        self.status = {}  # (endpoint, status) -> respostas
+        self.cache = {}  # endpoint -> respostas servidas do cache
+        self.excecoes = {}  # endpoint -> exceções no callback
+        self.inicio = time.time()
+
+    def observar(self, metrica, endpoint, departamento, valor):
+        chave = (metrica, endpoint, departamento)
+        histograma = self.histogramas.get(chave)
+        if histograma is None:
+            histograma = self.histogramas[chave] = Histograma(METRICAS[metrica][2])
+        histograma.observar(valor)
+
+    def contar_status(self, endpoint, status):
+        chave = (endpoint, status)
+        self.status[chave] = self.status.get(chave, 0) + 1
+
+    def contar_cache(self, endpoint):
+        self.cache[endpoint] = self.cache.get(endpoint, 0) + 1
+
+    def contar_excecao(self, endpoint):
+        self.excecoes[endpoint] = self.excecoes.get(endpoint, 0) + 1
+
+    def por_endpoint(self):
+        """Histogramas somados sobre os departamentos: {metrica: {endpoint: Histograma}}"""
+        resumo = {}
+        for (metrica, nome, _), histograma in self.histogramas.items():
+            por_metrica = resumo.setdefault(metrica, {})
+            if nome not in por_metrica:
+                por_metrica[nome] = Histograma(histograma.limites)
+            por_metrica[nome].somar(histograma)
+        return resumo
+
+    def para_dict(self, spider):
+        departamentos = {}
+        for (metrica, nome, dept), histograma in sorted(self.histogramas.items()):
+            departamentos.setdefault(metrica, {}).setdefault(nome, {})[dept] = histograma.para_dict()
+        return {
+            'spider': spider,
+            'inicio': self.inicio,
+            'fim': time.time(),
+            'endpoints': {
+                metrica: {nome: histograma.para_dict() for nome, histograma in sorted(por.items())}
+                for metrica, por in self.por_endpoint().items()
+            },
+            'departamentos': departamentos,
+            'status': [{'endpoint': nome, 'status': status, 'total': total}
+                       for (nome, status), total in sorted(self.status.items())],
+            'cache': dict(sorted(self.cache.items())),
+            'excecoes': dict(sorted(self.excecoes.items())),
+        }
+
+    def para_prometheus(self, spider):
+        linhas = []
+        for metrica, (nome, ajuda, limites) in METRICAS.items():
+            linhas.append(f'# HELP {nome} {ajuda}')
+            linhas.append(f'# TYPE {nome} histogram')
+            for (chave, endp, dept), histograma in sorted(self.histogramas.items()):
+                if chave != metrica:
+                    continue
+                rotulos = _rotulos(spider=spider, endpoint=endp, departamento=dept)
+                acumulado = 0
+                for limite, contagem in zip([*map(repr, limites), '+Inf'], histograma.contagens):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+                linhas.append(f'{nome}_sum{{{rotulos}}} {histograma.soma!r}')
+                linhas.append(f'{nome}_count{{{rotulos}}} {histograma.total}')
+
+        linhas.append('# HELP sigaa_respostas_total Respostas por endpoint e status')
+        linhas.append('# TYPE sigaa_respostas_total counter')
+        for (endp, status), total in sorted(self.status.items()):
+            linhas.append(f'sigaa_respostas_total{{{_rotulos(spider=spider, endpoint=endp, status=status)}}} {total}')
+        linhas.append('# HELP sigaa_respostas_cache_total Respostas servidas do cache')
+        linhas.append('# TYPE sigaa_respostas_cache_total counter')
+        for endp, total in sorted(self.cache.items()):
+            linhas.append(f'sigaa_respostas_cache_total{{{_rotulos(spider=spider, endpoint=endp)}}} {total}')
+        linhas.append('# HELP sigaa_callback_excecoes_total Exceções nos callbacks')
+        linhas.append('# TYPE sigaa_callback_excecoes_total counter')
+        for endp, total in sorted(self.excecoes.items()):
+            linhas.append(f'sigaa_callback_excecoes_total{{{_rotulos(spider=spider, endpoint=endp)}}} {total}')
+        return '\n'.join(linhas) + '\n'
+
+    def exportar(self, spider):
+        """Grava <spider>.json e <spider>.prom; devolve os caminhos"""
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        caminho_json = self.pasta / f'{spider}.json'
+        caminho_prom = self.pasta / f'{spider}.prom'
+        _gravar_atomico(caminho_json, json.dumps(
+            self.para_dict(spider), ensure_ascii=False, indent=2))
+        _gravar_atomico(caminho_prom, self.para_prometheus(spider))
+        return caminho_json, caminho_prom
+
+    def spider_closed(self, spider):
+        caminho_json, caminho_prom = self.exportar(spider.name)
+        resumo = self.por_endpoint()
+        callbacks = resumo.get('callback', {})
+        for nome, histograma in sorted(resumo.get('download', {}).items()):
+            callback = callbacks.get(nome)
+            spider.logger.info(
+                f'⏱️ {nome}: {histograma.total} respostas, download p50 '
+                f'{histograma.percentil(50) * 1000:.0f} ms / p99 '
+                f'{histograma.percentil(99) * 1000:.0f} ms'
+                + (f', callback p50 {callback.percentil(50) * 1000:.1f} ms' if callback else ''))
+        spider.logger.info(f'📈 Métricas em {caminho_json} e {caminho_prom}')
+
+
+def _rotulos(**rotulos):
+    return ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items())
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _gravar_atomico(caminho, texto):
+    # o textfile collector pode ler a qualquer momento: nunca um arquivo pela metade
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    temporario.write_text(texto, encoding='utf-8')
+    os.replace(temporario, caminho)
+
+
+def metricas_do_crawler(crawler):
+    """
+    Registro de métricas compartilhado pelos middlewares de um crawler (None
+    com ``SIGAA_METRICAS_ENABLED`` desligado); exportado no spider_closed
+    """
+    if not crawler.settings.getbool('SIGAA_METRICAS_ENABLED', True):
+        return None
+    metricas = getattr(crawler, 'sigaa_metricas', None)
+    if metricas is None:
+        from scrapy import signals
+
+        metricas = MetricasCrawl(crawler.settings.get('SIGAA_METRICAS_DIR', 'temp/metricas'))
+        crawler.sigaa_metricas = metricas
+        crawler.signals.connect(metricas.spider_closed, signal=signals.spider_closed)
+    return metricas
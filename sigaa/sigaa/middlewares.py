@@ -3,21 +3,52 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+import logging
+import time
+from urllib.parse import urlencode
+
+from scrapy import Request, signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Headers, TextResponse
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from sigaa.cache import (
+    CAMPOS_VOLATEIS_PADRAO,
+    HEADERS_IGNORADOS,
+    CacheRespostas,
+    campos_formulario,
+    chave_requisicao,
+)
+from sigaa.metricas import departamento, endpoint, metricas_do_crawler
+
+logger = logging.getLogger(__name__)
+
+# Trechos das páginas de view/sessão expirada do SIGAA
+PADROES_EXPIRACAO_PADRAO = ['ViewExpiredException', 'sessão expirou', 'sessão foi expirada',
+                            'Sessão Expirada', 'sess&atilde;o expirou']
+
 
 class SigaaSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
+    """
+    Tempo de callback por endpoint e departamento (ver sigaa.metricas)
+
+    Habilitado com ordem alta (perto do spider) para medir só o código do
+    callback: soma, por resposta, o tempo gasto dentro do gerador até cada
+    item/request produzido. Callbacks que devolvem lista já rodaram antes
+    de chegar aqui e não são medidos. Desligado com SIGAA_METRICAS_ENABLED.
+    """
+
+    def __init__(self, metricas=None):
+        self.metricas = metricas
 
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        s = cls(metricas_do_crawler(crawler))
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
@@ -28,20 +59,56 @@ class SigaaSpiderMiddleware:
         # Should return None or raise an exception.
         return None
 
+    def _observar(self, response, gasto):
+        self.metricas.observar(
+            'callback', endpoint(response.url), departamento(response.meta), gasto)
+
     def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
+        if self.metricas is None:
+            yield from result
+            return
+        gasto = 0.0
+        iterador = iter(result)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    saida = next(iterador)
+                except StopIteration:
+                    break
+                finally:
+                    gasto += time.perf_counter() - inicio
+                yield saida
+        finally:
+            self._observar(response, gasto)
 
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
+    async def process_spider_output_async(self, response, result, spider):
+        if self.metricas is None:
+            async for saida in result:
+                yield saida
+            return
+        gasto = 0.0
+        iterador = result.__aiter__()
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    saida = await iterador.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    gasto += time.perf_counter() - inicio
+                yield saida
+        finally:
+            self._observar(response, gasto)
 
     def process_spider_exception(self, response, exception, spider):
         # Called when a spider or process_spider_input() method
         # (from other spider middleware) raises an exception.
 
         # Should return either None or an iterable of Request or item objects.
-        pass
+        if self.metricas is not None:
+            self.metricas.contar_excecao(endpoint(response.url))
 
     async def process_start(self, start):
         # Called with an async iterator over the spider start() method or the
@@ -54,36 +121,147 @@ class SigaaSpiderMiddleware:
 
 
 class SigaaDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """
+    Cache de respostas do SIGAA com chave semântica (ver sigaa.cache)
+
+    Buscas JSF (POST) e páginas públicas (GET) são servidas do cache quando a
+    mesma requisição — URL e campos do formulário, sem o ViewState — já foi
+    respondida dentro do TTL, sem ir à rede. GETs cuja resposta traz um
+    ViewState abrem sessão JSF e nunca são cacheados.
+
+    Uma resposta vinda do cache carrega um ViewState antigo, que a sessão
+    reaproveitaria no próximo POST. Por isso o middleware guarda o último
+    ViewState recebido da rede em cada cookiejar e o recoloca nos POSTs que
+    não forem atendidos pelo cache.
+
+    Settings: SIGAA_CACHE_ENABLED, SIGAA_CACHE_DIR, SIGAA_CACHE_TTL (segundos,
+    0 = sem validade), SIGAA_CACHE_MAX_MB (0 = sem limite),
+    SIGAA_CACHE_CAMPOS_VOLATEIS. ``meta['dont_cache']`` desliga por requisição.
+
+    Também registra, por endpoint e departamento, a latência de download,
+    o tamanho e o status de cada resposta vinda da rede (sinal
+    response_downloaded, que inclui as 5xx refeitas pelo RetryMiddleware) e
+    o tipo das exceções de download que chegam até aqui (sigaa.metricas);
+    respostas do cache só são contadas.
+    """
+
+    def __init__(self, settings, stats=None, metricas=None):
+        self.metricas = metricas
+        self.habilitado = settings.getbool('SIGAA_CACHE_ENABLED')
+        self.stats = stats
+        self.cache = None
+        self.campos_volateis = CAMPOS_VOLATEIS_PADRAO
+        self.viewstates_rede = {}  # cookiejar -> último ViewState vindo da rede
+        self.viewstates_cache = set()  # ViewStates servidos a partir do cache
+
+        if self.habilitado:
+            self.campos_volateis = tuple(settings.getlist(
+                'SIGAA_CACHE_CAMPOS_VOLATEIS', list(CAMPOS_VOLATEIS_PADRAO)))
+            self.cache = CacheRespostas(
+                data_path(settings.get('SIGAA_CACHE_DIR', 'sigaa_cache'), createdir=True),
+                ttl=settings.getint('SIGAA_CACHE_TTL', 0),
+                max_bytes=settings.getint('SIGAA_CACHE_MAX_MB', 0) * 1024 * 1024,
+            )
 
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        s = cls(crawler.settings, crawler.stats, metricas_do_crawler(crawler))
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        if s.metricas is not None:
+            crawler.signals.connect(s.response_downloaded, signal=signals.response_downloaded)
         return s
 
+    def _contar(self, chave):
+        if self.stats:
+            self.stats.inc_value(f'sigaa_cache/{chave}')
+
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
+        if not self.habilitado or request.meta.get('dont_cache'):
+            return None
 
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
-        return None
+        chave = chave_requisicao(request, self.campos_volateis)
+        encontrado = self.cache.buscar(chave)
+        if encontrado is None:
+            self._contar('miss')
+            return self._atualizar_viewstate(request)
+
+        entrada, corpo = encontrado
+        self._contar('hit')
+        if self.metricas is not None:
+            self.metricas.contar_cache(endpoint(request.url))
+        headers = Headers({nome: valores for nome, valores in entrada['headers'].items()})
+        classe = responsetypes.from_args(headers=headers, url=entrada['url'], body=corpo)
+        response = classe(url=entrada['url'], status=entrada['status'], headers=headers,
+                          body=corpo, flags=['cached'], request=request)
+        viewstate = self._viewstate(response)
+        if viewstate:
+            self.viewstates_cache.add(viewstate)
+        return response
+
+    def _atualizar_viewstate(self, request):
+        """Troca um ViewState vindo do cache pelo último ViewState real da sessão"""
+        campos = campos_formulario(request)
+        if not campos or request.meta.get('sigaa_viewstate_atualizado'):
+            return None
+        atual = self.viewstates_rede.get(request.meta.get('cookiejar'))
+        if not atual:
+            return None
+
+        trocou = False
+        novos = []
+        for campo, valor in campos:
+            if campo == 'javax.faces.ViewState' and valor in self.viewstates_cache and valor != atual:
+                valor, trocou = atual, True
+            novos.append((campo, valor))
+        if not trocou:
+            return None
+
+        self._contar('viewstate_atualizado')
+        return request.replace(
+            body=urlencode(novos, encoding=request.encoding),
+            meta={**request.meta, 'sigaa_viewstate_atualizado': True},
+        )
+
+    @staticmethod
+    def _viewstate(response):
+        if not isinstance(response, TextResponse):
+            return None
+        return response.css('input[name="javax.faces.ViewState"]::attr(value)').get()
+
+    def response_downloaded(self, response, request, spider):
+        """Toda resposta da rede, antes do RetryMiddleware descartar as 5xx"""
+        nome = endpoint(response.url)
+        dept = departamento(request.meta)
+        latencia = request.meta.get('download_latency')
+        if latencia is not None:
+            self.metricas.observar('download', nome, dept, latencia)
+        self.metricas.observar('bytes', nome, dept, len(response.body))
+        self.metricas.contar_status(nome, str(response.status))
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+        if not self.habilitado or 'cached' in response.flags:
+            return response
+
+        viewstate = self._viewstate(response)
+        if viewstate:
+            self.viewstates_rede[request.meta.get('cookiejar')] = viewstate
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        if request.meta.get('dont_cache') or response.status != 200:
+            return response
+        # GET com ViewState abre sessão JSF: precisa ser sempre da rede
+        if request.method == 'GET' and viewstate:
+            return response
+
+        headers = {
+            nome.decode('latin-1'): [valor.decode('latin-1') for valor in valores]
+            for nome, valores in response.headers.items()
+            if nome.lower() not in HEADERS_IGNORADOS
+        }
+        self.cache.guardar(chave_requisicao(request, self.campos_volateis),
+                           response.url, response.status, headers, response.body)
+        self._contar('store')
         return response
 
     def process_exception(self, request, exception, spider):
@@ -94,7 +272,131 @@ class SigaaDownloaderMiddleware:
         # - return None: continue processing this exception
         # - return a Response object: stops process_exception() chain
         # - return a Request object: stops process_exception() chain
-        pass
+        if self.metricas is not None:
+            self.metricas.contar_status(endpoint(request.url), type(exception).__name__)
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+        if self.habilitado:
+            spider.logger.info(f"💾 Cache de respostas em {self.cache.pasta}")
+
+    def spider_closed(self, spider):
+        if not self.habilitado:
+            return
+        removidas, liberados = self.cache.podar()
+        if removidas or liberados:
+            spider.logger.info(
+                f"🧹 Cache: {removidas} entradas removidas, {liberados / 1024 / 1024:.1f} MB liberados")
+
+
+class SessaoJsfMiddleware:
+    """
+    Recupera POSTs JSF respondidos com a view expirada
+
+    Quando o ViewState de um POST (busca de turmas, busca de docentes) já não
+    vale no servidor, o SIGAA devolve 200 com a página de sessão expirada ou
+    outra página sem formulário, que o callback trataria como busca sem
+    resultado. O middleware reconhece essas respostas — trecho de
+    ``SIGAA_SESSAO_PADROES_EXPIRACAO`` no corpo ou nenhum ViewState na página —
+    e, no lugar delas:
+
+    1. faz um GET no formulário (``meta['sigaa_url_formulario']``, ou a
+       própria URL do POST) no mesmo cookiejar e slot, para um ViewState novo;
+    2. reenvia só o POST afetado com esse ViewState; a resposta segue para o
+       callback original como se nada tivesse acontecido.
+
+    Depois de ``SIGAA_SESSAO_MAX_RECUPERACOES`` tentativas para a mesma
+    requisição, a requisição é descartada com IgnoreRequest e cai no errback
+    do spider (que devolve a tarefa à fila ou registra a falha), sem chegar
+    ao callback como resultado vazio. Fica na ordem 580: depois do
+    HttpCompressionMiddleware (590), que descomprime o corpo (com gzip o
+    ViewState e as mensagens não aparecem no corpo bruto), e antes do cache
+    (543), para que páginas expiradas nunca sejam cacheadas.
+
+    Stats: sigaa_sessao/expiradas, sigaa_sessao/recuperadas,
+    sigaa_sessao/desistencias.
+    """
+
+    def __init__(self, settings, stats=None):
+        self.stats = stats
+        self.max_recuperacoes = settings.getint('SIGAA_SESSAO_MAX_RECUPERACOES', 2)
+        self.padroes = [
+            codificado
+            for padrao in settings.getlist('SIGAA_SESSAO_PADROES_EXPIRACAO', PADROES_EXPIRACAO_PADRAO)
+            for codificado in {padrao.encode('utf-8'), padrao.encode('latin-1', 'ignore')}]
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('SIGAA_SESSAO_ENABLED', True):
+            raise NotConfigured
+        return cls(crawler.settings, crawler.stats)
+
+    def _contar(self, chave):
+        if self.stats:
+            self.stats.inc_value(f'sigaa_sessao/{chave}')
+
+    @staticmethod
+    def _viewstate(response):
+        if not isinstance(response, TextResponse):
+            return None
+        return response.css('input[name="javax.faces.ViewState"]::attr(value)').get()
+
+    def _expirada(self, response):
+        if response.status != 200 or not isinstance(response, TextResponse):
+            return False
+        corpo = response.body
+        if any(padrao in corpo for padrao in self.padroes):
+            return True
+        # páginas de resultado JSF sempre trazem o formulário de volta
+        return b'javax.faces.ViewState' not in corpo
+
+    def process_response(self, request, response, spider):
+        original = request.meta.get('sigaa_sessao_post')
+        if original is not None:
+            return self._reenviar(original, response)
+
+        campos = campos_formulario(request)
+        if not any(campo == 'javax.faces.ViewState' for campo, _ in campos):
+            return response
+
+        recuperacoes = request.meta.get('sigaa_sessao_recuperacoes', 0)
+        if not self._expirada(response):
+            if recuperacoes:
+                self._contar('recuperadas')
+            return response
+
+        self._contar('expiradas')
+        if recuperacoes >= self.max_recuperacoes:
+            self._contar('desistencias')
+            raise IgnoreRequest(
+                f'View JSF expirada após {recuperacoes} recuperações: {request.url}')
+
+        logger.info('🔑 View expirada em %(url)s, buscando ViewState novo (%(n)d/%(max)d)',
+                    {'url': request.url, 'n': recuperacoes + 1, 'max': self.max_recuperacoes},
+                    extra={'spider': spider})
+        # o meta completo vai junto para que o errback do spider reconheça a tarefa
+        return Request(
+            url=request.meta.get('sigaa_url_formulario', request.url),
+            callback=request.callback,
+            errback=request.errback,
+            meta={**request.meta, 'sigaa_sessao_post': request},
+            priority=request.priority + 1,
+            dont_filter=True,
+        )
+
+    def _reenviar(self, original, response):
+        """Reenvia o POST original com o ViewState da página do formulário"""
+        viewstate = self._viewstate(response)
+        if not viewstate:
+            self._contar('desistencias')
+            raise IgnoreRequest(f'Formulário sem ViewState ao recuperar {original.url}')
+
+        campos = [(campo, viewstate if campo == 'javax.faces.ViewState' else valor)
+                  for campo, valor in campos_formulario(original)]
+        return original.replace(
+            body=urlencode(campos, encoding=original.encoding),
+            meta={**original.meta,
+                  'sigaa_sessao_recuperacoes': original.meta.get('sigaa_sessao_recuperacoes', 0) + 1},
+            priority=original.priority + 1,
+            dont_filter=True,
+        )
@@ -2,12 +2,612 @@
 #
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
+"""
+Saída dos itens em lotes, serializada numa thread à parte
 
+Com ``SIGAA_SAIDA`` definido, o SigaaPipeline junta os itens em memória (um
+buffer por tipo de item) e entrega lotes a uma thread escritora, que faz a
+serialização e as escritas grandes fora do reactor. Um lote é entregue ao
+atingir ``SIGAA_SAIDA_LOTE`` itens ou a cada ``SIGAA_SAIDA_INTERVALO``
+segundos, o que vier primeiro. O formato vem da extensão do caminho:
+
+    .jsonl / .jl   uma linha JSON por item (acrescenta, como ``-o``)
+    .csv           separador ';' como em analise/transformar.py; valores
+                   aninhados em JSON
+    .parquet       colunar, via pyarrow; tipos inferidos do primeiro lote
+
+No CSV e no Parquet as colunas são os campos do modelo (sigaa/items.py) e as
+demais chaves do primeiro lote. Chaves que só aparecem depois vão para um
+transbordo (``<saída>.transbordo.jsonl``) e entram como colunas à direita no
+fechamento, quando o arquivo é regravado, como em analise/transformar.py.
+Um erro de escrita (ex.: tipo incompatível com o esquema do Parquet) encerra
+o crawl, e cada lote descartado depois dele é registrado no log.
+
+``SIGAA_SAIDA_FSYNC`` controla a durabilidade: 'lote' (fsync a cada lote),
+'fechamento' (só ao fim do crawl) ou 'nunca'.
+
+Sem ``SIGAA_SAIDA`` o pipeline só repassa os itens (``-o`` continua valendo).
+
+Os modelos de sigaa/items.py vão para o buffer como estão (sem cópia em
+dict) e são serializados pelo ``para_jsonl``/``valores_csv`` compilados.
+
+Antes dele, o DeduplicacaoPipeline descarta itens cuja chave já está no
+conjunto de vistos do spider (sigaa/vistos.py) e reserva as chaves novas,
+que só são gravadas no conjunto depois que o item está na saída: com
+``SIGAA_SAIDA``, quando a thread escritora conclui o lote (sinal
+``saida_gravada``); com ``-o``, a cada ``SIGAA_SAIDA_INTERVALO`` segundos,
+depois de um fsync dos arquivos do feed.
+"""
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from itertools import chain
+from pathlib import Path
 
-# useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy import signals
+from scrapy.exceptions import DropItem
+from scrapy.extensions.feedexport import FeedExporter
+from sigaa import adaptador  # noqa: F401  (modelos como itens no ItemAdapter)
+from sigaa.items import ModeloSigaa
+from twisted.internet import task
+from twisted.internet.threads import deferToThread
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # instalação sem pyarrow: só a saída .parquet fica indisponível
+    pyarrow = None
+
+POLITICAS_FSYNC = ('lote', 'fechamento', 'nunca')
+
+# Enviado (no reactor) quando um lote do SigaaPipeline chega ao arquivo de
+# saída; argumentos: itens, spider
+saida_gravada = object()
+
+
+def _valor_plano(valor):
+    """Valores aninhados (listas, dicts) viram JSON numa célula"""
+    if isinstance(valor, (dict, list, tuple)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def _colunas(registros):
+    """Campos do modelo (mesmo os ausentes no lote) e as demais chaves do lote, na ordem"""
+    modelo = type(registros[0])
+    campos = modelo.campos if issubclass(modelo, ModeloSigaa) else ()
+    return list(dict.fromkeys(chain(
+        campos, (campo for registro in registros for campo in ItemAdapter(registro)))))
+
+
+class Transbordo:
+    """
+    Valores de colunas fora do cabeçalho/esquema de uma saída, guardados à
+    parte (índice da linha + valores) até o escritor fechar e regravar o
+    arquivo com elas
+
+    Args:
+        caminho: arquivo de saída; o transbordo fica em ``<caminho>.transbordo.jsonl``
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(f'{caminho}.transbordo.jsonl')
+        self.arquivo = None
+        self.novas = {}  # colunas tardias, na ordem em que apareceram
+
+    def separar(self, indice, linha, conhecidas):
+        """Tira da linha (dict) as chaves fora de ``conhecidas``; devolve as colunas novas"""
+        tardios = {campo: linha.pop(campo) for campo in [c for c in linha if c not in conhecidas]}
+        if not tardios:
+            return []
+        if self.arquivo is None:
+            self.arquivo = open(self.caminho, 'w', encoding='utf-8')
+        self.arquivo.write(json.dumps([indice, tardios], ensure_ascii=False, default=str) + '\n')
+        novas = [campo for campo in tardios if campo not in self.novas]
+        self.novas.update(dict.fromkeys(novas))
+        return novas
+
+    def descarregar(self):
+        if self.arquivo is not None:
+            self.arquivo.flush()
+
+    def ler(self):
+        """Itera [índice, valores] na ordem das linhas"""
+        self.arquivo.close()
+        with open(self.caminho, encoding='utf-8') as f:
+            for linha in f:
+                yield json.loads(linha)
+
+    def remover(self):
+        if self.arquivo is not None:
+            self.arquivo.close()
+            self.caminho.unlink(missing_ok=True)
+
+
+class EscritorJsonl:
+    # cada lote fica legível no arquivo assim que é descarregado
+    confirma_por_lote = True
+
+    def __init__(self, caminho):
+        self.arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def escrever(self, registros):
+        """Grava um lote; devolve as colunas que o lote acrescentou à saída"""
+        linhas = [registro.para_jsonl() if isinstance(registro, ModeloSigaa)
+                  else json.dumps(registro, ensure_ascii=False) + '\n'
+                  for registro in registros]
+        self.arquivo.write(''.join(linhas))
+        return []
+
+    def descarregar(self):
+        self.arquivo.flush()
+
+    def sincronizar(self):
+        self.arquivo.flush()
+        os.fsync(self.arquivo.fileno())
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+class EscritorCsv(EscritorJsonl):
+    """
+    CSV com as colunas do cabeçalho existente ou, num arquivo novo, as do
+    primeiro lote; chaves fora do cabeçalho passam pelo transbordo
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self.colunas = None
+        self.linha = 0  # índice da próxima linha de dados
+        if self.caminho.exists() and self.caminho.stat().st_size > 0:
+            with open(self.caminho, newline='', encoding='utf-8') as f:
+                leitor = csv.reader(f, delimiter=';')
+                colunas = next(leitor, None)
+                self.linha = sum(1 for _ in leitor)
+            if colunas:
+                self.colunas = colunas
+        self.arquivo = open(self.caminho, 'a', newline='', encoding='utf-8')
+        self.linhas = csv.writer(self.arquivo, delimiter=';')
+        self.transbordo = Transbordo(self.caminho)
+
+    def escrever(self, registros):
+        if self.colunas is None:
+            self.colunas = _colunas(registros)
+            self.linhas.writerow(self.colunas)
+        # Lotes são de um tipo só: modelos de campos fixos com as mesmas
+        # colunas do cabeçalho saem direto como tuplas
+        modelo = type(registros[0])
+        if (issubclass(modelo, ModeloSigaa) and not modelo.aceita_extras
+                and tuple(self.colunas) == modelo.campos):
+            self.linhas.writerows(registro.valores_csv() for registro in registros)
+            self.linha += len(registros)
+            return []
+        conhecidas = set(self.colunas)
+        novas = []
+        for registro in registros:
+            linha = {campo: _valor_plano(valor) for campo, valor in ItemAdapter(registro).items()}
+            novas.extend(self.transbordo.separar(self.linha, linha, conhecidas))
+            self.linhas.writerow([linha.get(coluna, '') for coluna in self.colunas])
+            self.linha += 1
+        return novas
+
+    def descarregar(self):
+        super().descarregar()
+        self.transbordo.descarregar()
+
+    def fechar(self):
+        self.arquivo.close()
+        if self.transbordo.novas:
+            self._acrescentar_colunas()
+        self.transbordo.remover()
+
+    def _acrescentar_colunas(self):
+        """Regrava o CSV com as colunas do transbordo à direita (em streaming)"""
+        novas = list(self.transbordo.novas)
+        vazio = [''] * len(novas)
+        temporario = self.caminho.with_name(self.caminho.name + '.tmp')
+        tardios = self.transbordo.ler()
+        proximo = next(tardios, None)
+        with open(self.caminho, newline='', encoding='utf-8') as entrada, \
+                open(temporario, 'w', newline='', encoding='utf-8') as saida:
+            leitor = csv.reader(entrada, delimiter=';')
+            escritor = csv.writer(saida, delimiter=';')
+            escritor.writerow(next(leitor) + novas)
+            for indice, linha in enumerate(leitor):
+                if proximo is not None and proximo[0] == indice:
+                    escritor.writerow(linha + [proximo[1].get(coluna, '') for coluna in novas])
+                    proximo = next(tardios, None)
+                    continue
+                escritor.writerow(linha + vazio)
+        os.replace(temporario, self.caminho)
+
+
+def _sem_nulos(esquema):
+    """Colunas só com None na amostra ficam como texto"""
+    return pyarrow.schema(
+        campo.with_type(pyarrow.string()) if pyarrow.types.is_null(campo.type) else campo
+        for campo in esquema)
+
+
+class EscritorParquet:
+    """
+    Parquet com as colunas do primeiro lote e os tipos inferidos dele (um row
+    group por lote); chaves fora do esquema passam pelo transbordo
+    """
+
+    # sem o rodapé, gravado no fechamento, nenhum lote é legível
+    confirma_por_lote = False
+
+    def __init__(self, caminho):
+        if pyarrow is None:
+            raise ValueError('Saída .parquet requer o pacote pyarrow')
+        self.caminho = Path(caminho)
+        self.esquema = None
+        self.escritor = None
+        self.linha = 0
+        self.transbordo = Transbordo(self.caminho)
+
+    def escrever(self, registros):
+        linhas = [{campo: _valor_plano(valor) for campo, valor in ItemAdapter(registro).items()}
+                  for registro in registros]
+        if self.esquema is None:
+            amostra = pyarrow.Table.from_pydict(
+                {coluna: [linha.get(coluna) for linha in linhas] for coluna in _colunas(registros)})
+            self.esquema = _sem_nulos(amostra.schema)
+            self.escritor = pyarrow.parquet.ParquetWriter(self.caminho, self.esquema)
+        conhecidas = set(self.esquema.names)
+        novas = []
+        for linha in linhas:
+            novas.extend(self.transbordo.separar(self.linha, linha, conhecidas))
+            self.linha += 1
+        self.escritor.write_table(pyarrow.Table.from_pylist(linhas, schema=self.esquema))
+        return novas
+
+    def sincronizar(self):
+        pass  # o rodapé do Parquet só é gravado no fechamento
+
+    def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            if self.transbordo.novas:
+                self._acrescentar_colunas()
+        self.transbordo.remover()
+
+    def _acrescentar_colunas(self):
+        """Regrava o Parquet, um row group por vez, com as colunas do transbordo"""
+        novas = list(self.transbordo.novas)
+        posicoes, tardios = {}, []
+        for indice, valores in self.transbordo.ler():
+            posicoes[indice] = len(tardios)
+            tardios.append(valores)
+        extras = pyarrow.Table.from_pydict(
+            {coluna: [valores.get(coluna) for valores in tardios] for coluna in novas})
+        extras = extras.cast(_sem_nulos(extras.schema))
+        esquema = pyarrow.schema(list(self.esquema) + list(extras.schema))
+        temporario = self.caminho.with_name(self.caminho.name + '.tmp')
+        inicio = 0
+        with pyarrow.parquet.ParquetFile(self.caminho) as arquivo, \
+                pyarrow.parquet.ParquetWriter(temporario, esquema) as escritor:
+            for grupo in range(arquivo.num_row_groups):
+                tabela = arquivo.read_row_group(grupo)
+                linhas = pyarrow.array(
+                    [posicoes.get(indice) for indice in range(inicio, inicio + tabela.num_rows)],
+                    type=pyarrow.int64())
+                escritor.write_table(pyarrow.Table.from_arrays(
+                    tabela.columns + extras.take(linhas).columns, schema=esquema))
+                inicio += tabela.num_rows
+        os.replace(temporario, self.caminho)
+
+
+ESCRITORES = {
+    '.jsonl': EscritorJsonl,
+    '.jl': EscritorJsonl,
+    '.csv': EscritorCsv,
+    '.parquet': EscritorParquet,
+}
+
+
+class DeduplicacaoPipeline:
+    """
+    Descarta itens já vistos e registra os novos no conjunto do spider
+
+    Ativo para spiders com os atributos ``vistos`` (ConjuntoVistos) e
+    ``chave_item`` (item -> chave, ou None para não deduplicar o item). É o
+    mesmo conjunto que o spider consulta para retomar a coleta, então a
+    chave do item só é reservada aqui e vai para o log do conjunto quando o
+    item já está na saída:
+
+        SIGAA_SAIDA   quando o SigaaPipeline conclui o lote (sinal
+                      ``saida_gravada``)
+        -o            a cada ``intervalo`` segundos e no fechamento, depois
+                      de descarregar (e fsync) os arquivos do FeedExporter
+
+    Uma queda antes disso perde só a reserva, e a retomada busca o item de
+    novo.
+    """
+
+    def __init__(self, stats=None, intervalo=2.0, saida_em_lotes=False):
+        self.stats = stats
+        self.intervalo = intervalo
+        self.saida_em_lotes = saida_em_lotes
+        self.feeds = []  # FeedExporter do crawler, descarregado antes de confirmar
+        self.exportados = []  # chaves de itens já entregues ao feed
+        self.relogio = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(
+            stats=crawler.stats,
+            intervalo=crawler.settings.getfloat('SIGAA_SAIDA_INTERVALO', 2.0),
+            saida_em_lotes=bool(crawler.settings.get('SIGAA_SAIDA')),
+        )
+        pipeline.feeds = [extensao for extensao in crawler.extensions.middlewares
+                          if isinstance(extensao, FeedExporter)]
+        if pipeline.saida_em_lotes:
+            crawler.signals.connect(pipeline.confirmar_lote, signal=saida_gravada)
+        else:
+            # conectado depois do FeedExporter: o item já foi exportado
+            crawler.signals.connect(pipeline.item_scraped, signal=signals.item_scraped)
+        return pipeline
+
+    def open_spider(self, spider):
+        self.spider = spider
+        if (getattr(spider, 'vistos', None) is not None and not self.saida_em_lotes
+                and self.intervalo > 0):
+            self.relogio = task.LoopingCall(self.confirmar_exportados)
+            self.relogio.start(self.intervalo, now=False)
+
+    def process_item(self, item, spider):
+        vistos = getattr(spider, 'vistos', None)
+        if vistos is None:
+            return item
+        chave = spider.chave_item(item)
+        if chave is None:
+            return item
+        if not vistos.reservar(chave):
+            if self.stats:
+                self.stats.inc_value('sigaa_vistos/descartados')
+            raise DropItem(f'Item já visto: {chave}')
+        if self.stats:
+            self.stats.inc_value('sigaa_vistos/novos')
+        return item
+
+    def confirmar_lote(self, itens, spider):
+        """Lote gravado pelo SigaaPipeline: as chaves dos itens vão para o conjunto"""
+        if getattr(spider, 'vistos', None) is None:
+            return
+        for item in itens:
+            chave = spider.chave_item(item)
+            if chave is not None:
+                spider.vistos.confirmar(chave)
+
+    def item_scraped(self, item, spider):
+        if getattr(spider, 'vistos', None) is None:
+            return
+        chave = spider.chave_item(item)
+        if chave is not None:
+            self.exportados.append(chave)
+
+    def _sincronizar_feeds(self):
+        for feed in self.feeds:
+            for slot in feed.slots:
+                if slot.file is None:
+                    continue
+                slot.file.flush()
+                try:
+                    os.fsync(slot.file.fileno())
+                except (AttributeError, OSError, ValueError):
+                    pass  # feed remoto/pós-processado: só o flush
+
+    def confirmar_exportados(self):
+        """Descarrega os arquivos do feed e confirma as chaves já exportadas"""
+        if not self.exportados:
+            return
+        self._sincronizar_feeds()
+        exportados, self.exportados = self.exportados, []
+        for chave in exportados:
+            self.spider.vistos.confirmar(chave)
+
+    def close_spider(self, spider):
+        if self.relogio is not None and self.relogio.running:
+            self.relogio.stop()
+        if getattr(spider, 'vistos', None) is not None:
+            self.confirmar_exportados()
 
 
 class SigaaPipeline:
+    """
+    Pipeline de saída em lotes com escritor em background
+
+    Settings:
+        SIGAA_SAIDA: caminho de saída; aceita %(spider)s e %(tipo)s (nome da
+            classe do item, ou 'item' para dicts). Vazio: só repassa os itens
+        SIGAA_SAIDA_LOTE: itens por lote (padrão: 500)
+        SIGAA_SAIDA_INTERVALO: segundos máximos de um item no buffer (padrão: 2)
+        SIGAA_SAIDA_FSYNC: 'lote', 'fechamento' ou 'nunca' (padrão: 'fechamento')
+
+    Cada lote gravado (descarregado no arquivo, ou com fsync se
+    SIGAA_SAIDA_FSYNC='lote'; no Parquet, só no fechamento) é anunciado com
+    o sinal ``saida_gravada``.
+    """
+
+    def __init__(self, saida=None, lote=500, intervalo=2.0, fsync='fechamento', stats=None,
+                 signals=None):
+        if fsync not in POLITICAS_FSYNC:
+            raise ValueError(f'SIGAA_SAIDA_FSYNC inválido: {fsync!r} (use {POLITICAS_FSYNC})')
+        if saida and Path(saida).suffix not in ESCRITORES:
+            raise ValueError(f'Formato de saída não suportado: {saida}')
+        if saida and Path(saida).suffix == '.parquet' and pyarrow is None:
+            raise ValueError('Saída .parquet requer o pacote pyarrow')
+        self.saida = saida
+        self.lote = max(1, lote)
+        self.intervalo = intervalo
+        self.fsync = fsync
+        self.stats = stats
+        self.signals = signals
+        self.buffers = {}  # tipo -> itens ainda não entregues
+        self.fila = queue.Queue()
+        self.thread = None
+        self.relogio = None
+        self.erro = None
+        self.perdidos = 0  # itens de lotes descartados depois de um erro
+        self.crawler = None  # encerrado se a escrita falhar
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        pipeline = cls(
+            saida=settings.get('SIGAA_SAIDA'),
+            lote=settings.getint('SIGAA_SAIDA_LOTE', 500),
+            intervalo=settings.getfloat('SIGAA_SAIDA_INTERVALO', 2.0),
+            fsync=settings.get('SIGAA_SAIDA_FSYNC', 'fechamento'),
+            stats=crawler.stats,
+            signals=crawler.signals,
+        )
+        pipeline.crawler = crawler
+        return pipeline
+
+    def open_spider(self, spider):
+        if not self.saida:
+            return
+        self.spider = spider
+        self.thread = threading.Thread(
+            target=self._escrever, name=f'saida-{spider.name}', daemon=True)
+        self.thread.start()
+        if self.intervalo > 0:
+            self.relogio = task.LoopingCall(self.descarregar)
+            self.relogio.start(self.intervalo, now=False)
+        spider.logger.info(
+            f'💾 Saída em lotes de {self.lote}: {self.saida} (fsync: {self.fsync})')
+
     def process_item(self, item, spider):
+        if self.thread is None:
+            return item
+        tipo = 'item' if isinstance(item, dict) else type(item).__name__.lower()
+        buffer = self.buffers.setdefault(tipo, [])
+        buffer.append(item if isinstance(item, ModeloSigaa) else ItemAdapter(item).asdict())
+        if len(buffer) >= self.lote:
+            self._entregar(tipo)
         return item
+
+    def descarregar(self):
+        """Entrega à thread escritora tudo o que está nos buffers"""
+        for tipo in list(self.buffers):
+            if self.buffers[tipo]:
+                self._entregar(tipo)
+
+    def _entregar(self, tipo):
+        registros = self.buffers[tipo]
+        self.buffers[tipo] = []
+        self.fila.put((tipo, registros))
+        if self.stats:
+            self.stats.inc_value('sigaa_saida/lotes')
+            self.stats.inc_value('sigaa_saida/itens', len(registros))
+
+    def close_spider(self, spider):
+        if self.thread is None:
+            return None
+        if self.relogio is not None and self.relogio.running:
+            self.relogio.stop()
+        self.descarregar()
+        self.fila.put(None)
+
+        def concluir(_):
+            if self.erro is not None:
+                if self.stats:
+                    self.stats.set_value('sigaa_saida/itens_perdidos', self.perdidos)
+                spider.logger.error(
+                    f'❌ Erro na escrita de {self.saida}: {self.erro!r} '
+                    f'({self.perdidos} itens não gravados)')
+            else:
+                spider.logger.info(f'💾 Saída concluída: {self.saida}')
+
+        # Espera a thread esvaziar a fila sem bloquear o reactor
+        d = deferToThread(self.thread.join)
+        d.addCallback(concluir)
+        return d
+
+    # --- thread escritora ----------------------------------------------
+
+    def _caminho(self, tipo):
+        return Path(self.saida % {'spider': self.spider.name, 'tipo': tipo})
+
+    def _gravado(self, registros):
+        """Anuncia no reactor um lote que já está no arquivo de saída"""
+        if self.signals is not None:
+            from twisted.internet import reactor
+            reactor.callFromThread(self.signals.send_catch_log, signal=saida_gravada,
+                                   itens=registros, spider=self.spider)
+
+    def _descartar(self, registros):
+        """Lote que não chega à saída por causa de um erro anterior ou dele mesmo"""
+        self.perdidos += len(registros)
+        self.spider.logger.error(
+            f'❌ {len(registros)} itens não gravados em {self.saida}: {self.erro!r}')
+
+    def _encerrar(self):
+        """Pede ao reactor o fim do crawl: sem saída, coletar mais não adianta"""
+        if self.crawler is not None:
+            from twisted.internet import reactor
+            reactor.callFromThread(self._fechar_spider)
+
+    def _fechar_spider(self):
+        try:
+            self.crawler.engine.close_spider(self.spider, 'erro_saida')
+        except RuntimeError:
+            pass  # o engine já encerrou
+
+    def _escrever(self):
+        escritores = {}  # caminho -> escritor
+        aguardando = {}  # caminho -> lotes só legíveis depois do fechamento
+        while True:
+            lote = self.fila.get()
+            if lote is None:
+                break
+            tipo, registros = lote
+            if self.erro is not None:
+                self._descartar(registros)  # drena a fila até o fechamento
+                continue
+            try:
+                caminho = self._caminho(tipo)
+                escritor = escritores.get(caminho)
+                if escritor is None:
+                    caminho.parent.mkdir(parents=True, exist_ok=True)
+                    escritor = escritores[caminho] = ESCRITORES[caminho.suffix](caminho)
+                inicio = time.perf_counter()
+                novas = escritor.escrever(registros)
+                if novas:
+                    self.spider.logger.warning(
+                        f'↪️ {caminho}: {len(novas)} coluna(s) nova(s), '
+                        f'acrescentada(s) no fechamento: {", ".join(novas)}')
+                if self.fsync == 'lote':
+                    escritor.sincronizar()
+                if escritor.confirma_por_lote:
+                    if self.fsync != 'lote':
+                        escritor.descarregar()
+                    self._gravado(registros)
+                else:
+                    aguardando.setdefault(caminho, []).extend(registros)
+                self.spider.logger.debug(
+                    f'💾 {len(registros)} itens em {caminho} '
+                    f'({time.perf_counter() - inicio:.3f}s)')
+            except Exception as e:
+                self.erro = e
+                self._descartar(registros)
+                self._encerrar()
+
+        for caminho, escritor in escritores.items():
+            try:
+                if self.fsync != 'nunca':
+                    escritor.sincronizar()
+                escritor.fechar()
+            except Exception as e:
+                self.erro = self.erro or e
+                continue
+            if caminho in aguardando:
+                self._gravado(aguardando[caminho])
@@ -0,0 +1,113 @@
+"""
+Planejamento das buscas de ofertas a partir do histórico de resultados
+
+Cruzar anos × semestres × departamentos gera muitas buscas que nunca trazem
+turmas: períodos de verão/inverno (semestres 3 e 4) e departamentos sem
+oferta. :class:`PlanejadorOfertas` guarda, por departamento e semestre, quantas
+buscas seguidas vieram vazias e quando foi a última, e classifica cada
+combinação departamento×ano×semestre:
+
+    PROVAVEL     já trouxe turmas: vai para o início da fila
+    DESCONHECIDA sem histórico suficiente: buscada normalmente
+    SONDAGEM     nunca trouxe turmas e veio vazia ``limiar`` vezes seguidas:
+                 buscada por último
+    None         nunca trouxe turmas, já veio vazia neste mesmo ano e foi
+                 sondada há menos de ``intervalo`` (dobrando a cada nova
+                 sondagem vazia, até ``intervalo_max``): pulada
+
+Só se pula o que nunca teve turmas e já foi buscado naquele ano: um
+departamento com histórico de turmas é sempre buscado (o semestre pode ainda
+não ter oferta publicada, ou o departamento ter fechado depois de anos com
+turmas), e um ano nunca buscado é no máximo deixado para o fim da fila (numa
+carga retroativa, o departamento vazio desde 2020 ainda pode ter turmas em
+2019).
+
+O histórico fica num JSON (``data/ofertas/.historico/planejador.json``):
+
+    {"<id_departamento>/<semestre>": {"vazias": 2, "com_turmas": 0,
+                                      "ultima": 1760000000.0,
+                                      "anos": {"2025": 0, "2024": 0}}}
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+PROVAVEL = 0
+DESCONHECIDA = 1
+SONDAGEM = 2
+
+DIA = 24 * 60 * 60
+
+
+class PlanejadorOfertas:
+    """
+    Histórico de buscas vazias/não vazias por departamento e semestre
+
+    Args:
+        arquivo: caminho do histórico
+        limiar: buscas vazias seguidas para uma combinação deixar de ser buscada
+        intervalo: segundos até a primeira sondagem de uma combinação vazia
+        intervalo_max: teto do intervalo entre sondagens, em segundos
+    """
+
+    def __init__(self, arquivo, limiar=2, intervalo=30 * DIA, intervalo_max=365 * DIA):
+        self.arquivo = Path(arquivo)
+        self.limiar = max(1, limiar)
+        self.intervalo = intervalo
+        self.intervalo_max = intervalo_max
+        self.combinacoes = {}
+        self.alterado = False
+        if self.arquivo.exists():
+            try:
+                with open(self.arquivo, encoding='utf-8') as f:
+                    self.combinacoes = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.combinacoes = {}
+
+    @staticmethod
+    def _chave(id_departamento, semestre):
+        return f'{id_departamento}/{semestre}'
+
+    def classificar(self, id_departamento, ano, semestre, agora=None):
+        """PROVAVEL, DESCONHECIDA, SONDAGEM ou None (pular)"""
+        historico = self.combinacoes.get(self._chave(id_departamento, semestre))
+        if historico is None:
+            return DESCONHECIDA
+        if historico['anos'].get(str(ano)):
+            return PROVAVEL
+        if historico['com_turmas']:
+            return PROVAVEL if historico['vazias'] < self.limiar else DESCONHECIDA
+        if historico['vazias'] < self.limiar:
+            return DESCONHECIDA
+        if str(ano) not in historico['anos']:
+            return SONDAGEM
+
+        espera = min(self.intervalo * 2 ** (historico['vazias'] - self.limiar), self.intervalo_max)
+        if (agora or time.time()) - historico['ultima'] >= espera:
+            return SONDAGEM
+        return None
+
+    def registrar(self, id_departamento, ano, semestre, total_turmas, agora=None):
+        """Resultado de uma busca (total de turmas encontradas)"""
+        historico = self.combinacoes.setdefault(
+            self._chave(id_departamento, semestre),
+            {'vazias': 0, 'com_turmas': 0, 'ultima': 0.0, 'anos': {}})
+        if total_turmas:
+            historico['vazias'] = 0
+            historico['com_turmas'] += 1
+        else:
+            historico['vazias'] += 1
+        historico['ultima'] = agora or time.time()
+        historico['anos'][str(ano)] = total_turmas
+        self.alterado = True
+
+    def salvar(self):
+        if not self.alterado:
+            return
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.arquivo.with_name(self.arquivo.name + '.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.combinacoes, f, ensure_ascii=False)
+        os.replace(temporario, self.arquivo)
+        self.alterado = False
@@ -23,6 +23,9 @@ ROBOTSTXT_OBEY = False
 
 # Concurrency and throttling settings
 #CONCURRENT_REQUESTS = 16
+# Valores de cada slot; com SIGAA_THROTTLE_ENABLED o ThrottleSigaa
+# (sigaa/throttle.py) os troca, desde a criação do slot, pelo atraso e pela
+# concorrência da classe de endpoint
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
 DOWNLOAD_DELAY = 1
 
@@ -40,27 +43,35 @@ DOWNLOAD_DELAY = 1
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
-#    "sigaa.middlewares.SigaaSpiderMiddleware": 543,
-#}
+SPIDER_MIDDLEWARES = {
+    # Perto do spider: mede só o tempo dos callbacks
+    "sigaa.middlewares.SigaaSpiderMiddleware": 950,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "sigaa.middlewares.SigaaDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    "sigaa.middlewares.SigaaDownloaderMiddleware": 543,
+    # Logo abaixo do HttpCompressionMiddleware (590): páginas de erro do SIGAA
+    # no corpo descomprimido (sem o ThrottleSigaa ligado, não faz nada)
+    "sigaa.throttle.ThrottleSigaaMiddleware": 585,
+    # Entre o cache (543) e o HttpCompressionMiddleware (590): vê o corpo já
+    # descomprimido e decide antes de a resposta chegar ao cache
+    "sigaa.middlewares.SessaoJsfMiddleware": 580,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    "sigaa.throttle.ThrottleSigaa": 500,
+}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "sigaa.pipelines.SigaaPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "sigaa.pipelines.DeduplicacaoPipeline": 200,
+    "sigaa.pipelines.SigaaPipeline": 300,
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -86,12 +97,77 @@ DOWNLOAD_DELAY = 1
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
 
-# Configurações atuais - PROCESSAMENTO SEQUENCIAL (1 por vez)
-CONCURRENT_REQUESTS_PER_DOMAIN = 1  # Apenas 1 requisição simultânea
-DOWNLOAD_DELAY = 1                   # 1 segundo entre requisições
-
-# Para PROCESSAMENTO PARALELO, você poderia usar:
-# CONCURRENT_REQUESTS_PER_DOMAIN = 5   # 5 requisições simultâneas
-# DOWNLOAD_DELAY = 0.5                 # 0.5 segundos entre requisições
-# 
-# ⚠️ CUIDADO: Muito paralelismo pode sobrecarregar o servidor SIGAA!
+# Número de sessões JSF paralelas do spider de ofertas (cada sessão tem seu
+# cookiejar e seu slot de download, respeitando o DOWNLOAD_DELAY acima).
+# Pode ser sobrescrito por execução com: scrapy crawl ofertas -a sessoes=6
+OFERTAS_SESSOES = 4
+
+# Planejador das buscas de ofertas (sigaa/planejador.py), ligado com
+# -a planejar=1: departamento×semestre que nunca teve turmas e veio vazio
+# OFERTAS_PLANO_LIMIAR vezes seguidas vai para o fim da fila; o mesmo ano já
+# buscado vazio só é sondado de novo após OFERTAS_PLANO_SONDAGEM_DIAS (o
+# intervalo dobra a cada sondagem vazia, até OFERTAS_PLANO_SONDAGEM_MAX_DIAS)
+OFERTAS_PLANO_LIMIAR = 2
+OFERTAS_PLANO_SONDAGEM_DIAS = 30
+OFERTAS_PLANO_SONDAGEM_MAX_DIAS = 365
+
+# Busca de ofertas em lote (sigaa/lote.py, -a lote=1): uma busca com
+# inputDepto em branco por ano/semestre, dividida em buscas por departamento
+# quando estoura o timeout, vem truncada, traz uma das mensagens abaixo ou
+# atinge OFERTAS_LOTE_LIMITE_TURMAS (0 = sem limite conhecido).
+OFERTAS_LOTE_TIMEOUT = 120               # segundos
+OFERTAS_LOTE_LIMITE_TURMAS = 0
+OFERTAS_LOTE_PADROES_DIVISAO = ['Campo obrigatório não informado', 'Refine a busca',
+                                'refine a busca']
+
+# Cache de respostas do SigaaDownloaderMiddleware (sigaa/cache.py): a chave é
+# URL + campos do formulário JSF, ignorando o ViewState, então reexecuções com
+# as mesmas buscas não vão à rede. Para ligar numa execução:
+#   scrapy crawl ofertas -s SIGAA_CACHE_ENABLED=1
+SIGAA_CACHE_ENABLED = False
+SIGAA_CACHE_DIR = "sigaa_cache"          # dentro de .scrapy/
+SIGAA_CACHE_TTL = 24 * 60 * 60           # segundos; 0 = não vence
+SIGAA_CACHE_MAX_MB = 500                 # poda ao fim do crawl; 0 = sem limite
+SIGAA_CACHE_CAMPOS_VOLATEIS = ["javax.faces.ViewState"]
+
+# Saída em lotes do SigaaPipeline (sigaa/pipelines.py): serialização e escrita
+# numa thread à parte, fora do reactor. Vazio = só repassa os itens (-o
+# continua funcionando). Formato pela extensão: .jsonl, .csv ou .parquet.
+#   scrapy runspider sigaa/spiders/docentes.py -s SIGAA_SAIDA=data/docentes/docentes_completo.jsonl
+#   scrapy crawl ofertas -s "SIGAA_SAIDA=data/%(spider)s/%(tipo)s.csv"
+SIGAA_SAIDA = ""
+SIGAA_SAIDA_LOTE = 500                   # itens por lote
+SIGAA_SAIDA_INTERVALO = 2.0              # segundos máximos no buffer
+SIGAA_SAIDA_FSYNC = "fechamento"         # 'lote', 'fechamento' ou 'nunca'
+
+# Conjuntos de chaves vistas (sigaa/vistos.py) usados para retomar coletas e
+# pelo DeduplicacaoPipeline. Bloom: tamanho fixo, com falsos positivos.
+SIGAA_VISTOS_BLOOM = False
+SIGAA_VISTOS_CAPACIDADE = 1_000_000      # só no modo Bloom
+SIGAA_VISTOS_TAXA_ERRO = 0.001           # só no modo Bloom
+
+# Métricas de latência por endpoint e departamento (sigaa/metricas.py):
+# download, bytes e tempo de callback em histogramas, exportados ao fim do
+# crawl em <SIGAA_METRICAS_DIR>/<spider>.json e <spider>.prom (Prometheus).
+SIGAA_METRICAS_ENABLED = True
+SIGAA_METRICAS_DIR = "temp/metricas"     # relativo ao diretório de trabalho
+
+# Throttle adaptativo por classe de endpoint (sigaa/throttle.py): buscas JSF
+# (listar.jsf, busca_docentes.jsf) e páginas públicas (portal de docente,
+# lista de cursos) têm atraso e concorrência próprios, que caem com 5xx,
+# páginas de erro do SIGAA ou falhas e sobem enquanto o servidor responde bem.
+# A concorrência da classe vale para todos os seus slots (inclusive as sessões
+# do spider de ofertas) e o atraso nunca fica abaixo do DOWNLOAD_DELAY.
+# Substitui o AutoThrottle; parâmetros por classe em SIGAA_THROTTLE_CLASSES:
+#   scrapy crawl ofertas -s 'SIGAA_THROTTLE_CLASSES={"listar.jsf": {"atraso_min": 1}}'
+SIGAA_THROTTLE_ENABLED = True
+SIGAA_THROTTLE_CLASSES = {}
+SIGAA_THROTTLE_JANELA = 10               # respostas normais seguidas para +1 de concorrência
+SIGAA_THROTTLE_FATOR_LENTIDAO = 3.0      # latência média / menor latência vista
+SIGAA_THROTTLE_DEBUG = False             # loga cada ajuste
+
+# Recuperação de views JSF expiradas (SessaoJsfMiddleware em
+# sigaa/middlewares.py): um POST respondido com a página de sessão expirada
+# ganha um ViewState novo e é reenviado, sem refazer o crawl.
+SIGAA_SESSAO_ENABLED = True
+SIGAA_SESSAO_MAX_RECUPERACOES = 2        # por requisição; depois vai ao errback
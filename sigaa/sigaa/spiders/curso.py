@@ -3,68 +3,71 @@
 
 import scrapy
 
+from sigaa import adaptador  # noqa: F401  (modelos como itens no ItemAdapter)
+from sigaa.items import Curso
+from sigaa.listagem import ExtratorListagem
+
 
 class CursoSpider(scrapy.Spider):
     name = "curso"
     allowed_domains = ["sigaa.unb.br"]
     start_urls = ["https://sigaa.unb.br/sigaa/public/curso/lista.jsf?nivel=G"]
 
-    def criar_dados_curso(self, tr, sigla_departamento, departamento):
-        """Extrai e organiza os dados de um curso a partir de uma linha da tabela"""
-        nome_curso = tr.css("td:nth-child(1)::text").get()
-        grau_academico = tr.css("td:nth-child(2)::text").get()
-        turno = tr.css("td:nth-child(3)::text").get()
-        sede = tr.css("td:nth-child(4)::text").get()
-        modalidade = tr.css("td:nth-child(5)::text").get()
-        grau_academico_2 = tr.css("td:nth-child(6)::text").get()
-        coordenacao = tr.css("td:nth-child(7)::text").get()
-        link_curso = tr.css("td:nth-child(8) a::attr(href)").get()
+    # Colunas de table.listagem em lista.jsf; as linhas com td.subFormulario
+    # são cabeçalhos de departamento
+    extrator_cursos = ExtratorListagem({
+        'departamento': '.subFormulario',
+        'nome': 1,
+        'grau_academico': 2,
+        'turno': 3,
+        'sede': 4,
+        'modalidade': 5,
+        'grau_academico_2': 6,
+        'coordenacao': 7,
+        'link_detalhes': (8, 'a::attr(href)'),
+    })
 
-        return {
-            'sigla_departamento': sigla_departamento,
-            'departamento': departamento,
-            'nome': nome_curso.strip() if nome_curso else None,
-            'grau_academico': grau_academico.strip() if grau_academico else None,
-            'turno': turno.strip() if turno else None,
-            'sede': sede.strip() if sede else None,
-            'modalidade': modalidade.strip() if modalidade else None,
-            'grau_academico_2': grau_academico_2.strip() if grau_academico_2 else None,
-            'coordenacao': coordenacao.strip() if coordenacao else None,
-            'link_detalhes': link_curso
-        }
+    def criar_dados_curso(self, linha, sigla_departamento, departamento):
+        """Organiza os dados de um curso a partir de uma linha já extraída da tabela"""
+        return Curso(
+            sigla_departamento=sigla_departamento,
+            departamento=departamento,
+            nome=linha['nome'] or None,
+            grau_academico=linha['grau_academico'] or None,
+            turno=linha['turno'] or None,
+            sede=linha['sede'] or None,
+            modalidade=linha['modalidade'] or None,
+            grau_academico_2=linha['grau_academico_2'] or None,
+            coordenacao=linha['coordenacao'] or None,
+            link_detalhes=linha['link_detalhes']
+        )
 
     def parse(self, response):
         self.logger.info("📋 Extraindo lista de cursos...")
 
-        tabela_cursos = response.css("table.listagem tbody")
-
-        if not tabela_cursos:
+        if not response.css("table.listagem tbody"):
             self.logger.warning("⚠️ Tabela de cursos não encontrada")
             return
 
         departamento_atual = None
         total_cursos = 0
 
-        for tr in tabela_cursos.css("tr"):
-            departamento_cell = tr.css("td.subFormulario::text").get()
-
-            if departamento_cell:
-                departamento_atual = departamento_cell.strip()
+        for linha in self.extrator_cursos(response):
+            if linha['departamento']:
+                departamento_atual = linha['departamento']
                 if " - " in departamento_atual:
                     sigla_departamento_atual = departamento_atual.split(
                         " - ")[0]
                 self.logger.info(
                     f"🏢 Processando departamento: {departamento_atual} (Sigla: {sigla_departamento_atual})")
                 continue
-            nome_curso = tr.css("td:nth-child(1)::text").get()
-
-            if nome_curso and nome_curso.strip():
+            if linha['nome']:
                 curso_data = self.criar_dados_curso(
-                    tr, sigla_departamento_atual, departamento_atual)
+                    linha, sigla_departamento_atual, departamento_atual)
 
                 total_cursos += 1
                 self.logger.info(
-                    f"📚 Curso encontrado: {curso_data['nome']} - {curso_data['turno']}")
+                    f"📚 Curso encontrado: {curso_data.nome} - {curso_data.turno}")
 
                 yield curso_data
 
@@ -2,15 +2,19 @@
 #
 # === COMANDO PRINCIPAL (TUDO EM UM) ===
 # uv run scrapy runspider .\\sigaa\\spiders\\docentes_completo.py -o data\\docentes\\docentes_test.jsonl
+# (ou, com a escrita em lotes fora do reactor do SigaaPipeline)
+# uv run scrapy runspider .\\sigaa\\spiders\\docentes_completo.py -s SIGAA_SAIDA=data/docentes/docentes_test.jsonl
 #
 # === COMANDOS INDIVIDUAIS (OPCIONAIS) ===
 # uv run scrapy crawl departamentos -o data/departamentos/lista_departamentos.jsonl
 # uv run scrapy crawl docentes_paginas -o data/docentes/paginas_baixadas.jsonl
 # uv run scrapy crawl docentes_completo -o data/docentes/docentes_completo.jsonl
+# uv run .\\analise\\extrair_docentes.py --processos 8   (mesmo resultado, sem o Scrapy)
 #
 # === GERENCIADOR DE CHECKPOINT ===
 # python .\sigaa\spiders\docentes_completo.py gerenciar
 import re
+import html
 import json
 import scrapy
 import os
@@ -19,48 +23,261 @@ from pathlib import Path
 import time
 from scrapy.http import HtmlResponse
 
+from sigaa import adaptador  # noqa: F401  (modelos como itens no ItemAdapter)
+from sigaa.acervo import AcervoHtml
+from sigaa.items import Departamento, DocenteCompleto, DocenteResumo
+from sigaa.listagem import ExtratorListagem
+from sigaa.vistos import abrir_vistos, remover_vistos
+
 
 # ================================================================================
 # FUNÇÕES DE GERENCIAMENTO DE CHECKPOINT (Integradas)
 # ================================================================================
 
-def salvar_checkpoint(departamento_atual, total_departamentos, docentes_coletados, timestamp=None):
-    """Salva checkpoint do progresso atual"""
-    checkpoint_file = Path("data/docentes/checkpoint.json")
-    checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
-
-    checkpoint_data = {
-        'departamento_atual': departamento_atual,
-        'total_departamentos': total_departamentos,
-        'docentes_coletados': docentes_coletados,
-        'timestamp': timestamp or time.time(),
-        'versao_checkpoint': '1.0'
-    }
+# Páginas dos docentes baixadas por docentes_paginas (chave: SIAPE)
+ACERVO_PAGINAS = Path("temp/docentes/acervo")
 
-    try:
-        with open(checkpoint_file, 'w', encoding='utf-8') as f:
-            json.dump(checkpoint_data, f, ensure_ascii=False, indent=2)
+CHECKPOINT_DIR = Path("data/docentes")
+CHECKPOINT_JOURNAL = CHECKPOINT_DIR / "checkpoint.jsonl"
+CHECKPOINT_RESUMO = CHECKPOINT_DIR / "checkpoint.json"
+# SIAPEs já gravados na saída do orquestrador (sigaa/vistos.py)
+VISTOS_SIAPES = CHECKPOINT_DIR / ".vistos" / "siapes.vistos"
+
+
+class CheckpointJournal:
+    """
+    Checkpoint em journal append-only (JSONL) do orquestrador de docentes
+
+    Cada evento (docente coletado, departamento concluído, SIAPE processado)
+    vira uma linha acrescentada ao fim de ``checkpoint.jsonl``; nada é
+    reescrito a cada salvamento e uma queda no meio da escrita perde no
+    máximo a última linha, que é ignorada na leitura.
+
+    Periodicamente o journal é compactado: o estado consolidado vira uma
+    única linha ``estado`` (o snapshot), gravada num arquivo temporário que
+    substitui o journal (os.replace), e ``checkpoint.json`` passa a guardar
+    só o resumo (contagens e o byte onde começa a cauda de eventos),
+    permitindo mostrar o progresso sem carregar os docentes. Ao retomar, o
+    snapshot é carregado de uma vez e só os eventos posteriores a ele são
+    reaplicados.
+    """
+
+    def __init__(self, journal=CHECKPOINT_JOURNAL, resumo=CHECKPOINT_RESUMO,
+                 compactar_a_cada=5000):
+        self.journal = Path(journal)
+        self.resumo = Path(resumo)
+        self.compactar_a_cada = compactar_a_cada
+        self.departamento_atual = 0
+        self.total_departamentos = 0
+        self.docentes_coletados = []
+        self.siapes_concluidos = set()
+        self.departamentos_concluidos = set()
+        self.eventos_base = 0
+        self.eventos_cauda = 0
+        self._arquivo = None
+
+    def carregar(self):
+        """
+        Carrega o snapshot da última compactação e reaplica os eventos
+        gravados depois dele; retorna False se não há checkpoint
+        """
+        if not self.journal.exists():
+            return self._migrar_checkpoint_antigo()
+
+        with open(self.journal, 'rb') as f:
+            for linha in f:
+                try:
+                    evento = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue  # linha truncada por queda durante a escrita
+                self._aplicar(evento)
+                if evento.get('evento') == 'estado':
+                    self.eventos_base = (len(self.docentes_coletados) + len(self.siapes_concluidos)
+                                         + len(self.departamentos_concluidos) + 1)
+                else:
+                    # journals compactados antes do snapshot em linha única
+                    # têm um evento por linha: entram na cauda até a próxima
+                    # compactação
+                    self.eventos_cauda += 1
         return True
-    except Exception as e:
-        print(f"❌ Erro ao salvar checkpoint: {e}")
-        return False
 
+    def _migrar_checkpoint_antigo(self):
+        """Converte o checkpoint.json da versão 1.0 (lista completa) para o journal"""
+        checkpoint = ler_resumo_checkpoint(self.resumo)
+        if not checkpoint or 'docentes_coletados' not in checkpoint:
+            return False
+        self.departamento_atual = checkpoint.get('departamento_atual', 0)
+        self.total_departamentos = checkpoint.get('total_departamentos', 0)
+        self.docentes_coletados = [DocenteResumo.de_dict(docente)
+                                   for docente in checkpoint['docentes_coletados']]
+        self.compactar()
+        return True
 
-def carregar_checkpoint():
-    """Carrega checkpoint se existir"""
-    checkpoint_file = Path("data/docentes/checkpoint.json")
+    def _aplicar(self, evento):
+        tipo = evento.get('evento')
+        if tipo == 'estado':
+            self.docentes_coletados = [DocenteResumo.de_dict(docente)
+                                       for docente in evento['docentes']]
+            self.siapes_concluidos = set(evento['siapes'])
+            self.departamentos_concluidos = set(evento['departamentos'])
+        elif tipo == 'docente':
+            self.docentes_coletados.append(DocenteResumo.de_dict(evento['dados']))
+        elif tipo == 'siape':
+            self.siapes_concluidos.add(evento['siape'])
+        elif tipo == 'departamento':
+            self.departamentos_concluidos.add(evento['id'])
+        if tipo in ('estado', 'departamento', 'progresso'):
+            self.departamento_atual = evento.get('departamento_atual', self.departamento_atual)
+            self.total_departamentos = evento.get('total_departamentos', self.total_departamentos)
+
+    def _registrar(self, evento):
+        if self._arquivo is None:
+            self.journal.parent.mkdir(parents=True, exist_ok=True)
+            # Line-buffered: cada evento chega ao SO assim que é registrado
+            self._arquivo = open(self.journal, 'a', encoding='utf-8', buffering=1)
+        self._arquivo.write(json.dumps(evento, ensure_ascii=False) + '\n')
+        self.eventos_cauda += 1
+
+    def registrar_docente(self, docente):
+        self.docentes_coletados.append(docente)
+        self._registrar({'evento': 'docente', 'dados': docente.para_dict()})
+
+    def registrar_departamento(self, dept_id, departamento_atual, total_departamentos):
+        self.departamentos_concluidos.add(dept_id)
+        self.departamento_atual = departamento_atual
+        self.total_departamentos = total_departamentos
+        self._registrar({
+            'evento': 'departamento',
+            'id': dept_id,
+            'departamento_atual': departamento_atual,
+            'total_departamentos': total_departamentos,
+        })
+
+    def registrar_siape(self, siape):
+        self.siapes_concluidos.add(siape)
+        self._registrar({'evento': 'siape', 'siape': siape})
+
+    def sincronizar(self):
+        """Força o journal para o disco e compacta quando a cauda cresce demais"""
+        if self._arquivo is not None:
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+        if self.eventos_cauda > max(self.compactar_a_cada, self.eventos_base):
+            self.compactar()
+
+    def compactar(self, timestamp=None):
+        """Regrava o journal só com o estado consolidado e atualiza o resumo"""
+        self.fechar()
+        self.journal.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.journal.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'evento': 'estado',
+                'departamento_atual': self.departamento_atual,
+                'total_departamentos': self.total_departamentos,
+                'docentes': [docente.para_dict() for docente in self.docentes_coletados],
+                'departamentos': sorted(self.departamentos_concluidos),
+                'siapes': sorted(self.siapes_concluidos),
+            }, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        inicio_cauda = temporario.stat().st_size
+        os.replace(temporario, self.journal)
+
+        self.eventos_base = (len(self.docentes_coletados) + len(self.siapes_concluidos)
+                             + len(self.departamentos_concluidos) + 1)
+        self.eventos_cauda = 0
+        resumo = {
+            'departamento_atual': self.departamento_atual,
+            'total_departamentos': self.total_departamentos,
+            'docentes_coletados': len(self.docentes_coletados),
+            'siapes_concluidos': len(self.siapes_concluidos),
+            'departamentos_concluidos': len(self.departamentos_concluidos),
+            'inicio_cauda': inicio_cauda,
+            'timestamp': timestamp or time.time(),
+            'versao_checkpoint': '2.0'
+        }
+        temporario = self.resumo.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.resumo)
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
 
-    if not checkpoint_file.exists():
+
+def ler_resumo_checkpoint(resumo=CHECKPOINT_RESUMO):
+    """Lê checkpoint.json (resumo do journal) se existir"""
+    if not Path(resumo).exists():
         return None
 
     try:
-        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        with open(resumo, 'r', encoding='utf-8') as f:
             return json.load(f)
     except Exception as e:
         print(f"❌ Erro ao carregar checkpoint: {e}")
         return None
 
 
+def carregar_checkpoint():
+    """
+    Resumo do checkpoint sem carregar os docentes: contagens gravadas na
+    última compactação somadas às da cauda do journal
+    """
+    checkpoint = ler_resumo_checkpoint()
+    if not CHECKPOINT_JOURNAL.exists():
+        # Checkpoint da versão 1.0, ainda não migrado para o journal
+        if checkpoint and 'docentes_coletados' in checkpoint:
+            checkpoint['docentes_coletados'] = len(checkpoint['docentes_coletados'])
+        return checkpoint
+
+    checkpoint = dict(checkpoint or {})
+    inicio_cauda = checkpoint.get('inicio_cauda', 0)
+    if inicio_cauda > CHECKPOINT_JOURNAL.stat().st_size:
+        checkpoint, inicio_cauda = {}, 0  # resumo desatualizado: relê tudo
+
+    contagens = {'docente': 0, 'siape': 0, 'departamento': 0}
+    with open(CHECKPOINT_JOURNAL, 'rb') as f:
+        f.seek(inicio_cauda)
+        for linha in f:
+            # Só as linhas de progresso são decodificadas; as demais são contadas
+            if linha.startswith(b'{"evento": "estado"'):
+                # snapshot, só lido quando o resumo está desatualizado
+                try:
+                    estado = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                contagens['docente'] += len(estado['docentes'])
+                contagens['siape'] += len(estado['siapes'])
+                contagens['departamento'] += len(estado['departamentos'])
+                for chave in ('departamento_atual', 'total_departamentos'):
+                    checkpoint[chave] = estado[chave]
+            elif linha.startswith(b'{"evento": "docente"'):
+                contagens['docente'] += 1
+            elif linha.startswith(b'{"evento": "siape"'):
+                contagens['siape'] += 1
+            elif linha.startswith((b'{"evento": "departamento"', b'{"evento": "progresso"')):
+                try:
+                    evento = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                if evento['evento'] == 'departamento':
+                    contagens['departamento'] += 1
+                for chave in ('departamento_atual', 'total_departamentos'):
+                    if chave in evento:
+                        checkpoint[chave] = evento[chave]
+
+    checkpoint['docentes_coletados'] = checkpoint.get('docentes_coletados', 0) + contagens['docente']
+    checkpoint['siapes_concluidos'] = checkpoint.get('siapes_concluidos', 0) + contagens['siape']
+    checkpoint['departamentos_concluidos'] = (
+        checkpoint.get('departamentos_concluidos', 0) + contagens['departamento'])
+    if inicio_cauda < CHECKPOINT_JOURNAL.stat().st_size:
+        checkpoint['timestamp'] = CHECKPOINT_JOURNAL.stat().st_mtime
+    return checkpoint
+
+
 def mostrar_status_checkpoint():
     """Mostra status do checkpoint atual"""
     checkpoint = carregar_checkpoint()
@@ -75,7 +292,9 @@ def mostrar_status_checkpoint():
     print(
         f"📈 Total de departamentos: {checkpoint.get('total_departamentos', 'N/A')}")
     print(
-        f"👥 Docentes coletados: {len(checkpoint.get('docentes_coletados', []))}")
+        f"👥 Docentes coletados: {checkpoint.get('docentes_coletados', 0)}")
+    print(
+        f"✅ SIAPEs processados: {checkpoint.get('siapes_concluidos', 0)}")
 
     timestamp = checkpoint.get('timestamp')
     if timestamp:
@@ -85,7 +304,7 @@ def mostrar_status_checkpoint():
 
     # Calcular progresso
     dept_atual = checkpoint.get('departamento_atual', 0)
-    total_dept = checkpoint.get('total_departamentos', 1)
+    total_dept = checkpoint.get('total_departamentos') or 1
     progresso = (dept_atual / total_dept) * 100 if total_dept > 0 else 0
     print(f"📊 Progresso: {progresso:.1f}% ({dept_atual}/{total_dept})")
 
@@ -94,18 +313,23 @@ def mostrar_status_checkpoint():
 
 def limpar_checkpoint():
     """Remove checkpoint e arquivos relacionados"""
-    checkpoint_file = Path("data/docentes/checkpoint.json")
     processed_dir = Path("temp/processed")
 
     removidos = 0
 
-    # Remover arquivo de checkpoint
-    if checkpoint_file.exists():
-        checkpoint_file.unlink()
-        print(f"🗑️ Removido: {checkpoint_file}")
+    # Remover journal e resumo do checkpoint
+    for checkpoint_file in (CHECKPOINT_JOURNAL, CHECKPOINT_RESUMO):
+        if checkpoint_file.exists():
+            checkpoint_file.unlink()
+            print(f"🗑️ Removido: {checkpoint_file}")
+            removidos += 1
+
+    # Remover o conjunto de SIAPEs vistos: sem checkpoint, nada é pulado
+    for arquivo_vistos in remover_vistos(VISTOS_SIAPES):
+        print(f"🗑️ Removido: {arquivo_vistos}")
         removidos += 1
 
-    # Remover flags de departamentos processados
+    # Remover flags de departamentos processados (versões anteriores)
     if processed_dir.exists():
         for flag_file in processed_dir.glob("dept_*_done.flag"):
             flag_file.unlink()
@@ -131,21 +355,9 @@ def verificar_arquivos_saida():
 
     if arquivo_docentes.exists():
         try:
-            linhas = 0
-            siapes_unicos = set()
-
-            with open(arquivo_docentes, 'r', encoding='utf-8') as f:
-                for linha in f:
-                    linha = linha.strip()
-                    if linha:
-                        linhas += 1
-                        try:
-                            docente = json.loads(linha)
-                            siape = docente.get('siape')
-                            if siape:
-                                siapes_unicos.add(siape)
-                        except json.JSONDecodeError:
-                            continue
+            with open(arquivo_docentes, 'rb') as f:
+                linhas = sum(1 for linha in f if linha.strip())
+            siapes_unicos = IndiceSiape(arquivo_docentes)
 
             print(f"📊 Arquivo: {arquivo_docentes}")
             print(f"📈 Total de linhas: {linhas}")
@@ -227,74 +439,269 @@ def gerenciar_checkpoint_menu():
             print("❌ Opção inválida")
 
 
+# ================================================================================
+# ÍNDICE DE SIAPES (offset de byte por SIAPE em arquivos JSONL de docentes)
+# ================================================================================
+
+class IndiceSiape:
+    """
+    Índice SIAPE -> offset de byte de um JSONL de docentes
+
+    Construído uma vez e persistido ao lado do arquivo
+    (``docentes.jsonl`` -> ``docentes.jsonl.siape.json``). Só os offsets ficam
+    em memória; cada busca faz um seek e decodifica apenas a linha do docente.
+    Se o JSONL só cresceu desde a última indexação (append), apenas as linhas
+    novas são lidas; qualquer outra mudança refaz o índice.
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = Path(arquivo)
+        self.caminho_indice = self.arquivo.with_name(self.arquivo.name + '.siape.json')
+        self.offsets = {}
+        self._tamanho = 0
+        self._carregar()
+
+    def _carregar(self):
+        if not self.arquivo.exists():
+            return
+
+        info = self.arquivo.stat()
+        persistido = None
+        if self.caminho_indice.exists():
+            try:
+                with open(self.caminho_indice, 'r', encoding='utf-8') as f:
+                    persistido = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                persistido = None
+
+        inicio = 0
+        if persistido:
+            tamanho = persistido.get('tamanho', 0)
+            if tamanho == info.st_size and persistido.get('mtime_ns') == info.st_mtime_ns:
+                self.offsets = persistido.get('offsets', {})
+                self._tamanho = tamanho
+                return
+            if 0 < tamanho < info.st_size and self._termina_linha(tamanho):
+                self.offsets = persistido.get('offsets', {})
+                inicio = tamanho
+
+        self._indexar(inicio, info.st_size)
+        self._salvar(info)
+
+    def _termina_linha(self, tamanho):
+        """Confere se o trecho já indexado ainda termina numa quebra de linha"""
+        with open(self.arquivo, 'rb') as f:
+            f.seek(tamanho - 1)
+            return f.read(1) == b'\n'
+
+    def _indexar(self, inicio, fim):
+        with open(self.arquivo, 'rb') as f:
+            f.seek(inicio)
+            offset = inicio
+            for linha in f:
+                if offset >= fim:
+                    break
+                if linha.strip():
+                    try:
+                        siape = json.loads(linha).get('siape')
+                    except (json.JSONDecodeError, AttributeError):
+                        siape = None
+                    # Como na busca sequencial, vale a primeira ocorrência
+                    if siape and siape not in self.offsets:
+                        self.offsets[siape] = offset
+                offset += len(linha)
+        self._tamanho = min(offset, fim)
+
+    def _salvar(self, info):
+        temporario = self.caminho_indice.with_suffix('.tmp')
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'tamanho': self._tamanho,
+                    'mtime_ns': info.st_mtime_ns,
+                    'offsets': self.offsets,
+                }, f, ensure_ascii=False)
+            os.replace(temporario, self.caminho_indice)
+        except OSError:
+            pass  # sem permissão de escrita: o índice vale só para esta execução
+
+    def __contains__(self, siape):
+        return siape in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def siapes(self):
+        """SIAPEs presentes no arquivo"""
+        return self.offsets.keys()
+
+    def buscar(self, siape):
+        """Registro do docente com o SIAPE informado, ou None"""
+        offset = self.offsets.get(siape)
+        if offset is None:
+            return None
+        with open(self.arquivo, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+
 # ================================================================================
 # FUNÇÕES DE EXTRAÇÃO DE DADOS (Compartilhadas entre as classes)
 # ================================================================================
 
+# Colunas da listagem de busca_docentes.jsf
+EXTRATOR_DOCENTES = ExtratorListagem({
+    'nome': (2, 'span.nome::text'),
+    'link_pagina': (2, 'span.pagina a::attr(href)'),
+})
+
+
+# Seções da página do docente localizadas na varredura (pelo atributo id)
+SECOES_PAGINA_DOCENTE = ('id-docente', 'left', 'perfil-docente', 'formacao-academica', 'contato')
+
+# Rótulo do <dt> (trecho do seu primeiro texto) -> (seção exigida, campo, leitura do <dd>)
+#   texto: primeiro texto do dd | textos: todos os textos do dd, unidos por " | "
+#   link: href do <a> filho do dd | informado: primeiro texto, exceto "não informado"
+ROTULOS_PAGINA_DOCENTE = {
+    'Descrição pessoal': ('perfil-docente', 'descricao_pessoal', 'texto'),
+    'Formação acadêmica': ('perfil-docente', 'formacao_resumida', 'textos'),
+    'Áreas de Interesse': ('perfil-docente', 'areas_interesse', 'texto'),
+    'Lattes': ('perfil-docente', 'curriculo_lattes', 'link'),
+    'Telefone': ('contato', 'telefone_ramal', 'informado'),
+    'eletrônico': ('contato', 'email', 'informado'),
+    'Sala': ('contato', 'sala', 'informado'),
+}
+
+
+def _primeiro_texto(elemento):
+    """Primeiro nó de texto filho direto (equivalente a ``/text()`` + ``.get()``)"""
+    if elemento.text is not None:
+        return elemento.text
+    for filho in elemento:
+        if filho.tail is not None:
+            return filho.tail
+    return None
+
+
+def _textos_diretos(elemento):
+    """Todos os nós de texto filhos diretos (equivalente a ``/text()`` + ``.getall()``)"""
+    textos = [elemento.text] if elemento.text is not None else []
+    textos.extend(filho.tail for filho in elemento if filho.tail is not None)
+    return textos
+
+
+def _tem_classe(elemento, classe):
+    return classe in elemento.get('class', '').split()
+
+
+def _ler_dd(dds, leitura):
+    """Lê o valor de um campo a partir dos <dd> associados ao seu rótulo"""
+    if leitura == 'textos':
+        return [texto for dd in dds for texto in dd.itertext()]
+    if leitura == 'link':
+        for dd in dds:
+            for filho in dd:
+                if filho.tag == 'a' and filho.get('href') is not None:
+                    return filho.get('href')
+        return None
+    for dd in dds:
+        texto = _primeiro_texto(dd)
+        if texto is not None:
+            return texto
+    return None
+
+
 def extrair_dados_perfil_docente(response):
     """
     Função fixa para extrair informações do HTML da página do docente
+
+    Percorre o documento uma única vez, localizando as seções pelo id e
+    associando cada <dt> rotulado ao <dd> seguinte; os campos saem do mapa
+    ROTULOS_PAGINA_DOCENTE em vez de uma consulta XPath por campo.
     """
     dados = {}
 
     try:
+        raiz = getattr(response, 'selector', response).root
+        secoes = {}
+        dds_por_campo = {}
+
+        for elemento in raiz.iter():
+            if not isinstance(elemento.tag, str):
+                continue  # comentários e instruções de processamento
+            id_elemento = elemento.get('id')
+            if id_elemento in SECOES_PAGINA_DOCENTE:
+                secoes.setdefault(id_elemento, []).append(elemento)
+            if elemento.tag != 'dt':
+                continue
+
+            rotulo = _primeiro_texto(elemento) or ''
+            for trecho, (_, campo, _) in ROTULOS_PAGINA_DOCENTE.items():
+                if trecho not in rotulo:
+                    continue
+                dd = next(elemento.itersiblings('dd'), None)
+                dds = dds_por_campo.setdefault(campo, [])
+                if dd is not None and (not dds or dds[-1] is not dd):
+                    dds.append(dd)
+
         # === INFORMAÇÕES BÁSICAS ===
-        nome_completo = response.css("#id-docente h3::text").get()
+        nome_completo = next((texto for secao in secoes.get('id-docente', [])
+                              for h3 in secao.iterdescendants('h3')
+                              for texto in _textos_diretos(h3)), None)
         if nome_completo:
             dados["nome_completo"] = nome_completo.strip().title()
 
-        departamento_completo = response.css(
-            "#id-docente p.departamento::text").get()
+        departamento_completo = next((texto for secao in secoes.get('id-docente', [])
+                                      for p in secao.iterdescendants('p')
+                                      if _tem_classe(p, 'departamento')
+                                      for texto in _textos_diretos(p)), None)
         if departamento_completo:
             dados["departamento_completo"] = departamento_completo.strip()
 
         # Foto do docente
-        foto_url = response.css("#left .foto_professor img::attr(src)").get()
+        foto_url = next((img.get('src') for secao in secoes.get('left', [])
+                         for img in secao.iterdescendants('img')
+                         if img.get('src') is not None
+                         and any(_tem_classe(ancestral, 'foto_professor')
+                                 for ancestral in img.iterancestors()
+                                 if ancestral is not secao and secao in ancestral.iterancestors())),
+                        None)
         if foto_url:
             if not foto_url.startswith('http'):
                 foto_url = f"https://sigaa.unb.br{foto_url}" if foto_url.startswith(
                     '/') else foto_url
             dados["foto_url"] = foto_url
 
-        # === PERFIL PESSOAL ===
-        perfil_section = response.css("#perfil-docente")
-        if perfil_section:
-            # Descrição pessoal
-            descricao_xpath = "//dt[contains(text(), 'Descrição pessoal')]/following-sibling::dd[1]/text()"
-            descricao = response.xpath(descricao_xpath).get()
-            if descricao and descricao.strip():
-                dados["descricao_pessoal"] = descricao.strip()
-
-            # Formação acadêmica resumida
-            formacao_xpath = "//dt[contains(text(), 'Formação acadêmica')]/following-sibling::dd[1]//text()"
-            formacao_textos = response.xpath(formacao_xpath).getall()
-            if formacao_textos:
-                formacao = " | ".join([t.strip()
-                                      for t in formacao_textos if t.strip()])
-                dados["formacao_resumida"] = formacao
-
-            # Áreas de interesse
-            areas_xpath = "//dt[contains(text(), 'Áreas de Interesse')]/following-sibling::dd[1]/text()"
-            areas = response.xpath(areas_xpath).get()
-            if areas and areas.strip():
-                dados["areas_interesse"] = areas.strip()
-
-            # Currículo Lattes
-            lattes_xpath = "//dt[contains(text(), 'Lattes')]/following-sibling::dd[1]/a/@href"
-            lattes_link = response.xpath(lattes_xpath).get()
-            if lattes_link:
-                dados["curriculo_lattes"] = lattes_link.strip()
+        # === PERFIL PESSOAL E CONTATOS ===
+        valores = {}
+        for secao, campo, leitura in ROTULOS_PAGINA_DOCENTE.values():
+            if secao in secoes and campo in dds_por_campo:
+                valores[campo] = _ler_dd(dds_por_campo[campo], leitura)
+
+        for campo in ('descricao_pessoal', 'formacao_resumida', 'areas_interesse', 'curriculo_lattes'):
+            valor = valores.get(campo)
+            if campo == 'formacao_resumida':
+                if valor:
+                    dados[campo] = " | ".join([t.strip() for t in valor if t.strip()])
+            elif campo == 'curriculo_lattes':
+                if valor:
+                    dados[campo] = valor.strip()
+            elif valor and valor.strip():
+                dados[campo] = valor.strip()
 
         # === FORMAÇÃO DETALHADA ===
-        formacao_section = response.css("#formacao-academica")
-        if formacao_section:
+        if 'formacao-academica' in secoes:
             formacao_detalhes = {}
+            divs = [secao for secao in secoes['formacao-academica'] if secao.tag == 'div']
 
-            # Usar XPath mais preciso para formação
-            niveis = response.xpath(
-                "//div[@id='formacao-academica']//dt/span[@class='ano']/text()").getall()
-            detalhes = response.xpath(
-                "//div[@id='formacao-academica']//dd//text()").getall()
+            niveis = [texto for div in divs
+                      for dt in div.iterdescendants('dt')
+                      for span in dt
+                      if span.tag == 'span' and span.get('class') == 'ano'
+                      for texto in _textos_diretos(span)]
+            detalhes = [texto for div in divs
+                        for dd in div.iterdescendants('dd')
+                        for texto in dd.itertext()]
 
             if niveis and detalhes:
                 # Agrupar detalhes por nível
@@ -315,26 +722,10 @@ def extrair_dados_perfil_docente(response):
             if formacao_detalhes:
                 dados["formacao_detalhada"] = formacao_detalhes
 
-        # === CONTATOS ===
-        contato_section = response.css("#contato")
-        if contato_section:
-            # Telefone/Ramal
-            telefone_xpath = "//dt[contains(text(), 'Telefone')]/following-sibling::dd[1]/text()"
-            telefone = response.xpath(telefone_xpath).get()
-            if telefone and "não informado" not in telefone.lower():
-                dados["telefone_ramal"] = telefone.strip()
-
-            # Email
-            email_xpath = "//dt[contains(text(), 'eletrônico')]/following-sibling::dd[1]/text()"
-            email = response.xpath(email_xpath).get()
-            if email and "não informado" not in email.lower():
-                dados["email"] = email.strip()
-
-            # Sala
-            sala_xpath = "//dt[contains(text(), 'Sala')]/following-sibling::dd[1]/text()"
-            sala = response.xpath(sala_xpath).get()
-            if sala and "não informado" not in sala.lower():
-                dados["sala"] = sala.strip()
+        for campo in ('telefone_ramal', 'email', 'sala'):
+            valor = valores.get(campo)
+            if valor and "não informado" not in valor.lower():
+                dados[campo] = valor.strip()
 
     except Exception as e:
         dados["erro_extracao"] = str(e)
@@ -342,33 +733,130 @@ def extrair_dados_perfil_docente(response):
     return dados
 
 
+# Pares "chave": "valor" do payload, para quando ele não é JSON estrito
+PADRAO_CAMPO_CURRICULO = re.compile(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class CurriculoLattes:
+    """
+    Decodificador do ``var curriculo = {...}`` embutido na página do docente
+
+    O payload é localizado uma vez e decodificado numa única passada (como
+    JSON; se não for JSON estrito, por uma varredura única dos pares
+    "chave": "valor"). Nada é feito até o primeiro acesso a um campo, e as
+    entidades HTML de cada valor só são decodificadas quando ele é lido.
+
+    Os campos aninhados são expostos num espaço plano de chaves; vale a
+    primeira ocorrência de cada chave no texto.
+    """
+
+    def __init__(self, script):
+        self.script = script
+        self._campos = None
+        self._decodificados = {}
+
+    @classmethod
+    def da_pagina(cls, seletor):
+        """Localiza o script com o currículo na página (Response ou Selector)"""
+        raiz = getattr(seletor, 'selector', seletor).root
+        for script in raiz.iter('script'):
+            if script.text and 'var curriculo' in script.text:
+                return cls(script.text)
+        return None
+
+    @property
+    def campos(self):
+        """Valores brutos (sem decodificar entidades) de todos os campos"""
+        if self._campos is None:
+            self._campos = self._decodificar()
+        return self._campos
+
+    def _decodificar(self):
+        inicio = self.script.find('var curriculo')
+        inicio = 0 if inicio < 0 else inicio
+        igual = self.script.find('=', inicio)
+        campos = {}
+
+        if igual >= 0:
+            posicao = igual + 1
+            while posicao < len(self.script) and self.script[posicao].isspace():
+                posicao += 1
+            try:
+                objeto, _ = json.JSONDecoder().raw_decode(self.script, posicao)
+            except ValueError:
+                pass
+            else:
+                _achatar_curriculo(objeto, campos)
+                return campos
+
+        for match in PADRAO_CAMPO_CURRICULO.finditer(self.script, inicio):
+            if match.group(1) not in campos:
+                try:
+                    campos[match.group(1)] = json.loads(f'"{match.group(2)}"')
+                except ValueError:
+                    campos[match.group(1)] = match.group(2)
+        return campos
+
+    def get(self, campo, padrao=None):
+        """Valor do campo com as entidades HTML decodificadas"""
+        if campo not in self._decodificados:
+            valor = self.campos.get(campo)
+            self._decodificados[campo] = html.unescape(valor) if isinstance(valor, str) else valor
+        valor = self._decodificados[campo]
+        return padrao if valor is None else valor
+
+    def __getitem__(self, campo):
+        if campo not in self.campos:
+            raise KeyError(campo)
+        return self.get(campo)
+
+    def __contains__(self, campo):
+        return campo in self.campos
+
+    def __iter__(self):
+        return iter(self.campos)
+
+    def __len__(self):
+        return len(self.campos)
+
+
+def _achatar_curriculo(objeto, campos):
+    """Copia os valores escalares de um objeto aninhado para um dict plano"""
+    if isinstance(objeto, dict):
+        for chave, valor in objeto.items():
+            if isinstance(valor, (dict, list)):
+                _achatar_curriculo(valor, campos)
+            elif chave not in campos:
+                campos[chave] = valor
+    elif isinstance(objeto, list):
+        for item in objeto:
+            _achatar_curriculo(item, campos)
+
+
 def extrair_dados_curriculo_lattes(script_content):
     """
     Função fixa para extrair dados do currículo Lattes do JavaScript
+
+    Aceita o texto do script ou um CurriculoLattes já localizado na página.
     """
     try:
+        curriculo = script_content if isinstance(
+            script_content, CurriculoLattes) else CurriculoLattes(script_content)
         curriculo_info = {}
 
         # Data de atualização
-        match_data = re.search(r'"dataatualizacao":\s*"(\d+)"', script_content)
-        if match_data:
-            data_raw = match_data.group(1)
-            if len(data_raw) == 8:
-                curriculo_info["data_atualizacao"] = f"{data_raw[:2]}/{data_raw[2:4]}/{data_raw[4:]}"
+        data_raw = str(curriculo.get("dataatualizacao", ""))
+        if len(data_raw) == 8 and data_raw.isdigit():
+            curriculo_info["data_atualizacao"] = f"{data_raw[:2]}/{data_raw[2:4]}/{data_raw[4:]}"
 
         # Nome em citações
-        match_citacao = re.search(
-            r'"nomeemcitacoesbibliograficas":\s*"([^"]+)"', script_content)
-        if match_citacao:
-            curriculo_info["nome_citacoes"] = match_citacao.group(1)
+        nome_citacoes = curriculo.get("nomeemcitacoesbibliograficas")
+        if nome_citacoes:
+            curriculo_info["nome_citacoes"] = nome_citacoes
 
         # Resumo (limitado)
-        match_resumo = re.search(
-            r'"textoresumocvrh":\s*"([^"]+)"', script_content)
-        if match_resumo:
-            resumo = match_resumo.group(1)
-            resumo = resumo.replace("&#201;", "É").replace(
-                "&#195;", "Ã").replace("&#231;", "ç")
+        resumo = curriculo.get("textoresumocvrh")
+        if resumo:
             curriculo_info["resumo_cv"] = resumo[:300] + \
                 "..." if len(resumo) > 300 else resumo
 
@@ -378,6 +866,34 @@ def extrair_dados_curriculo_lattes(script_content):
         return None
 
 
+def extrair_dados_pagina_docente(seletor):
+    """
+    Perfil + currículo Lattes de uma página de docente (Response ou Selector)
+    """
+    dados_extraidos = extrair_dados_perfil_docente(seletor)
+
+    # Extrair dados do Lattes se disponível
+    curriculo = CurriculoLattes.da_pagina(seletor)
+    if curriculo:
+        dados_lattes = extrair_dados_curriculo_lattes(curriculo)
+        if dados_lattes:
+            dados_extraidos["curriculo_lattes_dados"] = dados_lattes
+
+    return dados_extraidos
+
+
+def montar_docente_completo(dados_originais, dados_extraidos, siape, arquivo_origem):
+    """Registro final de docentes_completo.jsonl (spider e extração em lote)"""
+    return DocenteCompleto.de_dict({
+        **dados_originais,
+        **dados_extraidos,
+        "siape_processado": siape,
+        "arquivo_html_origem": arquivo_origem,
+        "timestamp_processamento": time.time(),
+        "status_processamento": "sucesso"
+    })
+
+
 # ================================================================================
 # CLASSE 1: SPIDER PARA LISTAR DEPARTAMENTOS/UNIDADES
 # ================================================================================
@@ -406,11 +922,11 @@ class DepartamentosSpider(scrapy.Spider):
 
             if valor and valor not in ["", "0"]:
                 total_encontrados += 1
-                yield {
-                    'id_departamento': valor,
-                    'nome_departamento': texto.strip(),
-                    'timestamp_coleta': time.time()
-                }
+                yield Departamento(
+                    id_departamento=valor,
+                    nome_departamento=texto.strip(),
+                    timestamp_coleta=time.time()
+                )
 
         self.logger.info(
             f"✅ Total de departamentos coletados: {total_encontrados}")
@@ -428,21 +944,17 @@ class DocentesPaginasSpider(scrapy.Spider):
         'DOWNLOAD_DELAY': 2,
         'CONCURRENT_REQUESTS': 1,
         'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
-        'AUTOTHROTTLE_ENABLED': True,
-        'AUTOTHROTTLE_START_DELAY': 2,
-        'AUTOTHROTTLE_MAX_DELAY': 4,
     }
 
     def __init__(self):
-        # Pasta para salvar HTMLs
-        self.paginas_dir = Path("temp/docentes/paginas_html")
-        self.paginas_dir.mkdir(parents=True, exist_ok=True)
+        # Acervo (segmentos gzip + índice) onde as páginas são gravadas
+        self.acervo = AcervoHtml(ACERVO_PAGINAS)
 
         self.total_docentes = 0
         self.processados = 0
 
         self.logger.info(
-            f"🚀 Spider de páginas iniciado - Pasta: {self.paginas_dir.absolute()}")
+            f"🚀 Spider de páginas iniciado - Acervo: {self.acervo.pasta.absolute()}")
 
     def start_requests(self):
         """Lê docentes.jsonl e baixa páginas individuais"""
@@ -492,23 +1004,22 @@ class DocentesPaginasSpider(scrapy.Spider):
         self.logger.info(
             f"💾 [{posicao}/{self.total_docentes}] Salvando: {nome}")
 
-        # Salvar HTML
-        arquivo_html = self.paginas_dir / f"docente_{siape}.html"
-        with open(arquivo_html, "w", encoding="utf-8") as f:
-            f.write(response.text)
+        # Arquivar HTML (não regrava se a página não mudou)
+        self.acervo.gravar(siape, response.text)
 
         self.processados += 1
 
         yield {
             **docente,  # Dados originais
             "url_acessada": response.url,
-            "arquivo_html": str(arquivo_html),
+            "arquivo_html": f"{self.acervo.pasta}#{siape}",
             "tamanho_html": len(response.text),
             "status_download": "sucesso",
             "timestamp_download": time.time()
         }
 
     def closed(self, reason):
+        self.acervo.fechar()
         self.logger.info(
             f"📊 Páginas baixadas: {self.processados}/{self.total_docentes}")
 
@@ -518,105 +1029,96 @@ class DocentesPaginasSpider(scrapy.Spider):
 # ================================================================================
 
 class DocentesCompletoSpider(scrapy.Spider):
+    """
+    Extrai os dados completos das páginas arquivadas por docentes_paginas.
+
+    Para extrair o acervo inteiro, analise/extrair_docentes.py produz o
+    mesmo docentes_completo.jsonl em um pool de processos, sem passar pelo
+    downloader/scheduler do Scrapy.
+    """
     name = "docentes_completo"
 
+    # Páginas extraídas por callback: entre um lote e outro o reactor volta
+    # a atender o resto do crawl (pipelines, sinais, telnet...)
+    paginas_por_lote = 50
+
     def __init__(self):
-        self.paginas_dir = Path("temp/docentes/paginas_html")
+        self.acervo = AcervoHtml(ACERVO_PAGINAS)
         self.processados = 0
+        self.indice_docentes = None  # construído na primeira busca
 
         self.logger.info(
-            f"🔍 Spider de extração iniciado - Pasta: {self.paginas_dir.absolute()}")
+            f"🔍 Spider de extração iniciado - Acervo: {self.acervo.pasta.absolute()}")
 
     def start_requests(self):
-        """Processa HTMLs salvos localmente"""
-        if not self.paginas_dir.exists():
-            self.logger.error(f"❌ Pasta não encontrada: {self.paginas_dir}")
+        """Abre o acervo local; as páginas são lidas direto dos segmentos"""
+        if not len(self.acervo):
+            self.logger.error(f"❌ Acervo vazio ou inexistente: {self.acervo.pasta}")
             return
 
-        # Buscar arquivos HTML
-        arquivos_html = list(self.paginas_dir.glob("docente_*.html"))
-        total_arquivos = len(arquivos_html)
-
-        self.logger.info(f"📁 Arquivos HTML encontrados: {total_arquivos}")
-
-        for i, arquivo in enumerate(arquivos_html):
-            # Extrair SIAPE do nome do arquivo
-            siape = arquivo.stem.replace("docente_", "")
-
-            file_url = arquivo.as_uri()
+        self.logger.info(f"📁 Páginas no acervo: {len(self.acervo)}")
 
+        # Uma Request data: (sem download) por lote de chaves, na ordem física
+        # do acervo; as páginas são lidas dos segmentos no callback
+        siapes = [siape for siape, _ in sorted(
+            self.acervo.indice.items(), key=lambda registro: registro[1][:2])]
+        for inicio in range(0, len(siapes), self.paginas_por_lote):
             yield scrapy.Request(
-                url=file_url,
-                callback=self.processar_html_local,
-                meta={
-                    "siape": siape,
-                    "arquivo_origem": str(arquivo),
-                    "posicao": i + 1,
-                    "total": total_arquivos
-                }
+                url="data:,",
+                callback=self.processar_acervo,
+                cb_kwargs={
+                    "siapes": siapes[inicio:inicio + self.paginas_por_lote],
+                    "posicao": inicio + 1,
+                    "total": len(siapes),
+                },
+                dont_filter=True,
+                priority=-inicio,  # lotes na ordem, não na LIFO do scheduler
             )
 
-    def processar_html_local(self, response):
-        """Extrai dados do HTML local usando as funções fixas"""
-        siape = response.meta["siape"]
-        arquivo_origem = response.meta["arquivo_origem"]
-        posicao = response.meta["posicao"]
-        total = response.meta["total"]
-
+    def processar_acervo(self, response, siapes, posicao, total):
+        """Extrai os docentes de um lote de páginas do acervo"""
+        url_acervo = self.acervo.pasta.resolve().as_uri()
+        for deslocamento, siape in enumerate(siapes):
+            pagina = HtmlResponse(
+                url=f"{url_acervo}#{siape}", body=self.acervo.ler(siape), encoding="utf-8")
+            yield self.processar_html_local(
+                pagina, siape, f"{self.acervo.pasta}#{siape}", posicao + deslocamento, total)
+
+    def processar_html_local(self, response, siape, arquivo_origem, posicao, total):
+        """Extrai dados de uma página local usando as funções fixas"""
         self.logger.info(f"⚙️ [{posicao}/{total}] Processando SIAPE: {siape}")
 
         # Buscar dados originais do docente
         dados_originais = self.buscar_dados_originais(siape)
 
         # Extrair dados da página usando funções fixas
-        dados_extraidos = extrair_dados_perfil_docente(response)
-
-        # Extrair dados do Lattes se disponível
-        script_content = response.css(
-            "script:contains('var curriculo')::text").get()
-        if script_content:
-            dados_lattes = extrair_dados_curriculo_lattes(script_content)
-            if dados_lattes:
-                dados_extraidos["curriculo_lattes_dados"] = dados_lattes
+        dados_extraidos = extrair_dados_pagina_docente(response)
 
         # Combinar todos os dados
-        dados_completos = {
-            **dados_originais,
-            **dados_extraidos,
-            "siape_processado": siape,
-            "arquivo_html_origem": arquivo_origem,
-            "timestamp_processamento": time.time(),
-            "status_processamento": "sucesso"
-        }
+        dados_completos = montar_docente_completo(
+            dados_originais, dados_extraidos, siape, arquivo_origem)
 
         self.processados += 1
         nome = dados_completos.get(
             "nome_completo", dados_completos.get("nome_docente", "N/A"))
         self.logger.info(f"✅ [{self.processados}] Concluído: {nome}")
 
-        yield dados_completos
+        return dados_completos
 
     def buscar_dados_originais(self, siape):
-        """Busca dados originais do docente no arquivo JSONL"""
-        arquivo_docentes = Path("data/docentes/docentes.jsonl")
-
-        if not arquivo_docentes.exists():
-            return {"siape": siape}
+        """Busca dados originais do docente no arquivo JSONL (via índice de SIAPEs)"""
+        if self.indice_docentes is None:
+            self.indice_docentes = IndiceSiape("data/docentes/docentes.jsonl")
 
         try:
-            with open(arquivo_docentes, 'r', encoding='utf-8') as f:
-                for linha in f:
-                    linha = linha.strip()
-                    if linha:
-                        docente = json.loads(linha)
-                        if docente.get("siape") == siape:
-                            return docente
+            docente = self.indice_docentes.buscar(siape)
         except Exception:
-            pass
+            docente = None
 
-        return {"siape": siape}
+        return docente or {"siape": siape}
 
     def closed(self, reason):
+        self.acervo.fechar()
         self.logger.info(f"📊 PROCESSAMENTO CONCLUÍDO:")
         self.logger.info(f"   ✅ Docentes processados: {self.processados}")
         self.logger.info(
@@ -629,12 +1131,22 @@ class DocentesCompletoSpider(scrapy.Spider):
 
 class DocentesOrquestradorSpider(scrapy.Spider):
     """
-    Spider principal que executa todas as 3 etapas em sequência:
-    1. Lista departamentos (se necessário)
-    2. Coleta docentes por departamento 
+    Spider principal que executa todas as etapas em uma execução:
+    1. Lista departamentos
+    2. Coleta docentes por departamento
     3. Baixa páginas individuais
     4. Extrai dados completos
-    
+
+    As buscas de todos os departamentos entram de uma vez no scheduler do
+    Scrapy, com prioridade maior que as páginas de docentes; cada busca
+    concluída enfileira as páginas dos seus docentes. A vazão fica a cargo de
+    CONCURRENT_REQUESTS e do ThrottleSigaa (sigaa/throttle.py), que ajusta o
+    ritmo das buscas JSF e das páginas de docentes separadamente, não de uma
+    cadeia de callbacks.
+
+    A retomada usa o conjunto de SIAPEs vistos (``data/docentes/.vistos/``),
+    o mesmo que o DeduplicacaoPipeline atualiza quando o item é gravado.
+
     USO: uv run scrapy runspider .\\sigaa\\spiders\\docentes_completo.py -o data\\docentes\\docentes_test.jsonl
     """
     name = "docentes_orquestrador"
@@ -643,35 +1155,34 @@ class DocentesOrquestradorSpider(scrapy.Spider):
         "https://sigaa.unb.br/sigaa/public/docente/busca_docentes.jsf"]
 
     custom_settings = {
-        'DOWNLOAD_DELAY': 2,
-        'CONCURRENT_REQUESTS': 1,
-        'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
-        'AUTOTHROTTLE_ENABLED': True,
-        'AUTOTHROTTLE_START_DELAY': 2,
-        'AUTOTHROTTLE_MAX_DELAY': 5,
-        'AUTOTHROTTLE_TARGET_CONCURRENCY': 1.0,
+        'DOWNLOAD_DELAY': 0.5,
+        'CONCURRENT_REQUESTS': 8,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 4,
     }
 
+    # Buscas de departamento saem do scheduler antes das páginas de docentes
+    prioridade_departamento = 10
+    prioridade_pagina = 0
+
     def __init__(self):
         # Configurar pastas
         self.temp_dir = Path("temp/current_dept")
         self.paginas_dir = Path("temp/docentes/paginas_html")
-        self.processed_dir = Path("temp/processed")
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         self.paginas_dir.mkdir(parents=True, exist_ok=True)
-        self.processed_dir.mkdir(parents=True, exist_ok=True)
 
         # === CHECKPOINT/RESUMO ===
-        self.checkpoint_file = Path("data/docentes/checkpoint.json")
-        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
-        self.siapes_processados = set()  # SIAPEs já processados no arquivo final
+        self.checkpoint = CheckpointJournal()
+        self.vistos = None  # SIAPEs já gravados; aberto em from_crawler
+        self.retomando = False  # há checkpoint a retomar
 
         # Controle do processo
         self.departamentos_fila = []
-        self.departamento_atual = 0
-        self.docentes_coletados = []
+        self.departamento_atual = 0  # departamentos concluídos
+        self.departamentos_pendentes = 0
+        self.docentes_coletados = self.checkpoint.docentes_coletados
+        self.siapes_enfileirados = set()
         self.total_docentes_processados = 0
-        self.indice_download_atual = 0
 
         # Carregar estado anterior se existir
         self._carregar_checkpoint()
@@ -684,9 +1195,16 @@ class DocentesOrquestradorSpider(scrapy.Spider):
         self.logger.info(
             "📋 Etapas: Departamentos → Docentes → Páginas → Extração")
 
-        if self.siapes_processados:
-            self.logger.info(
-                f"🔄 RESUMINDO: {len(self.siapes_processados)} docentes já processados")
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider._carregar_siapes_processados(crawler.settings)
+        return spider
+
+    @staticmethod
+    def chave_item(item):
+        """Chave do DeduplicacaoPipeline"""
+        return item.get("siape")
 
     def _limpar_temp(self):
         """Limpa arquivos temporários"""
@@ -697,7 +1215,7 @@ class DocentesOrquestradorSpider(scrapy.Spider):
             pass
 
     def parse(self, response):
-        """ETAPA 1: Coletagem departamentos e inicia processo sequencial"""
+        """ETAPA 1: Coleta departamentos e enfileira todas as buscas"""
         self.logger.info("📋 ETAPA 1: Coletando departamentos...")
 
         departamentos = response.css("select#form\\:departamento option")
@@ -715,28 +1233,27 @@ class DocentesOrquestradorSpider(scrapy.Spider):
         total_departamentos = len(self.departamentos_fila)
         self.logger.info(f"📊 Departamentos encontrados: {total_departamentos}")
 
-        # Iniciar coleta do primeiro departamento
-        if self.departamentos_fila:
-            first_request = self.processar_departamento_atual(response)
-            if first_request:
-                yield first_request
-
-    def processar_departamento_atual(self, response):
-        """ETAPA 2: Processa departamento atual"""
-        if self.departamento_atual >= len(self.departamentos_fila):
-            # Todos os departamentos processados, iniciar download de páginas
-            self.logger.info(
-                f"📊 Coleta de departamentos concluída. Iniciando download de páginas...")
-            # Retornar primeiro request de download
-            return self.criar_primeiro_request_download()
+        # Docentes do checkpoint que ainda não têm página processada
+        for docente in self.docentes_coletados:
+            request = self.criar_request_pagina(docente)
+            if request:
+                yield request
 
-        dept = self.departamentos_fila[self.departamento_atual]
-        posicao = self.departamento_atual + 1
-        total = len(self.departamentos_fila)
+        for dept in self.departamentos_fila:
+            if self._departamento_ja_processado(dept['id']):
+                continue
+            self.departamentos_pendentes += 1
+            yield self.criar_request_departamento(response, dept)
 
         self.logger.info(
-            f"📥 ETAPA 2: [{posicao}/{total}] Processando: {dept['nome']}")
+            f"📥 ETAPA 2: {self.departamentos_pendentes} buscas de departamento "
+            f"e {len(self.siapes_enfileirados)} páginas do checkpoint enfileiradas")
+
+        if not self.departamentos_pendentes:
+            self._concluir_coleta_departamentos()
 
+    def criar_request_departamento(self, response, dept):
+        """ETAPA 2: Busca dos docentes de um departamento"""
         return scrapy.FormRequest.from_response(
             response,
             formname='form',
@@ -745,108 +1262,120 @@ class DocentesOrquestradorSpider(scrapy.Spider):
                 'form:buscar': 'Buscar'
             },
             callback=self.coletar_docentes_departamento,
-            meta={
-                'departamento': dept,
-                'response_original': response
-            }
+            errback=self.falha_departamento,
+            priority=self.prioridade_departamento,
+            meta={'departamento': dept, 'sigaa_url_formulario': self.start_urls[0]},
+            dont_filter=True
         )
 
-    def criar_primeiro_request_download(self):
-        """Cria o primeiro request para download de páginas"""
-        total_docentes = len(self.docentes_coletados)
-        self.logger.info(
-            f"📥 ETAPA 3: Baixando {total_docentes} páginas de docentes...")
+    def criar_request_pagina(self, docente):
+        """ETAPA 3: Request da página de um docente (None se já enfileirado/processado)"""
+        siape = docente.get("siape", "unknown")
+        link_pagina = docente.get("link_pagina")
 
-        if not self.docentes_coletados:
-            self.logger.warning("❌ Nenhum docente coletado para download")
+        if not link_pagina:
             return None
+        if siape in self.vistos or siape in self.siapes_enfileirados:
+            return None
+        self.siapes_enfileirados.add(siape)
 
-        # Inicializar contador de downloads
-        self.indice_download_atual = 0
-
-        # Retornar primeiro request
-        primeiro_docente = self.docentes_coletados[0]
-        link_pagina = primeiro_docente.get("link_pagina")
-
-        if link_pagina:
-            url = f"https://sigaa.unb.br{link_pagina}" if link_pagina.startswith(
-                "/") else link_pagina
+        url = f"https://sigaa.unb.br{link_pagina}" if link_pagina.startswith(
+            "/") else link_pagina
 
-            return scrapy.Request(
-                url=url,
-                callback=self.baixar_e_processar_pagina,
-                meta={
-                    "docente": primeiro_docente,
-                    "posicao": 1,
-                    "total": total_docentes
-                },
-                dont_filter=True
-            )
-
-        return None
+        return scrapy.Request(
+            url=url,
+            callback=self.baixar_e_processar_pagina,
+            priority=self.prioridade_pagina,
+            meta={
+                "docente": docente,
+                "posicao": len(self.siapes_enfileirados),
+            },
+            dont_filter=True
+        )
 
     def coletar_docentes_departamento(self, response):
-        """Coleta docentes do departamento atual"""
+        """Coleta docentes de um departamento e enfileira suas páginas"""
         departamento = response.meta['departamento']
-        response_original = response.meta['response_original']
 
         # Verificar se há resultados
         tabela_resultados = response.css("table.listagem")
         if not tabela_resultados:
             self.logger.info(f"❌ Nenhum docente em: {departamento['nome']}")
-            self.departamento_atual += 1
-            yield self.processar_departamento_atual(response_original)
+            self._concluir_departamento(departamento)
             return
 
         # Extrair docentes
-        linhas_docentes = response.css("table.listagem tbody tr")
+        linhas_docentes = list(EXTRATOR_DOCENTES(response))
         total_docentes = len(linhas_docentes)
         self.logger.info(
             f"👥 Encontrados {total_docentes} docentes em {departamento['nome']}")
 
         for linha in linhas_docentes:
-            nome = linha.css("td:nth-child(2) span.nome::text").get()
+            nome = linha['nome']
 
             if nome:
-                link_pagina = linha.css(
-                    "td:nth-child(2) span.pagina a::attr(href)").get()
+                link_pagina = linha['link_pagina']
 
                 siape = None
                 if link_pagina and "siape=" in link_pagina:
                     siape = link_pagina.split("siape=")[1].split("&")[0]
 
-                docente_info = {
-                    'codigo_departamento': departamento['id'],
-                    'departamento': departamento['nome'],
-                    'nome_docente': nome.strip(),
-                    'siape': siape,
-                    'link_pagina': link_pagina,
-                    'processamento': 'orquestrador_completo'
-                }
+                docente_info = DocenteResumo(
+                    codigo_departamento=departamento['id'],
+                    departamento=departamento['nome'],
+                    nome_docente=nome,
+                    siape=siape,
+                    link_pagina=link_pagina,
+                    processamento='orquestrador_completo'
+                )
+
+                self.checkpoint.registrar_docente(docente_info)
 
-                self.docentes_coletados.append(docente_info)
+                request = self.criar_request_pagina(docente_info)
+                if request:
+                    yield request
 
-        # Avançar para próximo departamento
+        self._concluir_departamento(departamento)
+
+    def falha_departamento(self, failure):
+        """Registra a falha de uma busca sem travar a conclusão da etapa 2"""
+        departamento = failure.request.meta['departamento']
+        self.logger.error(
+            f"❌ Falha ao buscar docentes de {departamento['nome']}: {failure.value}")
+        self.departamentos_pendentes -= 1
+        if not self.departamentos_pendentes:
+            self._concluir_coleta_departamentos()
+
+    def _concluir_departamento(self, departamento):
+        """Contabiliza um departamento concluído e salva checkpoint periodicamente"""
         self.departamento_atual += 1
-        next_request = self.processar_departamento_atual(response_original)
-        if next_request:
-            yield next_request
+        self.departamentos_pendentes -= 1
+        self._marcar_departamento_processado(departamento['id'])
+
+        if not self.departamentos_pendentes:
+            self._concluir_coleta_departamentos()
+        elif self.departamento_atual % 10 == 0:
+            self._salvar_checkpoint()
+
+    def _concluir_coleta_departamentos(self):
+        self.logger.info(
+            f"📊 Coleta de departamentos concluída: {len(self.docentes_coletados)} docentes, "
+            f"{len(self.siapes_enfileirados)} páginas enfileiradas")
+        self._salvar_checkpoint()
 
     def baixar_e_processar_pagina(self, response):
         """ETAPA 4: Baixa página e extrai dados completos diretamente"""
         docente = response.meta["docente"]
         posicao = response.meta["posicao"]
-        total = response.meta["total"]
+        total = len(self.siapes_enfileirados)
 
         siape = docente.get("siape", "unknown")
         nome = docente.get("nome_docente", "N/A")
 
         # === VERIFICAR SE JÁ FOI PROCESSADO ===
-        if siape in self.siapes_processados:
+        if siape in self.vistos:
             self.logger.info(
                 f"⏭️ PULANDO [{posicao}/{total}]: {nome} (já processado)")
-            # Continuar para próximo sem processar
-            self._continuar_proximo_docente()
             return
 
         self.logger.info(
@@ -858,24 +1387,16 @@ class DocentesOrquestradorSpider(scrapy.Spider):
             f.write(response.text)
 
         # Extrair dados usando funções fixas
-        dados_extraidos = extrair_dados_perfil_docente(response)
-
-        # Extrair dados do Lattes
-        script_content = response.css(
-            "script:contains('var curriculo')::text").get()
-        if script_content:
-            dados_lattes = extrair_dados_curriculo_lattes(script_content)
-            if dados_lattes:
-                dados_extraidos["curriculo_lattes_dados"] = dados_lattes
+        dados_extraidos = extrair_dados_pagina_docente(response)
 
         # Combinar dados
-        dados_completos = {
-            **docente,  # Dados originais da coleta
+        dados_completos = DocenteCompleto.de_dict({
+            **docente.para_dict(),  # Dados originais da coleta
             **dados_extraidos,  # Dados extraídos da página
             "url_acessada": response.url,
             "timestamp_processamento": time.time(),
             "status_processamento": "sucesso_completo"
-        }
+        })
 
         # Limpar arquivo temporário
         try:
@@ -883,8 +1404,8 @@ class DocentesOrquestradorSpider(scrapy.Spider):
         except:
             pass
 
-        # Adicionar SIAPE aos processados
-        self.siapes_processados.add(siape)
+        # O SIAPE entra nos vistos quando o item já está na saída (DeduplicacaoPipeline)
+        self.checkpoint.registrar_siape(siape)
 
         self.total_docentes_processados += 1
         self.logger.info(
@@ -892,119 +1413,76 @@ class DocentesOrquestradorSpider(scrapy.Spider):
 
         yield dados_completos
 
-        # Continuar para próximo docente
-        self._continuar_proximo_docente()
-
-    def _continuar_proximo_docente(self):
-        """Continua processamento do próximo docente"""
-        # Verificar se há próximo docente para processar
-        if hasattr(self, 'indice_download_atual'):
-            self.indice_download_atual += 1
-
-            # Salvar checkpoint a cada 10 docentes processados
-            if self.total_docentes_processados % 10 == 0:
-                self._salvar_checkpoint()
-
-            if self.indice_download_atual < len(self.docentes_coletados):
-                # Criar request para próximo docente
-                proximo_docente = self.docentes_coletados[self.indice_download_atual]
-                siape_proximo = proximo_docente.get("siape", "unknown")
-
-                # Verificar se próximo já foi processado
-                if siape_proximo in self.siapes_processados:
-                    self.logger.info(
-                        f"⏭️ Pulando SIAPE {siape_proximo} (já processado)")
-                    self._continuar_proximo_docente()  # Recursão para próximo
-                    return
-
-                link_pagina = proximo_docente.get("link_pagina")
-
-                if link_pagina:
-                    url = f"https://sigaa.unb.br{link_pagina}" if link_pagina.startswith(
-                        "/") else link_pagina
-
-                    return scrapy.Request(
-                        url=url,
-                        callback=self.baixar_e_processar_pagina,
-                        meta={
-                            "docente": proximo_docente,
-                            "posicao": self.indice_download_atual + 1,
-                            "total": len(self.docentes_coletados)
-                        },
-                        dont_filter=True
-                    )
+        # Salvar checkpoint a cada 10 docentes processados
+        if self.total_docentes_processados % 10 == 0:
+            self._salvar_checkpoint()
 
     def _carregar_checkpoint(self):
-        """Carrega checkpoint anterior se existir"""
-        checkpoint = carregar_checkpoint()
-
-        if checkpoint:
-            self.departamento_atual = checkpoint.get('departamento_atual', 0)
-            self.docentes_coletados = checkpoint.get('docentes_coletados', [])
+        """Reconstrói o estado anterior a partir do journal, se existir"""
+        if self.checkpoint.carregar():
+            self.retomando = True
+            self.departamento_atual = self.checkpoint.departamento_atual
+            self.docentes_coletados = self.checkpoint.docentes_coletados
             total_coletados = len(self.docentes_coletados)
 
-            # Carregar SIAPEs já processados do arquivo final
-            self._carregar_siapes_processados()
-
             self.logger.info(f"📂 Checkpoint carregado:")
             self.logger.info(
                 f"   📋 Departamento atual: {self.departamento_atual}")
             self.logger.info(f"   👥 Docentes coletados: {total_coletados}")
-            self.logger.info(
-                f"   ✅ SIAPEs já processados: {len(self.siapes_processados)}")
         else:
             self.logger.info(
                 "📄 Nenhum checkpoint encontrado - Iniciando do zero")
 
-    def _carregar_siapes_processados(self):
-        """Carrega lista de SIAPEs já processados do arquivo final"""
-        arquivo_final = Path("data/docentes/docentes_test.jsonl")
-
-        if arquivo_final.exists():
-            try:
-                with open(arquivo_final, 'r', encoding='utf-8') as f:
-                    for linha in f:
-                        linha = linha.strip()
-                        if linha:
-                            try:
-                                docente = json.loads(linha)
-                                siape = docente.get('siape')
-                                if siape:
-                                    self.siapes_processados.add(siape)
-                            except json.JSONDecodeError:
-                                continue
-
-                self.logger.info(
-                    f"📊 SIAPEs já no arquivo final: {len(self.siapes_processados)}")
-            except Exception as e:
-                self.logger.warning(
-                    f"⚠️ Erro ao carregar SIAPEs processados: {e}")
+    def _carregar_siapes_processados(self, settings=None):
+        """
+        Abre o conjunto de SIAPEs vistos (semeado uma vez a partir do arquivo
+        final); sem checkpoint a coleta recomeça do zero e um conjunto que
+        tenha sobrado de outra execução é descartado
+        """
+        if not self.retomando:
+            remover_vistos(VISTOS_SIAPES)
+        self.vistos = abrir_vistos(VISTOS_SIAPES, settings)
+
+        if self.retomando and not len(self.vistos):
+            # Primeira execução com o conjunto: herda o journal e o arquivo final
+            arquivo_final = Path("data/docentes/docentes_test.jsonl")
+            siapes = set(self.checkpoint.siapes_concluidos)
+            if arquivo_final.exists():
+                try:
+                    siapes.update(IndiceSiape(arquivo_final).siapes())
+                except Exception as e:
+                    self.logger.warning(
+                        f"⚠️ Erro ao carregar SIAPEs processados: {e}")
+            for siape in siapes:
+                self.vistos.adicionar(siape)
+            if siapes:
+                self.vistos.compactar()
+
+        if len(self.vistos):
+            self.logger.info(
+                f"🔄 RESUMINDO: {len(self.vistos)} docentes já processados "
+                f"(carregados em {self.vistos.tempo_carga * 1000:.1f} ms)")
 
     def _salvar_checkpoint(self):
-        """Salva checkpoint atual"""
-        success = salvar_checkpoint(
-            self.departamento_atual,
-            len(self.departamentos_fila),
-            self.docentes_coletados
-        )
+        """Sincroniza o journal com o disco (compactando se necessário)"""
+        try:
+            self.checkpoint.sincronizar()
+            self.vistos.sincronizar()
+        except OSError as e:
+            self.logger.error(f"❌ Erro ao salvar checkpoint: {e}")
+            return
 
-        if success:
-            self.logger.info(
-                f"💾 Checkpoint salvo - Dept: {self.departamento_atual}/{len(self.departamentos_fila)}")
+        self.logger.info(
+            f"💾 Checkpoint salvo - Dept: {self.departamento_atual}/{len(self.departamentos_fila)}")
 
     def _departamento_ja_processado(self, dept_id):
         """Verifica se departamento já foi processado"""
-        flag_file = self.processed_dir / f"dept_{dept_id}_done.flag"
-        return flag_file.exists()
+        return dept_id in self.checkpoint.departamentos_concluidos
 
     def _marcar_departamento_processado(self, dept_id):
-        """Marca departamento como processado"""
-        flag_file = self.processed_dir / f"dept_{dept_id}_done.flag"
-        try:
-            flag_file.touch()
-        except Exception as e:
-            self.logger.warning(
-                f"⚠️ Erro ao marcar departamento processado: {e}")
+        """Marca departamento como processado (depois dos seus docentes no journal)"""
+        self.checkpoint.registrar_departamento(
+            dept_id, self.departamento_atual, len(self.departamentos_fila))
 
     def closed(self, reason):
         """Estatísticas finais"""
@@ -1018,6 +1496,14 @@ class DocentesOrquestradorSpider(scrapy.Spider):
             f"   ✅ Páginas processadas: {self.total_docentes_processados}")
         self.logger.info(f"   🏁 Motivo de encerramento: {reason}")
 
+        # Consolida o journal para a próxima retomada
+        try:
+            self.checkpoint.compactar()
+        except OSError as e:
+            self.logger.error(f"❌ Erro ao compactar checkpoint: {e}")
+        self.checkpoint.fechar()
+        self.vistos.fechar()
+
         # Limpeza final
         self._limpar_temp()
 
@@ -1,11 +1,129 @@
 import scrapy
 import os
-import glob
 import json
-from parsel import Selector
+from collections import Counter, deque
+from twisted.internet.defer import DeferredList, TimeoutError as DeferTimeoutError
+from twisted.internet.error import TCPTimedOutError, TimeoutError
+from twisted.internet.threads import deferToThread
+from twisted.web._newclient import ResponseFailed
+
+from sigaa import adaptador  # noqa: F401  (modelos como itens no ItemAdapter)
+from sigaa.acervo import AcervoHtml
+from sigaa.delta import EstadoEntidades, hash_conteudo
+from sigaa.items import Oferta
+from sigaa.listagem import EXTRATOR_TURMAS, extrair_turmas
+from sigaa.lote import (PADROES_DIVISAO_PADRAO, MapaDisciplinas, codigo_disciplina,
+                        motivo_divisao, turmas_do_lote)
+from sigaa.planejador import DESCONHECIDA, DIA, PROVAVEL, SONDAGEM, PlanejadorOfertas
+from sigaa.vistos import abrir_vistos
+
+
+URL_LISTAR = "https://sigaa.unb.br/sigaa/public/turmas/listar.jsf"
+
+
+def chave_acervo(ano, semestre, id_departamento):
+    """Chave da listagem de um departamento no acervo de HTMLs"""
+    return f'{ano}/{semestre}/{id_departamento}'
+
+
+def chave_lote(ano, semestre, nivel):
+    """
+    Chave de uma busca em lote (todos os departamentos) no acervo de HTMLs,
+    fora do prefixo <ano>/<semestre>/ das listagens por departamento
+    """
+    return f'lote/{ano}/{semestre}' + (f'/{nivel}' if nivel else '')
+
+
+def chave_turma(turma):
+    """Identidade de uma turma no delta (pareada na ordem da página)"""
+    return (turma.get('ano_periodo'), turma.get('codigo'))
+
+
+def chave_vista(turma):
+    """
+    Chave da turma no conjunto de vistos; o código (T01...) se repete entre
+    disciplinas do departamento, então docente/horário/local entram na chave
+    """
+    return (turma.get('id_departamento'), turma.get('ano_periodo'), turma.get('codigo'),
+            turma.get('docente'), turma.get('horario'), turma.get('local'))
+
+
+def _ordem_departamento(id_departamento):
+    """Ordena ids numéricos pelo valor, como em analise/extrair_ofertas.py"""
+    return (0, int(id_departamento), '') if id_departamento.isdigit() else (1, 0, id_departamento)
+
+
+def _ativado(valor):
+    """Interpreta argumentos -a do tipo liga/desliga"""
+    return str(valor).strip().lower() not in ('0', 'false', 'nao', 'não', 'no', '')
+
+
+def _lista_anos(valor):
+    """Anos de um argumento -a: '2025', '2019-2025' ou '2023,2025' (mais recentes primeiro)"""
+    anos = set()
+    for parte in str(valor).split(','):
+        inicio, _, fim = parte.strip().partition('-')
+        if inicio:
+            anos.update(range(int(inicio), int(fim or inicio) + 1))
+    return [str(ano) for ano in sorted(anos, reverse=True)]
 
 
 class OfertasSpider(scrapy.Spider):
+    """
+    Coleta as turmas ofertadas por departamento/ano/semestre.
+
+    O formulário JSF de ``listar.jsf`` é preenchido por um pool de sessões
+    independentes (cada uma com seu cookiejar e seu slot de download). Cada
+    sessão busca o ``javax.faces.ViewState`` uma única vez e o reaproveita
+    em POSTs consecutivos, já que a página de resultado traz um ViewState
+    novo; só volta a fazer GET quando o ViewState some da resposta. Uma busca
+    respondida com a view expirada é refeita pelo SessaoJsfMiddleware, com um
+    ViewState novo, antes de chegar ao ``parse``.
+
+    As turmas são extraídas da resposta ainda em memória e emitidas como
+    itens; o HTML bruto pode ser arquivado no acervo ``mock/acervo/``
+    (segmentos gzip, chave ``<ano>/<semestre>/<id>``) numa thread à parte,
+    sem bloquear o reactor.
+
+    No modo incremental, cada listagem departamento×período tem o hash do
+    conteúdo comparado com o da execução anterior (``data/ofertas/.estado/``);
+    páginas inalteradas não são extraídas nem arquivadas e só as turmas das
+    páginas que mudaram são emitidas. As mudanças vão para o log
+    ``data/ofertas/<ano>-<semestre>.mudancas.jsonl``, ao lado do JSONL
+    consolidado, que só é regravado ao compactar (sigaa/delta.py); turmas de
+    departamentos que saíram de ``departamentos.csv`` são removidas.
+
+    No modo lote (sigaa/lote.py), cada ano/semestre começa por uma única busca
+    com ``inputDepto`` em branco, analisada em fluxo e com as turmas
+    atribuídas aos departamentos pelo código da disciplina; se ela estoura o
+    timeout, vem truncada ou traz disciplinas de departamento desconhecido, o
+    semestre volta à fila como buscas por departamento.
+
+    Parâmetros:
+        sessoes: tamanho do pool (padrão: setting ``OFERTAS_SESSOES`` ou 4)
+        extrair: emite as turmas como itens (padrão: 1)
+        arquivar: salva o HTML bruto de cada busca (padrão: 1)
+        incremental: pula páginas inalteradas e mantém o JSONL consolidado (padrão: 0)
+        delta: no modo incremental, grava as turmas adicionadas/alteradas/
+            removidas em ``data/ofertas/delta/`` (padrão: 0)
+        retomar: pula departamento×período já concluídos e descarta turmas já
+            gravadas, pelo conjunto de vistos ``data/ofertas/.vistos/`` (padrão: 0)
+        anos: '2025', intervalo '2019-2025' ou lista '2023,2025' (padrão: 2025)
+        semestres: lista de períodos (padrão: 1,2,3,4)
+        planejar: usa o histórico de buscas vazias (sigaa/planejador.py) para
+            pular ou deixar por último departamento×semestre que nunca têm
+            turmas, com sondagens espaçadas (padrão: 0)
+        lote: uma busca por ano/semestre com todos os departamentos, dividida
+            em buscas por departamento quando necessário (padrão: 0)
+        nivel: valor de ``formTurma:inputNivel`` ('' = todos, 'G' = graduação...);
+            com nível definido o planejador não registra buscas (padrão: '')
+
+    USO: uv run scrapy crawl ofertas -a sessoes=6 -a arquivar=0 -o data/ofertas/2025-2.jsonl
+         uv run scrapy crawl ofertas -a anos=2015-2025 -a arquivar=0 -o data/ofertas/historico.jsonl
+         uv run scrapy crawl ofertas -a incremental=1 -a delta=1
+         uv run scrapy crawl ofertas -a retomar=1 -o data/ofertas/2025.jsonl
+         uv run scrapy crawl ofertas -a lote=1 -a arquivar=0 -o data/ofertas/2025.jsonl
+    """
     name = "ofertas"
     allowed_domains = ["sigaa.unb.br"]
     start_urls = [
@@ -13,104 +131,498 @@ class OfertasSpider(scrapy.Spider):
 
     custom_settings = {
         'DOWNLOAD_DELAY': 1,
-        'CONCURRENT_REQUESTS': 1,
     }
 
+    # Tentativas por tarefa antes de desistir do departamento (ou dividir o lote)
+    max_tentativas = 3
+
+    def __init__(self, sessoes=None, extrair='1', arquivar='1', incremental='0',
+                 delta='0', retomar='0', anos='2025', semestres='1,2,3,4', planejar='0',
+                 lote='0', nivel='', *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lote = _ativado(lote)
+        self.nivel = str(nivel).strip()
+        self.mapa = None  # aberto em from_crawler com lote=1
+        self.divisoes = 0
+        self.sessoes_ativas = set()
+        self.anos = _lista_anos(anos)
+        self.semestres = [semestre.strip() for semestre in str(semestres).split(',') if semestre.strip()]
+        self.planejar = _ativado(planejar)
+        self.planejador = None  # aberto em from_crawler com planejar=1
+        self.puladas = 0
+        self.sessoes = int(sessoes) if sessoes else None
+        self.extrair = _ativado(extrair)
+        self.arquivar = _ativado(arquivar)
+        self.incremental = _ativado(incremental)
+        self.delta = _ativado(delta)
+        self.retomar = _ativado(retomar)
+        self.vistos = None  # aberto em from_crawler com retomar=1
+        self.tarefas = deque()
+        self.acervo = AcervoHtml(os.path.abspath(os.path.join(
+            os.path.dirname(__file__), '..', '..', 'mock', 'acervo')))
+        self.gravacoes = set()  # Deferreds das gravações em andamento
+        self.ofertas_dir = os.path.abspath(os.path.join(
+            os.path.dirname(__file__), '..', '..', 'data', 'ofertas'))
+        self.estados = {}  # (ano, semestre) -> EstadoEntidades
+        self.ids_departamentos = set()  # de departamentos.csv, lido em start_requests
+        self.inalteradas = 0
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if spider.sessoes is None:
+            spider.sessoes = crawler.settings.getint('OFERTAS_SESSOES', 4)
+        spider.sessoes = max(1, spider.sessoes)
+        # Cada sessão usa seu próprio slot (1 requisição por vez, com o
+        # DOWNLOAD_DELAY próprio); o limite global precisa comportar o pool.
+        if (not crawler.settings.frozen
+                and crawler.settings.getint('CONCURRENT_REQUESTS') < spider.sessoes):
+            crawler.settings.set(
+                'CONCURRENT_REQUESTS', spider.sessoes, priority='spider')
+        if spider.planejar:
+            settings = crawler.settings
+            spider.planejador = PlanejadorOfertas(
+                os.path.join(spider.ofertas_dir, '.historico', 'planejador.json'),
+                limiar=settings.getint('OFERTAS_PLANO_LIMIAR', 2),
+                intervalo=settings.getfloat('OFERTAS_PLANO_SONDAGEM_DIAS', 30) * DIA,
+                intervalo_max=settings.getfloat('OFERTAS_PLANO_SONDAGEM_MAX_DIAS', 365) * DIA)
+        if spider.lote:
+            settings = crawler.settings
+            spider.mapa = MapaDisciplinas(
+                os.path.join(spider.ofertas_dir, '.historico', 'disciplinas.json'))
+            spider.timeout_lote = settings.getfloat('OFERTAS_LOTE_TIMEOUT', 120)
+            spider.limite_lote = settings.getint('OFERTAS_LOTE_LIMITE_TURMAS', 0)
+            spider.padroes_divisao = [
+                codificado
+                for padrao in settings.getlist('OFERTAS_LOTE_PADROES_DIVISAO', PADROES_DIVISAO_PADRAO)
+                for codificado in {padrao.encode('utf-8'), padrao.encode('latin-1', 'ignore')}]
+            spider.logger.info(f'📦 Modo lote: {len(spider.mapa)} disciplinas com departamento conhecido')
+        if spider.retomar:
+            spider.vistos = abrir_vistos(
+                os.path.join(spider.ofertas_dir, '.vistos', 'turmas.vistos'), crawler.settings)
+            spider.logger.info(
+                f'🔄 {len(spider.vistos)} chaves vistas '
+                f'(carregadas em {spider.vistos.tempo_carga * 1000:.1f} ms)')
+        return spider
+
+    def chave_item(self, item):
+        """Chave do DeduplicacaoPipeline"""
+        return chave_vista(item)
+
     def start_requests(self):
         import csv
         departamentos_path = os.path.abspath(os.path.join(os.path.dirname(
             __file__), '..', '..', 'data', 'unidades', 'departamentos.csv'))
         with open(departamentos_path, encoding='utf-8') as csvfile:
             reader = list(csv.DictReader(csvfile, delimiter=';'))
+        self.ids_departamentos = {row['id_departamento'] for row in reader}
 
-        # Defina os anos e semestres desejados
-        anos = ['2025']  # Adapte conforme necessário
-        semestres = ['1', '2', '3', '4']
-
-        for ano in anos:
-            for semestre in semestres:
-                for row in reader:
-                    depto_id = row['id_departamento']
-                    meta = {
-                        'departamento': row['nome_departamento'],
-                        'id_departamento': depto_id,
+        planejadas = []
+        for ano in self.anos:
+            for semestre in self.semestres:
+                departamentos = [
+                    (row['id_departamento'], row['nome_departamento']) for row in reader
+                    if self.vistos is None
+                    or ('departamento', ano, semestre, row['id_departamento']) not in self.vistos]
+                if self.lote and departamentos:
+                    self.tarefas.append({
+                        'departamento': 'TODOS',
+                        'id_departamento': '',
                         'ano': ano,
-                        'semestre': semestre
-                    }
-                    yield scrapy.Request(
-                        url="https://sigaa.unb.br/sigaa/public/turmas/listar.jsf?aba=p-ensino",
-                        callback=self.preencher_formulario,
-                        meta=meta,
-                        dont_filter=True
-                    )
+                        'semestre': semestre,
+                        'tentativas': 0,
+                        'lote': departamentos,
+                    })
+                else:
+                    planejadas.extend(self.planejar_departamentos(departamentos, ano, semestre))
+
+        # Prováveis primeiro, sondagens por último; dentro de cada classe, a
+        # ordem de anos (mais recentes primeiro), semestres e departamentos
+        planejadas.sort(key=lambda planejada: planejada[0])
+        self.tarefas.extend(tarefa for _, tarefa in planejadas)
+        if self.planejador is not None and not self.lote:
+            classes = {PROVAVEL: 0, DESCONHECIDA: 0, SONDAGEM: 0}
+            for classe, _ in planejadas:
+                classes[classe] += 1
+            self.logger.info(
+                f"🗺️ Plano: {classes[PROVAVEL]} prováveis, {classes[DESCONHECIDA]} sem "
+                f"histórico, {classes[SONDAGEM]} sondagens, {self.puladas} puladas")
+
+        total_sessoes = min(self.sessoes, len(self.tarefas))
+        self.logger.info(
+            f"🚀 {len(self.tarefas)} buscas distribuídas em {total_sessoes} sessões")
+
+        for sessao in range(total_sessoes):
+            yield self.abrir_sessao(sessao)
+
+    def planejar_departamentos(self, departamentos, ano, semestre):
+        """(classe do planejador, tarefa) das buscas por departamento de um período"""
+        planejadas = []
+        for id_departamento, nome in departamentos:
+            classe = DESCONHECIDA
+            if self.planejador is not None:
+                classe = self.planejador.classificar(id_departamento, ano, semestre)
+                if classe is None:
+                    self.puladas += 1
+                    continue
+            planejadas.append((classe, {
+                'departamento': nome,
+                'id_departamento': id_departamento,
+                'ano': ano,
+                'semestre': semestre,
+                'tentativas': 0,
+            }))
+        return planejadas
+
+    def abrir_sessao(self, sessao):
+        """GET em listar.jsf para obter um ViewState novo para a sessão"""
+        self.sessoes_ativas.add(sessao)
+        return scrapy.Request(
+            url="https://sigaa.unb.br/sigaa/public/turmas/listar.jsf?aba=p-ensino",
+            callback=self.preencher_formulario,
+            errback=self.falha_sessao,
+            meta={
+                'cookiejar': sessao,
+                'download_slot': f'ofertas-sessao-{sessao}',
+                'sessao': sessao,
+            },
+            dont_filter=True
+        )
 
     def preencher_formulario(self, response):
-        import re
+        """Envia a próxima busca da fila usando o ViewState da resposta"""
+        sessao = response.meta['sessao']
         viewstate = response.css(
             'input[name="javax.faces.ViewState"]::attr(value)').get()
-        depto_id = response.meta['id_departamento']
-        departamento = response.meta['departamento']
-        ano = response.meta['ano']
-        semestre = response.meta['semestre']
+
+        if not viewstate:
+            self.logger.warning(
+                f"⚠️ Sessão {sessao}: ViewState ausente, renovando sessão")
+            yield self.abrir_sessao(sessao)
+            return
+
+        tarefa = self.proxima_tarefa()
+        if tarefa is None:
+            self.sessoes_ativas.discard(sessao)
+            self.logger.info(f"✅ Sessão {sessao} encerrada (fila vazia)")
+            return
+
         formdata = {
             'formTurma': 'formTurma',
-            'formTurma:inputNivel': '',
-            'formTurma:inputDepto': depto_id,
-            'formTurma:inputAno': ano,
-            'formTurma:inputPeriodo': semestre,
-            'javax.faces.ViewState': viewstate or '',
+            'formTurma:inputNivel': self.nivel,
+            'formTurma:inputDepto': tarefa['id_departamento'],
+            'formTurma:inputAno': tarefa['ano'],
+            'formTurma:inputPeriodo': tarefa['semestre'],
+            'javax.faces.ViewState': viewstate,
             'formTurma:j_id_jsp_1370969402_11': 'Buscar',
         }
+        meta = {}
+        if 'lote' in tarefa:
+            # timeout e falhas decidem a divisão do lote em falha_sessao, sem
+            # passar pelas novas tentativas do RetryMiddleware
+            meta = {'download_timeout': self.timeout_lote, 'dont_retry': True}
         yield scrapy.FormRequest(
-            url="https://sigaa.unb.br/sigaa/public/turmas/listar.jsf",
+            url=URL_LISTAR,
             formdata=formdata,
             callback=self.parse,
+            errback=self.falha_sessao,
             meta={
-                'departamento': departamento,
-                'id_departamento': depto_id,
-                'ano': ano,
-                'semestre': semestre
-            }
+                **meta,
+                'cookiejar': response.meta['cookiejar'],
+                'download_slot': response.meta['download_slot'],
+                'sessao': sessao,
+                'tarefa': tarefa,
+                'departamento': tarefa['departamento'],
+                'id_departamento': tarefa['id_departamento'],
+                'ano': tarefa['ano'],
+                'semestre': tarefa['semestre'],
+                # SessaoJsfMiddleware: onde buscar um ViewState novo se a view expirar
+                'sigaa_url_formulario': self.start_urls[0],
+            },
+            dont_filter=True
         )
 
+    def proxima_tarefa(self):
+        """
+        Próxima tarefa da fila, reconsultando o planejador: uma busca vazia
+        desta execução (ex.: repetida após divisão do lote) pode ter tornado
+        dispensável uma combinação ainda na fila
+        """
+        while self.tarefas:
+            tarefa = self.tarefas.popleft()
+            if (self.planejador is None or tarefa['tentativas'] or 'lote' in tarefa
+                    or self.planejador.classificar(
+                        tarefa['id_departamento'], tarefa['ano'], tarefa['semestre']) is not None):
+                return tarefa
+            self.puladas += 1
+        return None
+
+    def registrar_plano(self, id_departamento, ano, semestre, total_turmas):
+        # com inputNivel definido, uma busca vazia não diz nada dos outros níveis
+        if self.planejador is not None and not self.nivel:
+            self.planejador.registrar(id_departamento, ano, semestre, total_turmas)
+
+    def falha_sessao(self, failure):
+        """Devolve a tarefa à fila e reabre a sessão após erro de rede"""
+        request = failure.request
+        sessao = request.meta['sessao']
+        tarefa = request.meta.get('tarefa')
+
+        if tarefa:
+            tarefa['tentativas'] += 1
+            if 'lote' in tarefa and (
+                    failure.check(TimeoutError, DeferTimeoutError, TCPTimedOutError, ResponseFailed)
+                    or tarefa['tentativas'] >= self.max_tentativas):
+                # lote pesado demais para o servidor: busca por departamento
+                yield from self.dividir(tarefa, f'{failure.type.__name__}: {failure.value}')
+            elif tarefa['tentativas'] < self.max_tentativas:
+                self.tarefas.append(tarefa)
+            else:
+                self.logger.error(
+                    f"❌ Desistindo de {tarefa['id_departamento']} "
+                    f"({tarefa['ano']}.{tarefa['semestre']}): {failure.value}")
+
+        self.logger.warning(
+            f"⚠️ Sessão {sessao}: falha em {request.url} ({failure.value})")
+        if self.tarefas:
+            yield self.abrir_sessao(sessao)
+        else:
+            self.sessoes_ativas.discard(sessao)
+
+    def dividir(self, tarefa, motivo, emitidas=None):
+        """
+        Devolve o período de uma busca em lote à fila como buscas por
+        departamento (na frente, passando pelo planejador) e reabre as sessões
+        que já tinham encerrado por falta de tarefas; ``emitidas`` são as
+        chaves (:func:`chave_vista`) das turmas que o lote já emitiu (com
+        repetições), que as buscas por departamento não emitem de novo
+        """
+        self.divisoes += 1
+        self.crawler.stats.inc_value('ofertas_lote/divisoes')
+        planejadas = self.planejar_departamentos(tarefa['lote'], tarefa['ano'], tarefa['semestre'])
+        planejadas.sort(key=lambda planejada: planejada[0])
+        if emitidas:
+            for _, planejada in planejadas:
+                planejada['emitidas'] = emitidas
+        self.tarefas.extendleft(reversed([tarefa for _, tarefa in planejadas]))
+        self.logger.warning(
+            f"✂️ Lote {tarefa['ano']}.{tarefa['semestre']} dividido em {len(planejadas)} "
+            f"buscas por departamento: {motivo}")
+
+        livres = [sessao for sessao in range(self.sessoes) if sessao not in self.sessoes_ativas]
+        for sessao in livres[:max(0, len(self.tarefas) - len(self.sessoes_ativas))]:
+            yield self.abrir_sessao(sessao)
+
+    def estado(self, ano, semestre):
+        """Estado incremental (hash + turmas por departamento) de um ano/semestre"""
+        if (ano, semestre) not in self.estados:
+            self.estados[(ano, semestre)] = EstadoEntidades(
+                os.path.join(self.ofertas_dir, '.estado', f'{ano}-{semestre}.json'),
+                chave_turma)
+        return self.estados[(ano, semestre)]
+
     def parse(self, response):
+        if 'lote' in response.meta['tarefa']:
+            yield from self.parse_lote(response)
+            yield from self.preencher_formulario(response)
+            return
+
         id_departamento = response.meta.get('id_departamento', '')
         ano = response.meta.get('ano', '')
         semestre = response.meta.get('semestre', '')
-        # Cria pasta para ano/semestre
-        base_dir = os.path.abspath(os.path.join(
-            os.path.dirname(__file__), '..', '..', 'mock', ano, semestre))
-        os.makedirs(base_dir, exist_ok=True)
-        file_path = os.path.join(base_dir, f'ofertas_{id_departamento}.html')
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        self.logger.info(f'Página salva: {file_path}')
-
-
-mock_dir = os.path.abspath(os.path.join(
-    os.path.dirname(__file__), '..', '..', 'mock'))
-saida_jsonl = os.path.abspath(os.path.join(os.path.dirname(
-    __file__), '..', '..', 'data', 'ofertas', '2025-2.jsonl'))
-
-with open(saida_jsonl, 'w', encoding='utf-8') as fout:
-    for html_path in glob.glob(os.path.join(mock_dir, 'ofertas_*.html')):
-        with open(html_path, encoding='utf-8') as f:
-            html = f.read()
-        sel = Selector(text=html)
-        id_departamento = os.path.basename(html_path).split('_')[
-            1].split('.')[0]
-        for row in sel.css('div#turmasAbertas table.listagem tbody tr'):
-            codigo = row.css('td.turma::text').get()
-            if not codigo:
+        if self.mapa is not None:
+            self.mapa.aprender(id_departamento, (
+                codigo_disciplina(titulo) for titulo in
+                response.css('tr.agrupador span.tituloDisciplina::text').getall()))
+
+        if self.incremental:
+            yield from self.parse_incremental(response, id_departamento, ano, semestre)
+            yield from self.preencher_formulario(response)
+            return
+
+        if self.arquivar:
+            self.arquivar_html(response, chave_acervo(ano, semestre, id_departamento))
+
+        if self.extrair:
+            total = 0
+            emitidas = response.meta['tarefa'].get('emitidas', ())
+            for oferta in extrair_turmas(response, id_departamento):
+                total += 1
+                if emitidas and emitidas[chave_vista(oferta)] > 0:
+                    emitidas[chave_vista(oferta)] -= 1
+                    continue  # já emitida pelo lote antes de ele se dividir
+                yield oferta
+            self.logger.info(
+                f'📚 {total} turmas em {id_departamento} ({ano}.{semestre})')
+            self.registrar_plano(id_departamento, ano, semestre, total)
+        elif self.planejador is not None:
+            self.registrar_plano(id_departamento, ano, semestre,
+                                 sum(1 for _ in extrair_turmas(response, id_departamento)))
+
+        if self.vistos is not None:
+            # Departamento×período concluído: a retomada não o busca de novo
+            # (gravado no conjunto só depois das turmas reservadas antes dele)
+            self.vistos.adicionar(('departamento', ano, semestre, id_departamento))
+
+        # A página de resultado traz o formulário com um ViewState novo,
+        # que a sessão reaproveita para a próxima busca da fila.
+        yield from self.preencher_formulario(response)
+
+    def parse_lote(self, response):
+        """
+        Distribui as turmas de uma busca em lote pelos departamentos do
+        período, ou divide o lote se a resposta não permite
+
+        Fora do modo incremental cada turma é emitida assim que a sua linha é
+        lida; se o lote ainda assim se dividir (disciplina sem departamento,
+        limite de turmas), as buscas por departamento descartam as turmas já
+        emitidas (``tarefa['emitidas']``). O modo incremental precisa das
+        turmas de cada departamento juntas para o hash da entidade.
+        """
+        tarefa = response.meta['tarefa']
+        ano, semestre = tarefa['ano'], tarefa['semestre']
+        motivo = motivo_divisao(response, self.padroes_divisao)
+        if motivo is not None:
+            yield from self.dividir(tarefa, motivo)
+            return
+
+        emitir = self.extrair and not self.incremental
+        emitidas = Counter()  # chave_vista não tem a disciplina: chaves repetidas contam
+        por_departamento = {}
+        contagem = {}
+        por_prefixo = {}
+        total = 0
+        for disciplina, turma in turmas_do_lote(response, EXTRATOR_TURMAS):
+            id_departamento, exato = self.mapa.atribuir(disciplina)
+            if id_departamento is None:
+                motivo = f'disciplina {disciplina or "?"} sem departamento conhecido'
+                break
+            total += 1
+            if self.limite_lote and total >= self.limite_lote:
+                motivo = f'{total} turmas, no limite de {self.limite_lote}'
+                break
+            if not exato:
+                por_prefixo[disciplina] = id_departamento
+            contagem[id_departamento] = contagem.get(id_departamento, 0) + 1
+            oferta = Oferta(id_departamento=id_departamento, **turma)
+            if emitir:
+                emitidas[chave_vista(oferta)] += 1
+                yield oferta
+            elif self.incremental:
+                por_departamento.setdefault(id_departamento, []).append(oferta)
+        if motivo is not None:
+            yield from self.dividir(tarefa, motivo, emitidas)
+            return
+
+        self.crawler.stats.inc_value('ofertas_lote/buscas')
+        self.logger.info(
+            f'📦 Lote {ano}.{semestre}: {total} turmas em {len(contagem)} departamentos')
+        if por_prefixo:
+            self.crawler.stats.inc_value('ofertas_lote/por_prefixo', len(por_prefixo))
+            self.logger.warning(
+                f'🔤 Lote {ano}.{semestre}: {len(por_prefixo)} disciplinas novas atribuídas '
+                f'pelo prefixo do código: ' + ', '.join(
+                    f'{disciplina}→{id_departamento}'
+                    for disciplina, id_departamento in sorted(por_prefixo.items())))
+        if self.arquivar:
+            self.arquivar_html(response, chave_lote(ano, semestre, self.nivel))
+
+        # departamentos do período sem turmas no lote também contam como buscados
+        ids = set(id_departamento for id_departamento, _ in tarefa['lote']) | set(contagem)
+        for id_departamento in sorted(ids, key=_ordem_departamento):
+            self.registrar_plano(id_departamento, ano, semestre, contagem.get(id_departamento, 0))
+            if self.incremental:
+                turmas = por_departamento.get(id_departamento, [])
+                # sem página por departamento: o hash da entidade é o das turmas
+                registros = [turma.para_dict() for turma in turmas]
+                estado = self.estado(ano, semestre)
+                hash_turmas = hash_conteudo(json.dumps(registros, ensure_ascii=False))
+                if estado.inalterado(id_departamento, hash_turmas):
+                    self.inalteradas += 1
+                    continue
+                estado.atualizar(id_departamento, hash_turmas, registros)
+                if self.extrair:
+                    yield from turmas
+            if self.vistos is not None:
+                self.vistos.adicionar(('departamento', ano, semestre, id_departamento))
+
+    def parse_incremental(self, response, id_departamento, ano, semestre):
+        """Extrai e emite só as listagens cujo conteúdo mudou desde a última execução"""
+        estado = self.estado(ano, semestre)
+        hash_pagina = hash_conteudo(response.body)
+        if estado.inalterado(id_departamento, hash_pagina):
+            self.registrar_plano(id_departamento, ano, semestre,
+                                 len(estado.entidades[id_departamento]['registros']))
+            self.inalteradas += 1
+            self.logger.debug(f'⏭️ {id_departamento} ({ano}.{semestre}) sem mudanças')
+            if self.vistos is not None:
+                self.vistos.adicionar(('departamento', ano, semestre, id_departamento))
+            return
+
+        if self.arquivar:
+            self.arquivar_html(response, chave_acervo(ano, semestre, id_departamento))
+
+        turmas = list(extrair_turmas(response, id_departamento))
+        self.registrar_plano(id_departamento, ano, semestre, len(turmas))
+        operacoes = estado.atualizar(
+            id_departamento, hash_pagina, [turma.para_dict() for turma in turmas])
+        self.logger.info(
+            f'📚 {len(turmas)} turmas em {id_departamento} ({ano}.{semestre}), '
+            f'{len(operacoes)} mudanças')
+        if self.extrair:
+            yield from turmas
+        if self.vistos is not None:
+            self.vistos.adicionar(('departamento', ano, semestre, id_departamento))
+
+    def closed(self, reason):
+        """Fecha o acervo após as gravações pendentes e conclui o modo incremental"""
+        if self.incremental:
+            self.concluir_incremental()
+        if self.vistos is not None:
+            self.vistos.fechar()
+        if self.mapa is not None:
+            self.mapa.salvar()
+            self.logger.info(
+                f'📦 {self.crawler.stats.get_value("ofertas_lote/buscas", 0)} buscas em lote, '
+                f'{self.divisoes} divididas por departamento')
+        if self.planejador is not None:
+            self.planejador.salvar()
+            self.logger.info(f'🗺️ {self.puladas} buscas puladas pelo planejador')
+        d = DeferredList(list(self.gravacoes))
+        d.addBoth(lambda _: self.acervo.fechar())
+        return d
+
+    def concluir_incremental(self):
+        """
+        Remove os departamentos extintos, persiste o estado e leva as mudanças
+        ao log da saída de cada semestre alterado
+        """
+        for (ano, semestre), estado in sorted(self.estados.items()):
+            if self.ids_departamentos:
+                for id_departamento in [id_departamento for id_departamento in estado.entidades
+                                        if id_departamento not in self.ids_departamentos]:
+                    estado.remover(id_departamento)
+            if not estado.alterado:
                 continue
-            oferta = {
-                'id_departamento': id_departamento,
-                'codigo': codigo.strip(),
-                'ano_periodo': row.css('td.anoPeriodo::text').get(default='').strip(),
-                'docente': row.css('td.nome::text').get(default='').strip(),
-                'horario': row.css('td:nth-child(4)::text').get(default='').strip(),
-                'vagas_ofertadas': row.css('td:nth-child(6)::text').get(default='').strip(),
-                'vagas_ocupadas': row.css('td:nth-child(7)::text').get(default='').strip(),
-                'local': row.css('td:nth-child(8)::text').get(default='').strip(),
-            }
-            fout.write(json.dumps(oferta, ensure_ascii=False) + '\n')
+            estado.salvar()
+            estado.gravar_saida(
+                os.path.join(self.ofertas_dir, f'{ano}-{semestre}.jsonl'),
+                ordem=_ordem_departamento)
+            if self.delta:
+                caminho = estado.gravar_delta(
+                    os.path.join(self.ofertas_dir, 'delta'), f'{ano}-{semestre}')
+                if caminho:
+                    self.logger.info(f'🔀 Delta {ano}-{semestre}: {caminho}')
+        self.logger.info(
+            f'📊 {self.inalteradas} listagens sem mudanças, '
+            f'{sum(len(e.operacoes) for e in self.estados.values())} turmas alteradas')
+
+    def arquivar_html(self, response, chave):
+        """Grava o HTML bruto no acervo fora da thread do reactor"""
+        d = deferToThread(self.acervo.gravar, chave, response.text)
+        self.gravacoes.add(d)
+        d.addCallbacks(
+            lambda gravada: gravada and self.logger.debug(f'Página arquivada: {chave}'),
+            lambda failure: self.logger.error(f'❌ Erro ao arquivar {chave}: {failure.value}'))
+        d.addBoth(lambda _: self.gravacoes.discard(d))
+
@@ -10,6 +10,9 @@ cmd = [
     'ofertas'
 ]
 
-print(f"Executando: {' '.join(cmd)} no diretório {PROJECT_DIR}")
+# Só como script: o SpiderLoader do Scrapy importa todos os módulos de
+# sigaa/spiders/, e o import não pode disparar um crawl
+if __name__ == '__main__':
+    print(f"Executando: {' '.join(cmd)} no diretório {PROJECT_DIR}")
 
-subprocess.run(cmd, cwd=PROJECT_DIR)
+    subprocess.run(cmd, cwd=PROJECT_DIR)
@@ -0,0 +1,341 @@
+"""
+Throttle adaptativo por classe de endpoint do SIGAA
+
+O AutoThrottle do Scrapy ajusta um único atraso por slot, só pela latência,
+e o projeto aplicava o mesmo DOWNLOAD_DELAY a tudo: uma página pública de
+docente (GET estático, barato) esperava tanto quanto uma busca JSF (POST
+que consulta o banco do SIGAA).
+
+Aqui cada requisição pertence a uma classe (o endpoint de sigaa.metricas:
+``listar.jsf``, ``busca_docentes.jsf``, ``portal_docente``,
+``curso/lista.jsf``...) e cada classe tem seu próprio atraso e sua própria
+concorrência, ajustados por AIMD a cada resposta:
+
+    sobrecarga   5xx/429, página de erro do SIGAA ou falha de download:
+                 concorrência cai pela metade, atraso dobra
+    lentidão     latência média acima de ``SIGAA_THROTTLE_FATOR_LENTIDAO``
+                 vezes a menor já vista: atraso sobe até latência/concorrência
+    normal       atraso cai 10%; a cada ``SIGAA_THROTTLE_JANELA`` respostas
+                 normais seguidas, concorrência +1 até o máximo da classe
+
+Requisições sem ``download_slot`` próprio vão para um slot por classe
+(``<host>#<classe>``), que recebe atraso e concorrência da classe já ao ser
+criado pelo downloader. Slots definidos pelo spider (as sessões JSF do
+OfertasSpider) recebem o atraso; a concorrência da classe vale para a soma
+de todos os seus slots: :class:`ThrottleSigaaMiddleware` só deixa a
+requisição seguir para o downloader quando há vaga na classe (4 sessões
+contra ``listar.jsf`` com concorrência 1 fazem uma busca por vez). O atraso
+nunca fica abaixo do DOWNLOAD_DELAY do spider.
+
+Status e falhas de download são avaliados pelos sinais do downloader; o
+corpo, não: no ``response_downloaded`` ele ainda está comprimido (gzip). A
+resposta é avaliada por :class:`ThrottleSigaaMiddleware`, downloader
+middleware logo abaixo do HttpCompressionMiddleware (590), que a repassa à
+extensão já descomprimida.
+
+Settings: SIGAA_THROTTLE_ENABLED, SIGAA_THROTTLE_CLASSES (sobrescreve os
+parâmetros de :data:`CLASSES_PADRAO` por classe), SIGAA_THROTTLE_JANELA,
+SIGAA_THROTTLE_FATOR_LENTIDAO, SIGAA_THROTTLE_PADROES_ERRO,
+SIGAA_THROTTLE_DEBUG.
+"""
+import logging
+from collections import deque
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet.defer import Deferred
+
+from sigaa.metricas import endpoint
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros por classe; '*' vale para endpoints sem entrada própria
+CLASSES_PADRAO = {
+    # buscas JSF: consultas pesadas no servidor
+    'listar.jsf': {'atraso': 1.0, 'atraso_min': 0.5, 'atraso_max': 30.0,
+                   'concorrencia': 1, 'concorrencia_max': 2},
+    'busca_docentes.jsf': {'atraso': 1.0, 'atraso_min': 0.5, 'atraso_max': 30.0,
+                           'concorrencia': 1, 'concorrencia_max': 2},
+    # páginas públicas estáticas
+    'portal_docente': {'atraso': 0.25, 'atraso_min': 0.0, 'atraso_max': 10.0,
+                       'concorrencia': 2, 'concorrencia_max': 8},
+    'curso/lista.jsf': {'atraso': 0.25, 'atraso_min': 0.0, 'atraso_max': 10.0,
+                        'concorrencia': 1, 'concorrencia_max': 4},
+    '*': {'atraso': 0.5, 'atraso_min': 0.1, 'atraso_max': 10.0,
+          'concorrencia': 1, 'concorrencia_max': 4},
+}
+
+# Trechos das páginas de erro do SIGAA (respondidas com status 200)
+PADROES_ERRO_PADRAO = ['Comportamento Inesperado', 'Erro Interno', 'java.lang.']
+
+STATUS_SOBRECARGA = {429}
+
+# Menor atraso aplicado depois de uma sobrecarga, mesmo com atraso_min 0
+PASSO_MINIMO = 0.25
+
+
+class EstadoClasse:
+    """Atraso, concorrência e latência observada de uma classe de endpoint"""
+
+    def __init__(self, nome, atraso, atraso_min, atraso_max, concorrencia, concorrencia_max,
+                 piso=0.0):
+        # piso: DOWNLOAD_DELAY do spider, abaixo do qual o atraso nunca vai
+        self.nome = nome
+        self.atraso = max(atraso, piso)
+        self.atraso_min = max(atraso_min, piso)
+        self.atraso_max = max(atraso_max, piso)
+        self.concorrencia = concorrencia
+        self.concorrencia_max = concorrencia_max
+        self.latencia = None  # média móvel exponencial
+        self.latencia_base = None  # menor média já vista
+        self.normais = 0
+        self.slots_proprios = set()
+        self.slots_externos = set()
+        self.em_andamento = 0  # requisições da classe no downloader
+        self.esperando = deque()  # Deferreds de requisições à espera de vaga
+
+    def reservar_vaga(self):
+        """None se há vaga; senão um Deferred disparado quando abrir uma"""
+        if self.em_andamento < self.concorrencia:
+            self.em_andamento += 1
+            return None
+        espera = Deferred()
+        self.esperando.append(espera)
+        return espera
+
+    def liberar_vaga(self):
+        self.em_andamento -= 1
+        self.despachar()
+
+    def despachar(self):
+        """Passa as vagas livres (inclusive as abertas por aumento de concorrência) à fila"""
+        while self.esperando and self.em_andamento < self.concorrencia:
+            self.em_andamento += 1
+            self.esperando.popleft().callback(None)
+
+    def sobrecarga(self):
+        self.normais = 0
+        self.concorrencia = max(1, self.concorrencia // 2)
+        self.atraso = min(self.atraso_max, max(self.atraso * 2, self.atraso_min, PASSO_MINIMO))
+
+    def resposta(self, latencia, janela, fator_lentidao):
+        """Registra uma resposta sem erro; devolve True se a classe está lenta"""
+        self.latencia = latencia if self.latencia is None else 0.8 * self.latencia + 0.2 * latencia
+        if self.latencia_base is None or self.latencia < self.latencia_base:
+            self.latencia_base = self.latencia
+
+        if self.latencia > fator_lentidao * self.latencia_base:
+            self.normais = 0
+            self.atraso = min(self.atraso_max,
+                              max(self.atraso, self.latencia / self.concorrencia))
+            return True
+
+        self.atraso = max(self.atraso_min, self.atraso * 0.9)
+        self.normais += 1
+        if self.normais >= janela:
+            self.normais = 0
+            self.concorrencia = min(self.concorrencia_max, self.concorrencia + 1)
+        return False
+
+
+class ThrottleSigaa:
+    """Extensão que distribui as requisições em slots por classe e os ajusta"""
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        if not settings.getbool('SIGAA_THROTTLE_ENABLED'):
+            raise NotConfigured
+        if settings.getbool('AUTOTHROTTLE_ENABLED'):
+            logger.warning('⚠️ AUTOTHROTTLE_ENABLED e SIGAA_THROTTLE_ENABLED ligados: '
+                           'os dois ajustam o atraso dos mesmos slots')
+
+        self.crawler = crawler
+        self.parametros = {nome: dict(valores) for nome, valores in CLASSES_PADRAO.items()}
+        for nome, valores in settings.getdict('SIGAA_THROTTLE_CLASSES').items():
+            self.parametros[nome] = {**self.parametros.get(nome, self.parametros['*']), **valores}
+        self.janela = settings.getint('SIGAA_THROTTLE_JANELA', 10)
+        self.fator_lentidao = settings.getfloat('SIGAA_THROTTLE_FATOR_LENTIDAO', 3.0)
+        self.padroes_erro = [
+            codificado
+            for padrao in settings.getlist('SIGAA_THROTTLE_PADROES_ERRO', PADROES_ERRO_PADRAO)
+            for codificado in {padrao.encode('utf-8'), padrao.encode('latin-1', 'ignore')}]
+        self.debug = settings.getbool('SIGAA_THROTTLE_DEBUG')
+        self.piso = settings.getfloat('DOWNLOAD_DELAY')
+        self.classes = {}
+        crawler.sigaa_throttle = self  # para o ThrottleSigaaMiddleware
+
+        crawler.signals.connect(self.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(self.request_reached_downloader,
+                                signal=signals.request_reached_downloader)
+        crawler.signals.connect(self.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(self.request_left_downloader,
+                                signal=signals.request_left_downloader)
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def spider_opened(self, spider):
+        # o mesmo atraso que o downloader daria aos slots (download_delay do spider)
+        self.piso = getattr(spider, 'download_delay', self.piso)
+
+    def classe(self, request):
+        nome = endpoint(request.url)
+        estado = self.classes.get(nome)
+        if estado is None:
+            parametros = self.parametros.get(nome, self.parametros['*'])
+            estado = self.classes[nome] = EstadoClasse(nome, **parametros, piso=self.piso)
+        return estado
+
+    def request_scheduled(self, request, spider):
+        if 'download_slot' not in request.meta:
+            request.meta['download_slot'] = (
+                f'{urlparse_cached(request).hostname}#{self.classe(request).nome}')
+
+    def request_reached_downloader(self, request, spider):
+        # o slot acabou de ser criado (ou reaproveitado): sem isto, a primeira
+        # leva de requisições sairia com DOWNLOAD_DELAY/CONCURRENT_REQUESTS_*
+        estado = self.classe(request)
+        chave = self._registrar_slot(estado, request)
+        slot = self.crawler.engine.downloader.slots.get(chave) if chave else None
+        if slot is not None:
+            self._ajustar_slot(estado, chave, slot)
+
+    def response_downloaded(self, response, request, spider):
+        # a resposta em si é avaliada em avaliar(), chamado pelo middleware
+        request.meta['sigaa_throttle_resposta'] = True
+        request.meta['sigaa_throttle_avaliar'] = True
+
+    def avaliar(self, request, response, spider):
+        """Resposta já descomprimida de uma requisição que passou pelo downloader"""
+        estado = self.classe(request)
+        latencia = request.meta.get('download_latency')
+
+        if response.status >= 500 or response.status in STATUS_SOBRECARGA or self._pagina_erro(response):
+            estado.sobrecarga()
+            self._contar(estado, 'sobrecargas')
+            motivo = f'status {response.status}'
+        elif latencia is not None:
+            lenta = estado.resposta(latencia, self.janela, self.fator_lentidao)
+            if lenta:
+                self._contar(estado, 'lentas')
+            motivo = 'lenta' if lenta else None
+        else:
+            return
+        self._aplicar(estado, request, spider, motivo, latencia)
+
+    def request_left_downloader(self, request, spider):
+        estado = self.classe(request)
+        self.liberar_vaga(request, estado)
+        # sem response_downloaded antes: a requisição saiu com exceção
+        # (timeout, conexão recusada...)
+        if request.meta.pop('sigaa_throttle_resposta', False):
+            return
+        estado.sobrecarga()
+        self._contar(estado, 'falhas')
+        self._aplicar(estado, request, spider, 'falha de download', None)
+
+    def reservar_vaga(self, request):
+        """Vaga na concorrência da classe (None, ou Deferred até abrir uma)"""
+        request.meta['sigaa_throttle_vaga'] = True
+        return self.classe(request).reservar_vaga()
+
+    def liberar_vaga(self, request, estado=None):
+        if request.meta.pop('sigaa_throttle_vaga', False):
+            (estado or self.classe(request)).liberar_vaga()
+
+    def _pagina_erro(self, response):
+        if response.status != 200:
+            return False
+        corpo = response.body
+        return any(padrao in corpo for padrao in self.padroes_erro)
+
+    def _registrar_slot(self, estado, request):
+        chave = request.meta.get('download_slot')
+        if chave is None:
+            return None
+        if chave.endswith(f'#{estado.nome}'):
+            estado.slots_proprios.add(chave)
+        else:
+            estado.slots_externos.add(chave)
+        return chave
+
+    @staticmethod
+    def _ajustar_slot(estado, chave, slot):
+        slot.delay = estado.atraso
+        if chave in estado.slots_proprios:
+            slot.concurrency = estado.concorrencia
+
+    def _aplicar(self, estado, request, spider, motivo, latencia):
+        """Leva atraso/concorrência da classe a todos os seus slots"""
+        self._registrar_slot(estado, request)
+        slots = self.crawler.engine.downloader.slots
+        for chave_slot in estado.slots_proprios | estado.slots_externos:
+            slot = slots.get(chave_slot)
+            if slot is not None:
+                self._ajustar_slot(estado, chave_slot, slot)
+        estado.despachar()
+
+        if self.debug or motivo:
+            nivel = logging.INFO if self.debug else logging.DEBUG
+            logger.log(nivel, '🚦 %(classe)s: atraso %(atraso).0f ms, concorrência %(conc)d, '
+                       'latência %(latencia)s%(motivo)s', {
+                           'classe': estado.nome,
+                           'atraso': estado.atraso * 1000,
+                           'conc': estado.concorrencia,
+                           'latencia': f'{latencia * 1000:.0f} ms' if latencia is not None else '-',
+                           'motivo': f' ({motivo})' if motivo else '',
+                       }, extra={'spider': spider})
+
+    def _contar(self, estado, evento):
+        self.crawler.stats.inc_value(f'sigaa_throttle/{estado.nome}/{evento}')
+
+    def spider_closed(self, spider):
+        stats = self.crawler.stats
+        for nome, estado in sorted(self.classes.items()):
+            stats.set_value(f'sigaa_throttle/{nome}/atraso_final', round(estado.atraso, 3))
+            stats.set_value(f'sigaa_throttle/{nome}/concorrencia_final', estado.concorrencia)
+            if estado.latencia is not None:
+                stats.set_value(f'sigaa_throttle/{nome}/latencia_media', round(estado.latencia, 3))
+
+
+class ThrottleSigaaMiddleware:
+    """
+    Downloader middleware que limita a concorrência de cada classe somando
+    todos os seus slots e entrega ao ThrottleSigaa as respostas já
+    descomprimidas, para a detecção das páginas de erro do SIGAA
+
+    Fica na ordem 585: abaixo do HttpCompressionMiddleware (590) e acima do
+    SessaoJsfMiddleware (580), que troca as páginas de sessão expirada por
+    uma nova requisição. No ``process_request`` a requisição espera uma vaga
+    na classe, devolvida quando ela sai do downloader
+    (``request_left_downloader``); as respondidas pelo cache do
+    SigaaDownloaderMiddleware (543) param antes e não ocupam vaga nem são
+    avaliadas.
+    """
+
+    def __init__(self, throttle):
+        self.throttle = throttle
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        throttle = getattr(crawler, 'sigaa_throttle', None)
+        if throttle is None:
+            raise NotConfigured
+        return cls(throttle)
+
+    def process_request(self, request, spider):
+        return self.throttle.reservar_vaga(request)
+
+    def process_response(self, request, response, spider):
+        # resposta sem passar pelo downloader (de um middleware acima)
+        self.throttle.liberar_vaga(request)
+        if request.meta.pop('sigaa_throttle_avaliar', False):
+            self.throttle.avaliar(request, response, spider)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self.throttle.liberar_vaga(request)
@@ -0,0 +1,257 @@
+"""
+Conjunto persistente de chaves já vistas (SIAPEs, turmas)
+
+Para retomar uma coleta basta saber *se* um registro já foi gravado, sem
+reler o JSONL de saída. Cada chave (string ou tupla) vira um inteiro de 64
+bits (blake2b) e o conjunto fica em dois arquivos:
+
+    <nome>.vistos       base: cabeçalho + array ordenado de uint64 (ou os
+                        bits do filtro de Bloom), carregada com um único
+                        ``frombytes``
+    <nome>.vistos.log   chaves adicionadas desde a última compactação,
+                        8 bytes cada, só acrescentadas
+
+A busca no modo exato é uma bisseção no array (mais um set com as chaves do
+log). No modo Bloom o tamanho é fixo pela capacidade e taxa de erro, ao
+custo de falsos positivos: uma chave nova pode ser dada como vista.
+
+Uma chave reservada (``reservar``) já conta como vista na execução, mas só
+vai para o log depois de ``confirmar``, e na ordem das reservas: o
+DeduplicacaoPipeline reserva a chave do item e a confirma quando o item já
+está na saída. Uma chave adicionada enquanto há reservas pendentes (ex.: um
+departamento concluído) espera as reservas anteriores a ela.
+"""
+import hashlib
+import math
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+
+MAGICO = b'SGVS'
+VERSAO = 1
+# mágico, versão, modo (0 exato, 1 bloom), total de chaves, bits, hashes
+CABECALHO = struct.Struct('<4sBBQQI')
+
+# Chaves no log antes de compactar automaticamente na sincronização
+COMPACTAR_A_CADA = 50_000
+
+
+def hash_chave(chave):
+    """Inteiro de 64 bits de uma chave (tuplas viram campos separados por \\x1f)"""
+    if isinstance(chave, (tuple, list)):
+        chave = '\x1f'.join('' if parte is None else str(parte) for parte in chave)
+    return int.from_bytes(
+        hashlib.blake2b(str(chave).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class ConjuntoVistos:
+    """
+    Conjunto de chaves vistas, persistido em disco e atualizado por append
+
+    Args:
+        arquivo: caminho da base (ex.: data/docentes/.vistos/siapes.vistos)
+        bloom: usa filtro de Bloom em vez do array exato (só vale na criação;
+            uma base existente mantém o seu modo)
+        capacidade: chaves previstas, para dimensionar o filtro de Bloom
+        taxa_erro: taxa de falsos positivos do filtro de Bloom
+    """
+
+    def __init__(self, arquivo, bloom=False, capacidade=1_000_000, taxa_erro=0.001):
+        self.arquivo = Path(arquivo)
+        self.log = self.arquivo.with_name(self.arquivo.name + '.log')
+        self.bloom = bloom
+        self.total = 0
+        self.base = array('Q')  # modo exato: hashes ordenados
+        self.novos = set()  # modo exato: hashes do log
+        self.bits = None  # modo Bloom
+        self.reservas = OrderedDict()  # hash -> confirmado, na ordem das reservas
+        self.num_bits = 0
+        self.num_hashes = 0
+        self._arquivo_log = None
+        self._pendentes = 0
+
+        inicio = time.perf_counter()
+        self._carregar(capacidade, taxa_erro)
+        self.tempo_carga = time.perf_counter() - inicio
+
+    def _carregar(self, capacidade, taxa_erro):
+        dados = self.arquivo.read_bytes() if self.arquivo.exists() else b''
+        if len(dados) >= CABECALHO.size:
+            magico, versao, modo, total, num_bits, num_hashes = CABECALHO.unpack_from(dados)
+            if magico != MAGICO or versao != VERSAO:
+                raise ValueError(f'{self.arquivo} não é um conjunto de vistos')
+            self.bloom = modo == 1
+            self.total = total
+            corpo = memoryview(dados)[CABECALHO.size:]
+            if self.bloom:
+                self.bits = bytearray(corpo)
+                self.num_bits, self.num_hashes = num_bits, num_hashes
+            else:
+                self.base.frombytes(corpo)
+        elif self.bloom:
+            # Dimensionamento clássico: m = -n ln p / ln² 2, k = m/n ln 2
+            self.num_bits = max(64, int(-capacidade * math.log(taxa_erro) / math.log(2) ** 2))
+            self.num_hashes = max(1, round(self.num_bits / capacidade * math.log(2)))
+            self.bits = bytearray((self.num_bits + 7) // 8)
+
+        if self.log.exists():
+            registros = self.log.read_bytes()
+            registros = registros[:len(registros) - len(registros) % 8]  # gravação parcial
+            for valor in array('Q', registros):
+                self._incluir(valor)
+
+    # --- consulta ------------------------------------------------------
+
+    def _posicoes(self, valor):
+        # Hashing duplo a partir das duas metades do hash de 64 bits
+        h1, h2 = valor & 0xFFFFFFFF, (valor >> 32) | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def _contem(self, valor):
+        if valor in self.reservas:
+            return True
+        if self.bloom:
+            return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._posicoes(valor))
+        if valor in self.novos:
+            return True
+        i = bisect_left(self.base, valor)
+        return i < len(self.base) and self.base[i] == valor
+
+    def __contains__(self, chave):
+        return self._contem(hash_chave(chave))
+
+    def __len__(self):
+        return self.total
+
+    # --- atualização ---------------------------------------------------
+
+    def _incluir(self, valor):
+        """Marca o hash como visto; False se já estava"""
+        if self._contem(valor):
+            return False
+        self._marcar(valor)
+        return True
+
+    def _marcar(self, valor):
+        if self.bloom:
+            for p in self._posicoes(valor):
+                self.bits[p >> 3] |= 1 << (p & 7)
+        else:
+            self.novos.add(valor)
+        self.total += 1
+
+    def adicionar(self, chave):
+        """
+        Adiciona a chave (e registra no log, depois das reservas pendentes);
+        False se já tinha sido vista
+        """
+        valor = hash_chave(chave)
+        if self._contem(valor):
+            return False
+        if self.reservas:
+            self.reservas[valor] = True
+        else:
+            self._gravar(valor)
+        return True
+
+    def reservar(self, chave):
+        """Marca a chave como vista nesta execução, sem gravar; False se já vista"""
+        valor = hash_chave(chave)
+        if self._contem(valor):
+            return False
+        self.reservas[valor] = False
+        return True
+
+    def confirmar(self, chave):
+        """Libera a reserva; grava as reservas confirmadas do início da fila"""
+        valor = hash_chave(chave)
+        if valor not in self.reservas:
+            return
+        self.reservas[valor] = True
+        while self.reservas:
+            valor, confirmado = next(iter(self.reservas.items()))
+            if not confirmado:
+                break
+            self.reservas.popitem(last=False)
+            self._gravar(valor)
+
+    def _gravar(self, valor):
+        self._marcar(valor)
+        if self._arquivo_log is None:
+            self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo_log = open(self.log, 'ab')
+        self._arquivo_log.write(valor.to_bytes(8, 'little'))
+        self._pendentes += 1
+
+    def sincronizar(self, fsync=True):
+        """Descarrega o log; compacta se ele passou de COMPACTAR_A_CADA chaves"""
+        if self._arquivo_log is not None:
+            self._arquivo_log.flush()
+            if fsync:
+                os.fsync(self._arquivo_log.fileno())
+        if self._pendentes >= COMPACTAR_A_CADA:
+            self.compactar()
+
+    def compactar(self):
+        """Regrava a base com todas as chaves e esvazia o log"""
+        if not self.bloom and self.novos:
+            self.base = array('Q', sorted({*self.base, *self.novos}))
+            self.novos = set()
+        corpo = self.bits if self.bloom else self.base.tobytes()
+        cabecalho = CABECALHO.pack(MAGICO, VERSAO, int(self.bloom), self.total,
+                                   self.num_bits, self.num_hashes)
+
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.arquivo.with_name(self.arquivo.name + '.tmp')
+        with open(temporario, 'wb') as f:
+            f.write(cabecalho)
+            f.write(corpo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.arquivo)
+
+        # Com a base no lugar, o log pode recomeçar
+        if self._arquivo_log is not None:
+            self._arquivo_log.close()
+            self._arquivo_log = None
+        self.log.unlink(missing_ok=True)
+        self._pendentes = 0
+
+    def fechar(self):
+        """
+        Compacta (se houve chaves novas) e fecha o log; reservas não
+        confirmadas, e o que esperava por elas, não são gravadas
+        """
+        self.reservas.clear()
+        if self._pendentes or self.log.exists():
+            self.compactar()
+        elif self._arquivo_log is not None:
+            self._arquivo_log.close()
+            self._arquivo_log = None
+
+
+def remover_vistos(arquivo):
+    """Apaga a base e o log de um conjunto; devolve os arquivos removidos"""
+    arquivo = Path(arquivo)
+    removidos = []
+    for caminho in (arquivo, arquivo.with_name(arquivo.name + '.log')):
+        if caminho.exists():
+            caminho.unlink()
+            removidos.append(caminho)
+    return removidos
+
+
+def abrir_vistos(arquivo, settings=None):
+    """ConjuntoVistos com o modo e o dimensionamento dos settings SIGAA_VISTOS_*"""
+    if settings is None:
+        return ConjuntoVistos(arquivo)
+    return ConjuntoVistos(
+        arquivo,
+        bloom=settings.getbool('SIGAA_VISTOS_BLOOM'),
+        capacidade=settings.getint('SIGAA_VISTOS_CAPACIDADE', 1_000_000),
+        taxa_erro=settings.getfloat('SIGAA_VISTOS_TAXA_ERRO', 0.001),
+    )
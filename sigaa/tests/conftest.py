@@ -0,0 +1,5 @@
+from scrapy.utils.reactor import install_reactor, is_reactor_installed
+
+# get_crawler confere o reactor instalado com o TWISTED_REACTOR dos settings
+if not is_reactor_installed():
+    install_reactor('twisted.internet.asyncioreactor.AsyncioSelectorReactor')
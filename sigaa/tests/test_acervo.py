@@ -0,0 +1,32 @@
+"""Índice do AcervoHtml (sigaa/acervo.py) com gravação interrompida"""
+from sigaa.acervo import INDICE, AcervoHtml
+
+
+def acervo_com_linha_incompleta(pasta):
+    with AcervoHtml(pasta) as acervo:
+        acervo.gravar('ofertas/2025/1/508', '<html>508</html>')
+    with open(pasta / INDICE, 'a', encoding='utf-8') as f:
+        f.write('{"chave": "ofertas/2025/1/6')
+    return (pasta / INDICE).read_bytes()
+
+
+def test_leitor_ignora_linha_incompleta_sem_alterar_o_indice(tmp_path):
+    conteudo = acervo_com_linha_incompleta(tmp_path)
+
+    acervo = AcervoHtml(tmp_path)
+
+    assert acervo.chaves() == ['ofertas/2025/1/508']
+    assert acervo.ler_texto('ofertas/2025/1/508') == '<html>508</html>'
+    assert (tmp_path / INDICE).read_bytes() == conteudo
+
+
+def test_gravador_descarta_linha_incompleta_ao_abrir_o_indice(tmp_path):
+    acervo_com_linha_incompleta(tmp_path)
+
+    with AcervoHtml(tmp_path) as acervo:
+        acervo.gravar('ofertas/2025/1/673', '<html>673</html>')
+
+    linhas = (tmp_path / INDICE).read_text(encoding='utf-8').splitlines()
+    assert [linha[:32] for linha in linhas] == [
+        '{"chave": "ofertas/2025/1/508", ', '{"chave": "ofertas/2025/1/673", ']
+    assert sorted(AcervoHtml(tmp_path).chaves()) == ['ofertas/2025/1/508', 'ofertas/2025/1/673']
@@ -0,0 +1,90 @@
+"""Journal de checkpoint do orquestrador de docentes (sigaa/spiders/docentes.py)"""
+import json
+from pathlib import Path
+
+from scrapy.utils.test import get_crawler
+
+from sigaa.items import DocenteResumo
+from sigaa.spiders.docentes import (VISTOS_SIAPES, CheckpointJournal,
+                                    DocentesOrquestradorSpider, limpar_checkpoint)
+from sigaa.vistos import ConjuntoVistos
+
+
+def journal(pasta):
+    return CheckpointJournal(pasta / 'checkpoint.jsonl', pasta / 'checkpoint.json')
+
+
+def docente(siape):
+    return DocenteResumo(codigo_departamento='508', departamento='FGA',
+                         nome_docente=f'Docente {siape}', siape=siape)
+
+
+def test_retomada_le_o_snapshot_e_so_a_cauda(tmp_path):
+    checkpoint = journal(tmp_path)
+    for siape in ('1', '2', '3'):
+        checkpoint.registrar_docente(docente(siape))
+        checkpoint.registrar_siape(siape)
+    checkpoint.registrar_departamento('508', 1, 2)
+    checkpoint.compactar()
+    checkpoint.registrar_docente(docente('4'))
+    checkpoint.registrar_siape('4')
+    checkpoint.fechar()
+
+    linhas = (tmp_path / 'checkpoint.jsonl').read_text(encoding='utf-8').splitlines()
+    assert len(linhas) == 3
+    assert linhas[0].startswith('{"evento": "estado"')
+
+    retomado = journal(tmp_path)
+    assert retomado.carregar()
+    assert [d.siape for d in retomado.docentes_coletados] == ['1', '2', '3', '4']
+    assert retomado.siapes_concluidos == {'1', '2', '3', '4'}
+    assert retomado.departamentos_concluidos == {'508'}
+    assert (retomado.departamento_atual, retomado.total_departamentos) == (1, 2)
+    assert (retomado.eventos_base, retomado.eventos_cauda) == (8, 2)
+
+
+def orquestrador():
+    crawler = get_crawler(DocentesOrquestradorSpider)
+    return DocentesOrquestradorSpider.from_crawler(crawler)
+
+
+def execucao_anterior():
+    """Checkpoint com o SIAPE 1 concluído e saída final com os SIAPEs 1 e 2"""
+    checkpoint = CheckpointJournal()
+    checkpoint.registrar_docente(docente('1'))
+    checkpoint.registrar_siape('1')
+    checkpoint.fechar()
+    saida = Path('data/docentes/docentes_test.jsonl')
+    saida.write_text(''.join(json.dumps({'siape': s}) + '\n' for s in ('1', '2')),
+                     encoding='utf-8')
+
+
+def test_retomada_semeia_os_vistos_so_com_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('data/docentes').mkdir(parents=True)
+    execucao_anterior()
+
+    spider = orquestrador()
+    assert spider.retomando
+    assert '1' in spider.vistos and '2' in spider.vistos
+    spider.vistos.fechar()
+
+    limpar_checkpoint()
+
+    assert not VISTOS_SIAPES.exists()
+    assert not VISTOS_SIAPES.with_name(VISTOS_SIAPES.name + '.log').exists()
+    spider = orquestrador()
+    assert not spider.retomando
+    assert len(spider.vistos) == 0
+
+
+def test_vistos_sem_checkpoint_sao_descartados(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sobra = ConjuntoVistos(VISTOS_SIAPES)
+    sobra.adicionar('1')
+    sobra.fechar()
+
+    spider = orquestrador()
+
+    assert '1' not in spider.vistos
+    assert not VISTOS_SIAPES.exists()
@@ -0,0 +1,80 @@
+"""Estado por entidade e JSONL consolidado com logs de mudanças (sigaa/delta.py)"""
+import json
+
+from sigaa import delta
+from sigaa.delta import EstadoEntidades, caminho_mudancas, ler_saida
+
+
+def turma(departamento, codigo, docente='A'):
+    return {'id_departamento': departamento, 'codigo': codigo, 'docente': docente}
+
+
+def estado(pasta):
+    return EstadoEntidades(pasta / '.estado' / '2025-1.json',
+                           chave_registro=lambda registro: registro['codigo'])
+
+
+def execucao(pasta, paginas, removidos=()):
+    """Uma execução do modo incremental: atualiza, remove, salva e grava a saída"""
+    atual = estado(pasta)
+    for departamento, turmas in paginas.items():
+        atual.atualizar(departamento, json.dumps(turmas), turmas)
+    for departamento in removidos:
+        atual.remover(departamento)
+    atual.salvar()
+    atual.gravar_saida(pasta / '2025-1.jsonl', ordem=int)
+    return atual
+
+
+def linhas(caminho):
+    return [json.loads(linha) for linha in caminho.read_text(encoding='utf-8').splitlines()]
+
+
+def test_mudancas_vao_para_os_logs_sem_regravar_snapshot_e_saida(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta, 'FRACAO_COMPACTACAO', 10.0)
+    execucao(tmp_path, {
+        '508': [turma('508', 'T01'), turma('508', 'T02')],
+        '673': [turma('673', 'T01')],
+        '12': [turma('12', 'T05')],
+    })
+    snapshot = (tmp_path / '.estado' / '2025-1.json').read_bytes()
+    saida = (tmp_path / '2025-1.jsonl').read_bytes()
+
+    execucao(tmp_path, {'508': [turma('508', 'T01', docente='B'), turma('508', 'T03')]},
+             removidos=['12'])
+
+    assert (tmp_path / '.estado' / '2025-1.json').read_bytes() == snapshot
+    assert (tmp_path / '2025-1.jsonl').read_bytes() == saida
+    assert len(linhas(tmp_path / '.estado' / '2025-1.log.jsonl')) == 2
+    operacoes = [linha['operacao'] for linha in linhas(caminho_mudancas(tmp_path / '2025-1.jsonl'))[1:]]
+    assert sorted(operacoes) == ['adicionado', 'alterado', 'removido', 'removido']
+
+    retomado = estado(tmp_path)
+    assert sorted(retomado.entidades) == ['508', '673']
+    consolidado = list(ler_saida(tmp_path / '2025-1.jsonl'))
+    assert sorted(consolidado, key=json.dumps) == sorted(retomado.registros(), key=json.dumps)
+
+
+def test_log_grande_compacta_snapshot_e_saida(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta, 'FRACAO_COMPACTACAO', 0.0)
+    execucao(tmp_path, {'508': [turma('508', 'T01')], '673': [turma('673', 'T01')]})
+
+    execucao(tmp_path, {'508': [turma('508', 'T02')]}, removidos=['673'])
+
+    assert not (tmp_path / '.estado' / '2025-1.log.jsonl').exists()
+    assert json.loads((tmp_path / '.estado' / '2025-1.json').read_text(encoding='utf-8')) == {
+        '508': {'hash': json.dumps([turma('508', 'T02')]), 'registros': [turma('508', 'T02')]}}
+    assert linhas(tmp_path / '2025-1.jsonl') == [turma('508', 'T02')]
+    assert len(linhas(caminho_mudancas(tmp_path / '2025-1.jsonl'))) == 1  # só o cabeçalho
+
+
+def test_saida_regravada_por_outro_programa_ignora_o_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta, 'FRACAO_COMPACTACAO', 10.0)
+    execucao(tmp_path, {'508': [turma('508', 'T01')]})
+    execucao(tmp_path, {'508': [turma('508', 'T02')]})
+    (tmp_path / '2025-1.jsonl').write_text(json.dumps(turma('508', 'T09')) + '\n', encoding='utf-8')
+
+    assert list(ler_saida(tmp_path / '2025-1.jsonl')) == [turma('508', 'T09')]
+
+    execucao(tmp_path, {'673': [turma('673', 'T01')]})
+    assert linhas(tmp_path / '2025-1.jsonl') == [turma('508', 'T02'), turma('673', 'T01')]
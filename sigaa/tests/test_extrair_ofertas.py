@@ -0,0 +1,20 @@
+"""Planejamento da extração incremental de ofertas (analise/extrair_ofertas.py)"""
+from analise import extrair_ofertas
+from sigaa.acervo import AcervoHtml
+from sigaa.spiders.ofertas import chave_acervo, chave_lote
+
+
+def test_buscas_em_lote_nao_entram_como_departamento(tmp_path, monkeypatch):
+    monkeypatch.setattr(extrair_ofertas, 'base_saida', tmp_path / 'ofertas')
+    monkeypatch.setattr(extrair_ofertas, 'base_cache', tmp_path / 'ofertas' / '.cache')
+    with AcervoHtml(tmp_path / 'acervo') as acervo:
+        acervo.gravar(chave_acervo('2025', '1', '673'), '<html>673</html>')
+        acervo.gravar(chave_acervo('2025', '1', '508'), '<html>508</html>')
+        acervo.gravar(chave_lote('2025', '1', ''), '<html>lote</html>')
+        acervo.gravar(chave_lote('2025', '1', 'G'), '<html>lote G</html>')
+        acervo.gravar('2025/1/lote-G', '<html>lote antigo</html>')  # acervo anterior
+
+    plano = extrair_ofertas.planejar_semestre(AcervoHtml(tmp_path / 'acervo'), '2025', '1')
+
+    assert plano['chaves'] == ['2025/1/508', '2025/1/673']
+    assert [chave for chave, _ in plano['pendentes']] == ['2025/1/508', '2025/1/673']
@@ -0,0 +1,50 @@
+"""Serialização dos modelos (sigaa/items.py) igual à dos dicts que eles substituem"""
+import io
+import json
+
+from scrapy.exporters import JsonLinesItemExporter
+
+from sigaa.items import DocenteCompleto
+from sigaa.spiders import docentes
+
+# linha de docentes.jsonl com None e colunas fora do DocenteResumo no meio
+ORIGINAIS = {'codigo_departamento': '508', 'departamento': 'FGA', 'coluna_antiga': 'x',
+             'nome_docente': 'ANA', 'siape': '123', 'link_pagina': None,
+             'processamento': None, 'observacao': {'fonte': 'planilha'}}
+EXTRAIDOS = {'nome_completo': 'Ana Souza', 'email': None, 'formacao_resumida': 'Doutorado',
+             'curriculo_lattes_dados': {'areas': ['Computação'], 'resumo': None}}
+
+
+def linha_antiga(dados_originais, dados_extraidos, siape, arquivo_origem, agora):
+    """O registro como era montado e exportado antes do DocenteCompleto"""
+    dados_completos = {
+        **dados_originais,
+        **dados_extraidos,
+        "siape_processado": siape,
+        "arquivo_html_origem": arquivo_origem,
+        "timestamp_processamento": agora,
+        "status_processamento": "sucesso"
+    }
+    return json.dumps(dados_completos, ensure_ascii=False) + '\n'
+
+
+def test_docente_completo_sai_como_o_dict_original(monkeypatch):
+    monkeypatch.setattr(docentes.time, 'time', lambda: 1_760_000_000.5)
+    antiga = linha_antiga(ORIGINAIS, EXTRAIDOS, '123', 'html/123.html', 1_760_000_000.5)
+
+    docente = docentes.montar_docente_completo(ORIGINAIS, EXTRAIDOS, '123', 'html/123.html')
+
+    assert docente.para_jsonl() == antiga
+    # -o: o FeedExporter passa pelo AdaptadorModelo
+    saida = io.BytesIO()
+    exportador = JsonLinesItemExporter(saida, encoding='utf-8')
+    exportador.export_item(docente)
+    assert saida.getvalue().decode('utf-8') == antiga
+
+
+def test_docente_completo_so_tem_as_chaves_recebidas():
+    docente = DocenteCompleto.de_dict({'siape': '123', 'email': None, 'extra': 1})
+
+    assert docente.get('email', 'padrao') is None
+    assert docente.get('sala', 'padrao') == 'padrao'
+    assert list(docente.para_dict()) == ['siape', 'email', 'extra']
@@ -0,0 +1,97 @@
+"""Busca de ofertas em lote (sigaa/lote.py e OfertasSpider com lote=1)"""
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from sigaa.items import Oferta
+from sigaa.lote import MapaDisciplinas, turmas_do_lote
+from sigaa.listagem import EXTRATOR_TURMAS
+from sigaa.spiders.ofertas import OfertasSpider
+
+
+def disciplina(codigo, *turmas):
+    linhas = [f'<tr class="agrupador"><td colspan="8"><span class="tituloDisciplina">'
+              f'{codigo} - DISCIPLINA {codigo}</span></td></tr>']
+    linhas += [f'<tr class="linhaPar"><td class="turma">{turma}</td><td class="anoPeriodo">2025.1</td>'
+               f'<td class="nome">DOCENTE</td><td>35T23</td><td></td><td>40</td><td>10</td>'
+               f'<td>FGA S1</td></tr>' for turma in turmas]
+    return ''.join(linhas)
+
+
+def pagina(*disciplinas, fora=''):
+    return ('<html><body>'
+            f'<table class="listagem"><tbody>{fora}</tbody></table>'
+            '<div id="turmasAbertas"><table class="listagem"><tbody>'
+            + ''.join(disciplinas) + '</tbody></table></div></body></html>')
+
+
+def resposta(corpo, tarefa):
+    request = Request('https://sigaa.unb.br/sigaa/public/turmas/listar.jsf',
+                      meta={'tarefa': tarefa, 'sessao': 0, 'id_departamento': tarefa['id_departamento'],
+                            'ano': tarefa['ano'], 'semestre': tarefa['semestre']})
+    return HtmlResponse(request.url, body=corpo.encode('utf-8'), encoding='utf-8',
+                        request=request)
+
+
+def spider_lote(tmp_path):
+    crawler = get_crawler(OfertasSpider)
+    spider = OfertasSpider.from_crawler(crawler, lote='1', arquivar='0', sessoes='1')
+    spider.mapa = MapaDisciplinas(tmp_path / 'disciplinas.json')
+    spider.crawler.stats.open_spider(spider)
+    return spider
+
+
+def test_so_a_tabela_de_turmas_abertas_entra_no_lote():
+    corpo = pagina(disciplina('FGA0001', 'T01', 'T02'), fora=disciplina('ENE0001', 'T09'))
+    turmas = turmas_do_lote(resposta(corpo, {'id_departamento': '', 'ano': '2025',
+                                             'semestre': '1'}), EXTRATOR_TURMAS)
+
+    assert [(codigo, turma['codigo']) for codigo, turma in turmas] == [
+        ('FGA0001', 'T01'), ('FGA0001', 'T02')]
+
+
+def test_atribuicao_por_prefixo_e_marcada(tmp_path):
+    mapa = MapaDisciplinas(tmp_path / 'disciplinas.json')
+    mapa.aprender('673', ['FGA0001'])
+    mapa.aprender('508', ['ENE0001', 'ENM0001'])
+
+    assert mapa.atribuir('FGA0001') == ('673', True)
+    assert mapa.atribuir('FGA0999') == ('673', False)
+    assert mapa.atribuir('EN0001') == (None, False)
+
+
+def test_lote_emite_por_linha_e_a_divisao_nao_repete_turmas(tmp_path):
+    spider = spider_lote(tmp_path)
+    spider.mapa.aprender('673', ['FGA0001'])
+    spider.mapa.aprender('508', ['ENE0001'])
+    lote = {'departamento': 'TODOS', 'id_departamento': '', 'ano': '2025', 'semestre': '1',
+            'tentativas': 0, 'lote': [('508', 'ENE'), ('673', 'FGA')]}
+    corpo = pagina(disciplina('FGA0001', 'T01'), disciplina('FGA0002', 'T01'),
+                   disciplina('XYZ0001', 'T01'))
+
+    saida = spider.parse_lote(resposta(corpo, lote))
+    assert isinstance(next(saida), Oferta)  # antes de ler o resto da página
+    resto = list(saida)
+
+    assert [item.codigo for item in resto if isinstance(item, Oferta)] == ['T01']
+    assert spider.crawler.stats.get_value('ofertas_lote/divisoes') == 1
+    tarefa = next(tarefa for tarefa in spider.tarefas if tarefa['id_departamento'] == '673')
+    assert sum(tarefa['emitidas'].values()) == 2
+
+    departamento = pagina(disciplina('FGA0001', 'T01'), disciplina('FGA0002', 'T01', 'T02'))
+    itens = [item for item in spider.parse(resposta(departamento, tarefa))
+             if isinstance(item, Oferta)]
+    assert [(item.codigo, item.id_departamento) for item in itens] == [('T02', '673')]
+
+
+def test_lote_conta_as_disciplinas_atribuidas_pelo_prefixo(tmp_path):
+    spider = spider_lote(tmp_path)
+    spider.mapa.aprender('673', ['FGA0001'])
+    lote = {'departamento': 'TODOS', 'id_departamento': '', 'ano': '2025', 'semestre': '1',
+            'tentativas': 0, 'lote': [('673', 'FGA')]}
+    corpo = pagina(disciplina('FGA0001', 'T01'), disciplina('FGA0777', 'T01', 'T02'))
+
+    itens = list(spider.parse_lote(resposta(corpo, lote)))
+
+    assert [item.id_departamento for item in itens] == ['673'] * 3
+    assert spider.crawler.stats.get_value('ofertas_lote/por_prefixo') == 1
+    assert spider.crawler.stats.get_value('ofertas_lote/buscas') == 1
@@ -0,0 +1,175 @@
+"""
+Cadeia de downloader middlewares do projeto (settings.py) com respostas gzip,
+como o SIGAA responde quando a requisição manda Accept-Encoding
+"""
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Spider, signals
+from scrapy.core.downloader import Downloader
+from scrapy.core.downloader.middleware import DownloaderMiddlewareManager
+from scrapy.http import FormRequest, Headers, Request, TextResponse
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+from twisted.internet.defer import Deferred, succeed
+
+URL_FORMULARIO = 'https://sigaa.unb.br/sigaa/public/turmas/listar.jsf?aba=p-ensino'
+URL_LISTAR = 'https://sigaa.unb.br/sigaa/public/turmas/listar.jsf'
+
+FORMULARIO = (
+    '<html><body><form id="formTurma">'
+    '<input type="hidden" name="javax.faces.ViewState" value="{viewstate}" />'
+    '</form>{resultado}</body></html>')
+RESULTADO = ('<div id="turmasAbertas"><table class="listagem"><tbody>'
+             '<tr><td class="turma">01</td></tr></tbody></table></div>')
+EXPIRADA = '<html><body><h2>Sua sessão expirou.</h2></body></html>'
+ERRO = '<html><body><h2>Comportamento Inesperado!</h2></body></html>'
+
+
+def pagina(html):
+    return FORMULARIO.format(**html) if isinstance(html, dict) else html
+
+
+class ServidorGzip:
+    """download_func da cadeia: responde com a página da URL/método, em gzip"""
+
+    def __init__(self, paginas):
+        self.paginas = paginas
+        self.requisicoes = []
+
+    def __call__(self, request, spider):
+        self.requisicoes.append(request)
+        # o que o downloader faz antes dos middlewares receberem a resposta
+        request.meta.setdefault('download_slot', 'sigaa.unb.br#listar.jsf')
+        request.meta['download_latency'] = 0.2
+        headers = Headers({'Content-Type': 'text/html; charset=UTF-8', 'Content-Encoding': 'gzip'})
+        corpo = gzip.compress(pagina(self.paginas[request.method]).encode('utf-8'))
+        # classe escolhida como no HTTP11DownloadHandler: com Content-Encoding,
+        # Response binária até o HttpCompressionMiddleware descomprimir
+        classe = responsetypes.from_args(headers=headers, url=request.url, body=corpo)
+        response = classe(request.url, status=200, headers=headers, body=corpo, request=request)
+        spider.crawler.signals.send_catch_log(
+            signals.response_downloaded, response=response, request=request, spider=spider)
+        return succeed(response)
+
+
+@pytest.fixture
+def cadeia():
+    settings = Settings()
+    settings.setmodule('sigaa.settings', priority='project')
+    # get_crawler já cria as extensões (ThrottleSigaa), antes dos middlewares
+    crawler = get_crawler(Spider, settings.copy_to_dict())
+    crawler.engine = SimpleNamespace(downloader=Downloader(crawler))
+    manager = DownloaderMiddlewareManager.from_crawler(crawler)
+    spider = Spider.from_crawler(crawler, name='ofertas')
+    crawler.signals.send_catch_log(signals.spider_opened, spider=spider)
+    return manager, spider
+
+
+def baixar(cadeia, request, servidor):
+    manager, spider = cadeia
+    resultado = []
+    manager.download(servidor, request, spider).addBoth(resultado.append)
+    return resultado[0]
+
+
+def busca(viewstate='j_id1'):
+    return FormRequest(URL_LISTAR, formdata={
+        'formTurma': 'formTurma',
+        'formTurma:inputDepto': '508',
+        'javax.faces.ViewState': viewstate,
+    }, meta={'sigaa_url_formulario': URL_FORMULARIO})
+
+
+def test_resultado_gzip_chega_descomprimido_ao_spider(cadeia):
+    servidor = ServidorGzip({'POST': {'viewstate': 'j_id2', 'resultado': RESULTADO}})
+
+    response = baixar(cadeia, busca(), servidor)
+
+    assert isinstance(response, TextResponse)
+    assert response.css('td.turma::text').get() == '01'
+    assert len(servidor.requisicoes) == 1
+
+
+def test_view_expirada_gzip_e_recuperada(cadeia):
+    servidor = ServidorGzip({
+        'POST': EXPIRADA,
+        'GET': {'viewstate': 'j_id9', 'resultado': ''},
+    })
+
+    formulario = baixar(cadeia, busca(), servidor)
+    assert isinstance(formulario, Request)
+    assert formulario.method == 'GET' and formulario.url == URL_FORMULARIO
+
+    reenvio = baixar(cadeia, formulario, servidor)
+    assert isinstance(reenvio, Request)
+    assert reenvio.method == 'POST'
+    assert b'javax.faces.ViewState=j_id9' in reenvio.body
+    assert reenvio.meta['sigaa_sessao_recuperacoes'] == 1
+
+
+def test_pagina_de_erro_gzip_conta_como_sobrecarga(cadeia):
+    _, spider = cadeia
+    throttle = spider.crawler.sigaa_throttle
+    servidor = ServidorGzip({'POST': ERRO})
+
+    baixar(cadeia, busca(), servidor)
+
+    estado = throttle.classes['listar.jsf']
+    assert spider.crawler.stats.get_value('sigaa_throttle/listar.jsf/sobrecargas') == 1
+    assert estado.atraso == 2.0
+
+
+def test_slot_novo_recebe_atraso_e_concorrencia_da_classe(cadeia):
+    _, spider = cadeia
+    downloader = spider.crawler.engine.downloader
+    request = Request('https://sigaa.unb.br/sigaa/public/docente/portal.jsf?siape=1')
+    spider.crawler.signals.send_catch_log(signals.request_scheduled, request=request, spider=spider)
+
+    chave, slot = downloader._get_slot(request, spider)
+    request.meta['download_slot'] = chave
+    spider.crawler.signals.send_catch_log(
+        signals.request_reached_downloader, request=request, spider=spider)
+
+    assert chave == 'sigaa.unb.br#portal_docente'
+    # atraso da classe (0.25) limitado pelo DOWNLOAD_DELAY do projeto (1)
+    assert (slot.delay, slot.concurrency) == (1.0, 2)
+
+
+def test_sessoes_dividem_a_concorrencia_da_classe(cadeia):
+    manager, spider = cadeia
+    throttle = spider.crawler.sigaa_throttle
+    throttle.parametros['listar.jsf']['atraso_min'] = 0.0
+    em_andamento = {}
+
+    def baixar_pendente(request, spider):
+        em_andamento[request.meta['download_slot']] = (request, Deferred())
+        return em_andamento[request.meta['download_slot']][1]
+
+    def sair(sessao):
+        request, resultado = em_andamento.pop(f'ofertas-sessao-{sessao}')
+        spider.crawler.signals.send_catch_log(
+            signals.request_left_downloader, request=request, spider=spider)
+        resultado.callback(TextResponse(request.url, body=b'<html></html>', request=request))
+
+    for sessao in range(4):
+        request = busca()
+        request.meta['download_slot'] = f'ofertas-sessao-{sessao}'
+        manager.download(baixar_pendente, request, spider)
+
+    # listar.jsf começa com concorrência 1: uma sessão por vez no downloader
+    assert list(em_andamento) == ['ofertas-sessao-0']
+    sair(0)
+    assert list(em_andamento) == ['ofertas-sessao-1']
+
+    estado = throttle.classes['listar.jsf']
+    estado.concorrencia = 2
+    throttle._aplicar(estado, busca(), spider, None, None)
+    assert list(em_andamento) == ['ofertas-sessao-1', 'ofertas-sessao-2']
+
+    for _ in range(50):
+        estado.resposta(0.01, janela=100, fator_lentidao=3.0)
+    # nem com o servidor rápido o atraso fica abaixo do DOWNLOAD_DELAY do spider
+    assert estado.atraso == 1.0
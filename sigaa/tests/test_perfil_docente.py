@@ -0,0 +1,269 @@
+"""
+Extrator de perfil de docentes (sigaa/spiders/docentes.py): o walker de
+dt/dd produz o mesmo dicionário que a versão anterior, com uma consulta
+XPath por campo, e o CurriculoLattes decodifica o script do currículo nos
+três caminhos (JSON, varredura dos pares "chave": "valor" e entidades HTML)
+"""
+import re
+
+import pytest
+from parsel import Selector
+
+from sigaa.spiders.docentes import (CurriculoLattes, extrair_dados_curriculo_lattes,
+                                    extrair_dados_perfil_docente)
+
+
+def extrair_perfil_xpath(response):
+    """Extração anterior ao walker de dt/dd (uma consulta XPath por campo)"""
+    dados = {}
+
+    try:
+        # === INFORMAÇÕES BÁSICAS ===
+        nome_completo = response.css("#id-docente h3::text").get()
+        if nome_completo:
+            dados["nome_completo"] = nome_completo.strip().title()
+
+        departamento_completo = response.css(
+            "#id-docente p.departamento::text").get()
+        if departamento_completo:
+            dados["departamento_completo"] = departamento_completo.strip()
+
+        # Foto do docente
+        foto_url = response.css("#left .foto_professor img::attr(src)").get()
+        if foto_url:
+            if not foto_url.startswith('http'):
+                foto_url = f"https://sigaa.unb.br{foto_url}" if foto_url.startswith(
+                    '/') else foto_url
+            dados["foto_url"] = foto_url
+
+        # === PERFIL PESSOAL ===
+        perfil_section = response.css("#perfil-docente")
+        if perfil_section:
+            # Descrição pessoal
+            descricao_xpath = "//dt[contains(text(), 'Descrição pessoal')]/following-sibling::dd[1]/text()"
+            descricao = response.xpath(descricao_xpath).get()
+            if descricao and descricao.strip():
+                dados["descricao_pessoal"] = descricao.strip()
+
+            # Formação acadêmica resumida
+            formacao_xpath = "//dt[contains(text(), 'Formação acadêmica')]/following-sibling::dd[1]//text()"
+            formacao_textos = response.xpath(formacao_xpath).getall()
+            if formacao_textos:
+                formacao = " | ".join([t.strip()
+                                      for t in formacao_textos if t.strip()])
+                dados["formacao_resumida"] = formacao
+
+            # Áreas de interesse
+            areas_xpath = "//dt[contains(text(), 'Áreas de Interesse')]/following-sibling::dd[1]/text()"
+            areas = response.xpath(areas_xpath).get()
+            if areas and areas.strip():
+                dados["areas_interesse"] = areas.strip()
+
+            # Currículo Lattes
+            lattes_xpath = "//dt[contains(text(), 'Lattes')]/following-sibling::dd[1]/a/@href"
+            lattes_link = response.xpath(lattes_xpath).get()
+            if lattes_link:
+                dados["curriculo_lattes"] = lattes_link.strip()
+
+        # === FORMAÇÃO DETALHADA ===
+        formacao_section = response.css("#formacao-academica")
+        if formacao_section:
+            formacao_detalhes = {}
+
+            # Usar XPath mais preciso para formação
+            niveis = response.xpath(
+                "//div[@id='formacao-academica']//dt/span[@class='ano']/text()").getall()
+            detalhes = response.xpath(
+                "//div[@id='formacao-academica']//dd//text()").getall()
+
+            if niveis and detalhes:
+                # Agrupar detalhes por nível
+                i = 0
+                for nivel in niveis:
+                    if i < len(detalhes):
+                        detalhes_nivel = []
+                        # Pegar próximos 3-4 elementos de texto (curso, instituição, período)
+                        for j in range(3):
+                            if i + j < len(detalhes) and detalhes[i + j].strip():
+                                detalhes_nivel.append(detalhes[i + j].strip())
+
+                        if detalhes_nivel:
+                            formacao_detalhes[nivel.strip()] = " | ".join(
+                                detalhes_nivel)
+                        i += len(detalhes_nivel)
+
+            if formacao_detalhes:
+                dados["formacao_detalhada"] = formacao_detalhes
+
+        # === CONTATOS ===
+        contato_section = response.css("#contato")
+        if contato_section:
+            # Telefone/Ramal
+            telefone_xpath = "//dt[contains(text(), 'Telefone')]/following-sibling::dd[1]/text()"
+            telefone = response.xpath(telefone_xpath).get()
+            if telefone and "não informado" not in telefone.lower():
+                dados["telefone_ramal"] = telefone.strip()
+
+            # Email
+            email_xpath = "//dt[contains(text(), 'eletrônico')]/following-sibling::dd[1]/text()"
+            email = response.xpath(email_xpath).get()
+            if email and "não informado" not in email.lower():
+                dados["email"] = email.strip()
+
+            # Sala
+            sala_xpath = "//dt[contains(text(), 'Sala')]/following-sibling::dd[1]/text()"
+            sala = response.xpath(sala_xpath).get()
+            if sala and "não informado" not in sala.lower():
+                dados["sala"] = sala.strip()
+
+    except Exception as e:
+        dados["erro_extracao"] = str(e)
+
+    return dados
+
+
+PAGINA = """<html><body>
+<div id="left"><div class="foto_professor"><img src="{foto}"/></div></div>
+<div id="id-docente"><h3>FULANO DE TAL {i}</h3><p class="departamento">DEPTO {i}</p></div>
+{perfil}
+<div id="formacao-academica"><dl>
+<dt><span class="ano">Doutorado</span></dt><dd><span>Estatística</span> <span>UnB</span><span>2001 - 2005</span></dd>
+<dt><span class="ano">Mestrado</span></dt><dd><span>Matemática</span><span>USP</span></dd>
+</dl></div>
+{contato}
+</body></html>"""
+
+PERFIL = """<div id="perfil-docente"><dl>
+<dt>Descrição pessoal</dt><dd>  Professor &amp; pesquisador {i} </dd>
+<dt>Formação acadêmica</dt><dd><b>Doutorado</b> em Estatística<br/> </dd>
+<dt>Áreas de Interesse</dt><dd><!-- vazio --></dd>
+<dt>Currículo Lattes</dt><dd><a href=" http://lattes.cnpq.br/{i} ">link</a></dd>
+</dl></div>"""
+
+# descrição em branco, áreas com texto depois de um comentário, sem Lattes
+PERFIL_PARCIAL = """<div id="perfil-docente"><dl>
+<dt>Descrição pessoal</dt><dd>   </dd>
+<dt>Áreas de Interesse</dt><dd><!-- x --> Estatística Bayesiana</dd>
+<dt>Currículo Lattes</dt><dd>Não possui</dd>
+</dl></div>"""
+
+CONTATO = """<div id="contato"><dl>
+<dt>Telefone/Ramal</dt><dd>{telefone}</dd>
+<dt>Endereço eletrônico</dt><dd>f{i}@unb.br</dd>
+<dt>Sala</dt><dd>Não informado</dd>
+</dl></div>"""
+
+# rótulos repetidos e um dt sem dd
+CONTATO_REPETIDO = """<div id="contato"><dl>
+<dt>Telefone/Ramal</dt><dd>NÃO INFORMADO</dd>
+<dt>Telefone/Ramal</dt><dd>3107-0000</dd>
+<dt>Sala</dt>
+</dl></div>"""
+
+
+def pagina(i):
+    return PAGINA.format(
+        i=i,
+        foto=('/sigaa/img/{i}.jpg', 'https://cdn/{i}.jpg', 'img/{i}.jpg')[i % 3].format(i=i),
+        perfil=(PERFIL.format(i=i), '', PERFIL_PARCIAL)[i % 3] if i % 4 else '',
+        contato=(CONTATO.format(i=i, telefone='Não informado' if i % 3 == 0 else f'3107-{i:04d}')
+                 if i % 5 else CONTATO_REPETIDO),
+    )
+
+
+@pytest.mark.parametrize('i', range(12))
+def test_walker_igual_ao_xpath_por_campo(i):
+    seletor = Selector(text=pagina(i))
+
+    antes, depois = extrair_perfil_xpath(seletor), extrair_dados_perfil_docente(seletor)
+
+    assert list(depois.items()) == list(antes.items())
+
+
+# ================================================================================
+# CURRÍCULO LATTES
+# ================================================================================
+
+def extrair_curriculo_regex(script_content):
+    """Extração anterior ao CurriculoLattes (uma regex por campo)"""
+    curriculo_info = {}
+    match_data = re.search(r'"dataatualizacao":\s*"(\d+)"', script_content)
+    if match_data:
+        data_raw = match_data.group(1)
+        if len(data_raw) == 8:
+            curriculo_info["data_atualizacao"] = f"{data_raw[:2]}/{data_raw[2:4]}/{data_raw[4:]}"
+    match_citacao = re.search(r'"nomeemcitacoesbibliograficas":\s*"([^"]+)"', script_content)
+    if match_citacao:
+        curriculo_info["nome_citacoes"] = match_citacao.group(1)
+    match_resumo = re.search(r'"textoresumocvrh":\s*"([^"]+)"', script_content)
+    if match_resumo:
+        resumo = match_resumo.group(1)
+        resumo = resumo.replace("&#201;", "É").replace("&#195;", "Ã").replace("&#231;", "ç")
+        curriculo_info["resumo_cv"] = resumo[:300] + "..." if len(resumo) > 300 else resumo
+    return curriculo_info if curriculo_info else None
+
+
+# JSON estrito, com o resumo aninhado
+SCRIPT_JSON = """
+    var curriculo = {"dataatualizacao": "05032024", "nomeemcitacoesbibliograficas": "SOUZA, A.",
+                     "resumo": {"textoresumocvrh": "&#201; professora de estat&#237;stica"}};
+    mostrar(curriculo);
+"""
+
+# objeto JavaScript que não é JSON (chave sem aspas, aspas simples): raw_decode falha
+SCRIPT_JS = """
+    var curriculo = {id: 10, "dataatualizacao": "05032024", 'x': 1,
+                     "nomeemcitacoesbibliograficas": "SOUZA, A. \\"ANA\\"",
+                     "textoresumocvrh": "Atua&#231;&#195;o em \\u00e1lgebra",
+                     "textoresumocvrh": "segunda ocorrência", "invalido": "a\\qb"};
+"""
+
+
+def test_curriculo_json_estrito():
+    curriculo = CurriculoLattes(SCRIPT_JSON)
+
+    assert curriculo.campos['textoresumocvrh'] == '&#201; professora de estat&#237;stica'
+    assert curriculo.get('textoresumocvrh') == 'É professora de estatística'
+    assert curriculo['dataatualizacao'] == '05032024'
+    assert 'resumo' not in curriculo
+    assert curriculo.get('ausente', 'padrao') == 'padrao'
+
+
+def test_curriculo_que_nao_e_json_cai_na_varredura_dos_pares():
+    curriculo = CurriculoLattes(SCRIPT_JS)
+
+    assert 'id' not in curriculo and 'x' not in curriculo
+    assert curriculo['nomeemcitacoesbibliograficas'] == 'SOUZA, A. "ANA"'
+    # primeira ocorrência; escapes JSON e entidades HTML decodificados
+    assert curriculo['textoresumocvrh'] == 'AtuaçÃo em álgebra'
+    assert curriculo['invalido'] == 'a\\qb'  # escape inválido: valor bruto
+
+
+def test_curriculo_sem_atribuicao_varre_o_script_inteiro():
+    curriculo = CurriculoLattes('dados({"dataatualizacao": "01012020"})')
+
+    assert dict(curriculo.campos) == {'dataatualizacao': '01012020'}
+
+
+# a regex não tratava escapes nem outras entidades: só os casos que ela acertava
+@pytest.mark.parametrize('script', [
+    'var curriculo = {id: 10, "dataatualizacao": "05032024", '
+    '"nomeemcitacoesbibliograficas": "SOUZA, A.", "textoresumocvrh": "Atua&#231;&#195;o"};',
+    'var curriculo = {"dataatualizacao": "05032024", "textoresumocvrh": "'
+    + 'Pesquisa&#231;&#195;o ' * 30 + '"};',
+    'var curriculo = {"dataatualizacao": "2024", "nomeemcitacoesbibliograficas": "A"};',
+    'var curriculo = {};',
+])
+def test_dados_do_curriculo_iguais_aos_da_regex(script):
+    assert extrair_dados_curriculo_lattes(script) == extrair_curriculo_regex(script)
+
+
+def test_curriculo_localizado_na_pagina():
+    seletor = Selector(text=f'<html><body><script>{SCRIPT_JSON}</script></body></html>')
+
+    curriculo = CurriculoLattes.da_pagina(seletor)
+
+    assert extrair_dados_curriculo_lattes(curriculo) == {
+        'data_atualizacao': '05/03/2024', 'nome_citacoes': 'SOUZA, A.',
+        'resumo_cv': 'É professora de estatística'}
+    assert CurriculoLattes.da_pagina(Selector(text='<html><script>x = 1</script></html>')) is None
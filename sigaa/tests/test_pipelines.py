@@ -0,0 +1,127 @@
+"""Deduplicação e saída em lotes (sigaa/pipelines.py)"""
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+from scrapy.exceptions import DropItem
+
+from sigaa.pipelines import DeduplicacaoPipeline, SigaaPipeline
+from sigaa.vistos import ConjuntoVistos
+
+
+def spider_com_vistos(pasta):
+    return SimpleNamespace(name='docentes', logger=logging.getLogger('docentes'),
+                           vistos=ConjuntoVistos(pasta / 'siapes.vistos'),
+                           chave_item=lambda item: item.get('siape'))
+
+
+def test_reserva_so_e_gravada_depois_de_confirmada_e_em_ordem(tmp_path):
+    vistos = ConjuntoVistos(tmp_path / 'turmas.vistos')
+    assert vistos.reservar('T01')
+    assert not vistos.reservar('T01')
+    assert 'T01' in vistos
+    vistos.adicionar(('departamento', '508'))  # concluído depois da turma reservada
+    vistos.reservar('T02')
+    vistos.confirmar('T02')
+    vistos.fechar()
+
+    assert len(ConjuntoVistos(tmp_path / 'turmas.vistos')) == 0
+
+    vistos = ConjuntoVistos(tmp_path / 'turmas.vistos')
+    vistos.reservar('T01')
+    vistos.adicionar(('departamento', '508'))
+    vistos.confirmar('T01')
+    vistos.fechar()
+
+    retomado = ConjuntoVistos(tmp_path / 'turmas.vistos')
+    assert 'T01' in retomado and ('departamento', '508') in retomado
+
+
+def test_chave_entra_nos_vistos_depois_do_lote_gravado(tmp_path):
+    spider = spider_com_vistos(tmp_path)
+    deduplicacao = DeduplicacaoPipeline(saida_em_lotes=True)
+    saida = SigaaPipeline(saida=str(tmp_path / 'docentes.jsonl'), lote=2, intervalo=0)
+    gravados = []
+
+    def gravado(registros):
+        # o lote já está no arquivo quando é anunciado
+        linhas = (tmp_path / 'docentes.jsonl').read_text(encoding='utf-8').splitlines()
+        assert [json.loads(linha) for linha in linhas[-len(registros):]] == registros
+        gravados.append(registros)
+
+    saida._gravado = gravado
+    deduplicacao.open_spider(spider)
+    saida.open_spider(spider)
+    for siape in ('1', '2', '3'):
+        saida.process_item(deduplicacao.process_item({'siape': siape}, spider), spider)
+    with pytest.raises(DropItem):
+        deduplicacao.process_item({'siape': '1'}, spider)
+
+    assert not (tmp_path / 'siapes.vistos.log').exists()
+    saida.close_spider(spider)
+    saida.thread.join()
+    for registros in gravados:
+        deduplicacao.confirmar_lote(registros, spider)
+    spider.vistos.fechar()
+
+    assert [len(registros) for registros in gravados] == [2, 1]
+    retomado = ConjuntoVistos(tmp_path / 'siapes.vistos')
+    assert all(siape in retomado for siape in ('1', '2', '3'))
+
+
+def test_com_feed_as_chaves_esperam_a_confirmacao(tmp_path):
+    spider = spider_com_vistos(tmp_path)
+    deduplicacao = DeduplicacaoPipeline(intervalo=0)
+    deduplicacao.open_spider(spider)
+
+    item = deduplicacao.process_item({'siape': '1'}, spider)
+    deduplicacao.item_scraped(item, spider)
+    spider.vistos.sincronizar()
+    assert '1' not in ConjuntoVistos(tmp_path / 'siapes.vistos')
+
+    deduplicacao.close_spider(spider)
+    spider.vistos.sincronizar()
+    assert '1' in ConjuntoVistos(tmp_path / 'siapes.vistos')
+
+
+def gravar(caminho, lotes, spider):
+    """Uma execução do SigaaPipeline com um lote por item de ``lotes``"""
+    saida = SigaaPipeline(saida=str(caminho), lote=1000, intervalo=0)
+    saida.open_spider(spider)
+    for lote in lotes:
+        for item in lote:
+            saida.process_item(item, spider)
+        saida.descarregar()
+    saida.close_spider(spider)
+    saida.thread.join()
+    return saida
+
+
+def test_csv_acrescenta_colunas_que_aparecem_depois(tmp_path):
+    spider = spider_com_vistos(tmp_path)
+    caminho = tmp_path / 'itens.csv'
+    gravar(caminho, [[{'a': 1}, {'a': 2}], [{'a': 3, 'b': [1, 2]}]], spider)
+    gravar(caminho, [[{'a': 4, 'c': 'x'}]], spider)
+
+    assert caminho.read_text(encoding='utf-8').splitlines() == [
+        'a;b;c', '1;;', '2;;', '3;[1, 2];', '4;;x']
+    assert not (tmp_path / 'itens.csv.transbordo.jsonl').exists()
+
+
+def test_parquet_acrescenta_colunas_e_falha_alto(tmp_path, caplog):
+    pyarrow = pytest.importorskip('pyarrow.parquet')
+    spider = spider_com_vistos(tmp_path)
+    caminho = tmp_path / 'itens.parquet'
+    gravar(caminho, [[{'a': 1}], [{'a': 2, 'b': 'x'}]], spider)
+
+    assert pyarrow.read_table(caminho).to_pylist() == [{'a': 1, 'b': None}, {'a': 2, 'b': 'x'}]
+
+    with caplog.at_level(logging.ERROR):
+        saida = gravar(tmp_path / 'tipos.parquet',
+                       [[{'a': 1}], [{'a': 'texto'}], [{'a': 3}, {'a': 4}]], spider)
+
+    assert saida.erro is not None and saida.perdidos == 3
+    # o lote do erro e o seguinte, cada um com sua linha no log
+    assert sum('não gravados' in registro.message for registro in caplog.records) == 2
+    assert pyarrow.read_table(tmp_path / 'tipos.parquet').to_pylist() == [{'a': 1}]
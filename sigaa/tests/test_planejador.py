@@ -0,0 +1,35 @@
+"""Classificação do PlanejadorOfertas (sigaa/planejador.py)"""
+from sigaa.planejador import DESCONHECIDA, DIA, PROVAVEL, SONDAGEM, PlanejadorOfertas
+
+AGORA = 1_760_000_000.0
+
+
+def planejador(tmp_path):
+    return PlanejadorOfertas(tmp_path / 'planejador.json', limiar=2, intervalo=30 * DIA)
+
+
+def test_departamento_com_turmas_nunca_e_pulado(tmp_path):
+    # janela de matrícula: o semestre novo ainda vem vazio em buscas seguidas
+    plano = planejador(tmp_path)
+    plano.registrar(673, 2024, '2', 35, agora=AGORA)
+    for _ in range(5):
+        plano.registrar(673, 2025, '2', 0, agora=AGORA)
+    assert plano.classificar(673, 2025, '2', agora=AGORA + 1) == DESCONHECIDA
+    assert plano.classificar(673, 2024, '2', agora=AGORA + 1) == PROVAVEL
+
+
+def test_carga_retroativa_busca_anos_nunca_buscados(tmp_path):
+    # departamento fechado em 2020: vazio de 2025 a 2020, ainda com turmas antes
+    plano = planejador(tmp_path)
+    for ano in range(2025, 2019, -1):
+        plano.registrar(508, ano, '1', 0, agora=AGORA)
+    assert plano.classificar(508, 2019, '1', agora=AGORA + 1) == SONDAGEM
+    assert plano.classificar(508, 2015, '1', agora=AGORA + 1) == SONDAGEM
+
+
+def test_ano_ja_buscado_vazio_e_pulado_ate_a_sondagem(tmp_path):
+    plano = planejador(tmp_path)
+    plano.registrar(508, 2025, '3', 0, agora=AGORA)
+    plano.registrar(508, 2024, '3', 0, agora=AGORA)
+    assert plano.classificar(508, 2025, '3', agora=AGORA + DIA) is None
+    assert plano.classificar(508, 2025, '3', agora=AGORA + 31 * DIA) == SONDAGEM